@@ -1,5 +1,23 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+SEARCH_INDEX_MIGRATION = ('account', '0034_student_search_index')
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    # Table rebuilds in later migrations drop the search triggers
+    from django.db.migrations.recorder import MigrationRecorder
+    from .search import ensure_search_index
+
+    connection = connections[using]
+    if SEARCH_INDEX_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        ensure_search_index(connection)
 
 
 class AccountConfig(AppConfig):
     name = 'account'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
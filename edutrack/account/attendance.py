@@ -0,0 +1,141 @@
+"""Bulk writes of weekly attendance sessions and records.
+
+A new WeeklyAttendanceSession gets one default record (all sessions marked
+'A') per student in the subject's grade level, and saving a week's marks
+only writes the records whose marks changed.  Records are written with
+bulk inserts and updates in one transaction; those bypass the post_save
+receivers, so the affected summary rows are refreshed here.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ATTENDANCE_SESSION_FIELDS, WeeklyAttendanceRecord, WeeklyAttendanceSession
+from .scoregrid import subject_students
+from .summaries import refresh_summaries
+
+
+BATCH_SIZE = 500
+MAX_WEEKS = 53
+
+ATTENDANCE_MARKS = ('P', 'A', 'L', 'E')
+# Posted in place of a mark to clear a session
+CLEAR_MARK = '-'
+
+
+def term_weeks(first_week, num_weeks, start_date):
+    """Return (week_number, start, end) for consecutive Monday-Friday weeks."""
+    return [
+        (first_week + i, start_date + timedelta(weeks=i), start_date + timedelta(weeks=i, days=4))
+        for i in range(num_weeks)
+    ]
+
+
+def create_roster_records(sessions, student_ids):
+    """Create the default record of every student missing one in `sessions`.
+
+    Returns the number of records created.
+    """
+    session_ids = [session.id for session in sessions]
+    existing = set(
+        WeeklyAttendanceRecord.objects.filter(session_id__in=session_ids)
+        .order_by()
+        .values_list('session_id', 'student_id')
+    )
+    records = [
+        WeeklyAttendanceRecord(session=session, student_id=student_id)
+        for session in sessions
+        for student_id in student_ids
+        if (session.id, student_id) not in existing
+    ]
+    with transaction.atomic():
+        WeeklyAttendanceRecord.objects.bulk_create(records, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        refresh_summaries({(record.student_id, record.session.subject_id) for record in records})
+    return len(records)
+
+
+def create_weeks(subject, weeks, sessions_per_week=4):
+    """Create the sessions in `weeks` that do not exist yet, with their roster.
+
+    `weeks` is a list of (week_number, start date, end date).  Returns
+    (created sessions, week numbers that already existed, records created).
+    """
+    weeks = {week_number: (start, end) for week_number, start, end in weeks}
+    student_ids = [student.id for student in subject_students([subject.id])[subject.id]]
+
+    with transaction.atomic():
+        skipped = sorted(
+            WeeklyAttendanceSession.objects.filter(subject=subject, week_number__in=weeks)
+            .values_list('week_number', flat=True)
+        )
+        new_weeks = sorted(set(weeks) - set(skipped))
+        WeeklyAttendanceSession.objects.bulk_create([
+            WeeklyAttendanceSession(
+                subject=subject,
+                week_number=week_number,
+                week_start_date=weeks[week_number][0],
+                week_end_date=weeks[week_number][1],
+                sessions_per_week=sessions_per_week,
+            )
+            for week_number in new_weeks
+        ])
+        # Re-read the sessions: not every backend returns primary keys from bulk_create
+        sessions = list(
+            WeeklyAttendanceSession.objects.filter(subject=subject, week_number__in=new_weeks)
+            .order_by('week_number')
+        )
+        records = create_roster_records(sessions, student_ids)
+    return sessions, skipped, records
+
+
+def parse_marks(data, student_ids):
+    """Read the 'attendance_<student id>_session_<n>' fields of the mark form.
+
+    Returns {student_id: {field: mark}} with only valid marks.
+    """
+    marks = {}
+    for student_id in student_ids:
+        student_marks = {}
+        for number, field in enumerate(ATTENDANCE_SESSION_FIELDS, start=1):
+            value = data.get(f'attendance_{student_id}_session_{number}')
+            if value in ATTENDANCE_MARKS:
+                student_marks[field] = value
+        marks[student_id] = student_marks
+    return marks
+
+
+def save_marks(session, marks):
+    """Apply {student_id: {field: mark}} to a session's records.
+
+    A mark of None clears the session.  Existing records are updated only
+    when a mark changed; students without a record get one (unposted
+    sessions keep the model default) unless all their marks are cleared.
+    Returns (records created, records updated).
+    """
+    with transaction.atomic():
+        records = {
+            record.student_id: record
+            for record in WeeklyAttendanceRecord.objects.filter(session=session, student_id__in=list(marks))
+        }
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        for student_id, student_marks in marks.items():
+            record = records.get(student_id)
+            if record is None:
+                if all(value is None for value in student_marks.values()):
+                    continue
+                to_create.append(WeeklyAttendanceRecord(session=session, student_id=student_id, **student_marks))
+            elif any(getattr(record, field) != value for field, value in student_marks.items()):
+                for field, value in student_marks.items():
+                    setattr(record, field, value)
+                record.updated_at = now
+                to_update.append(record)
+
+        WeeklyAttendanceRecord.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        WeeklyAttendanceRecord.objects.bulk_update(
+            to_update, ATTENDANCE_SESSION_FIELDS + ['updated_at'], batch_size=BATCH_SIZE
+        )
+        refresh_summaries({(record.student_id, session.subject_id) for record in to_create + to_update})
+    return len(to_create), len(to_update)
@@ -0,0 +1,103 @@
+"""Cached admin dashboard snapshot.
+
+The admin dashboard figures (role totals and the grade distribution) are
+stored in a DashboardSnapshot row and served through Django's cache.  Score
+changes mark the snapshot stale (see summaries.refresh_summaries); the next
+request or `manage.py refresh_dashboard` recomputes it.
+
+With a per-process cache backend (the default LocMemCache) other processes
+may serve a stale snapshot for up to DASHBOARD_CACHE_TIMEOUT seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .gradecube import grade_distribution
+from .models import DashboardSnapshot, StudentRecord, StudentSubjectSummary, User
+
+
+SNAPSHOT_NAME = 'admin'
+CACHE_KEY = 'account:dashboard_snapshot:admin'
+
+# Chart labels for the stored counts, in display order
+DISTRIBUTION_LABELS = [
+    ('excellent_count', 'Excellent (90+)'),
+    ('good_count', 'Good (80-89)'),
+    ('average_count', 'Average (70-79)'),
+    ('at_risk_count', 'At Risk (<70)'),
+]
+
+
+def cache_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def compute_dashboard_data():
+    """Recompute the admin dashboard figures from the database."""
+    distribution = grade_distribution(
+        StudentSubjectSummary.objects.filter(student__status='active')
+    )
+    return {
+        'total_admins': User.objects.filter(role='admin').count(),
+        'total_faculty': User.objects.filter(role='faculty').count(),
+        'total_students': User.objects.filter(role='student').count(),
+        'total_student_records': StudentRecord.objects.count(),
+        'excellent_count': distribution['Excellent'],
+        'good_count': distribution['Good'],
+        'average_count': distribution['Average'],
+        'at_risk_count': distribution['At Risk'],
+    }
+
+
+def refresh_snapshot():
+    """Recompute and store the snapshot; return the saved DashboardSnapshot."""
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        name=SNAPSHOT_NAME,
+        defaults={
+            'data': compute_dashboard_data(),
+            'computed_at': timezone.now(),
+            'is_stale': False,
+        },
+    )
+    cache.set(CACHE_KEY, _cached_value(snapshot), cache_timeout())
+    return snapshot
+
+
+def _cached_value(snapshot):
+    return {'data': snapshot.data, 'computed_at': snapshot.computed_at}
+
+
+def get_snapshot():
+    """Return {'data': ..., 'computed_at': ...} for the admin dashboard.
+
+    Served from the cache, then from a fresh DashboardSnapshot row, and only
+    recomputed when neither is available.
+    """
+    value = cache.get(CACHE_KEY)
+    if value is not None:
+        return value
+
+    snapshot = DashboardSnapshot.objects.filter(name=SNAPSHOT_NAME, is_stale=False).first()
+    if snapshot is None:
+        snapshot = refresh_snapshot()
+    else:
+        cache.set(CACHE_KEY, _cached_value(snapshot), cache_timeout())
+    return _cached_value(snapshot)
+
+
+def invalidate_snapshot():
+    """Mark the snapshot stale and drop it from the cache once the transaction commits."""
+    DashboardSnapshot.objects.filter(name=SNAPSHOT_NAME, is_stale=False).update(is_stale=True)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def dashboard_context(value):
+    """Template context entries for a snapshot returned by get_snapshot()."""
+    data = value['data']
+    context = dict(data)
+    context['grade_distribution'] = {
+        label: data[key] for key, label in DISTRIBUTION_LABELS
+    }
+    context['snapshot_computed_at'] = value['computed_at']
+    return context
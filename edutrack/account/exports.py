@@ -0,0 +1,105 @@
+"""Streaming gradebook CSV export.
+
+One row per student and subject with the component averages, the final
+grade under the current grading policy and its remarks.  Students are read
+with .iterator() and their averages loaded one chunk of students at a time
+through GradeBook (four grouped queries per chunk), so memory depends on the
+chunk size rather than on the size of the school.  Students without any
+scores get a single row with the subject columns left blank.
+"""
+import csv
+
+from .gradebook import GradeBook, performance_category
+from .grading import get_grading_policy
+from .models import StudentRecord, Subject
+from .scoregrid import filter_grade_level
+
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_HEADER = [
+    'Student ID', 'Full Name', 'Grade & Section', 'Status',
+    'Subject Code', 'Subject', 'Quiz Average', 'Exam Average',
+    'Project Average', 'Attendance %', 'Final Grade', 'Remarks',
+]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _number(value):
+    return '' if value is None else f'{value:.2f}'
+
+
+def gradebook_students(grade_level=None, section=None, subject=None):
+    """StudentRecords in scope, in export order.
+
+    `grade_level` is e.g. 'Grade 7' and `section` a full 'Grade 7 - A'
+    label.  A `subject` with a grade level limits students to that grade.
+    """
+    students = StudentRecord.objects.all()
+    if subject is not None and subject.grade_level:
+        students = filter_grade_level(students, subject.grade_level)
+    students = filter_grade_level(students, grade_level)
+    students = filter_grade_level(students, section)
+    return students.order_by('grade_and_section', 'fullname', 'id')
+
+
+class GradebookExport:
+    """CSV lines of the gradebook for `students`, optionally one `subject` only."""
+
+    def __init__(self, students, subject=None, chunk_size=EXPORT_CHUNK_SIZE):
+        self.students = students
+        self.subject = subject
+        self.chunk_size = chunk_size
+        self.policy = get_grading_policy()
+        subjects = Subject.objects.all() if subject is None else [subject]
+        self.subjects = {s.pk: s for s in subjects}
+
+    def _subject_order(self, subject_id):
+        subject = self.subjects[subject_id]
+        return (subject.code, subject.name, subject.pk)
+
+    def _chunk_rows(self, chunk):
+        subjects = None if self.subject is None else [self.subject.pk]
+        gradebook = GradeBook(students=[student[0] for student in chunk], subjects=subjects)
+        for pk, student_id, fullname, grade_and_section, status in chunk:
+            student = [student_id, fullname, grade_and_section, status]
+            grades = gradebook.for_student(pk)
+            if not grades:
+                yield student + [''] * (len(EXPORT_HEADER) - len(student))
+                continue
+            for subject_id in sorted(grades, key=self._subject_order):
+                entry = grades[subject_id]
+                subject = self.subjects[subject_id]
+                grade = entry.compute_grade(policy=self.policy)
+                yield student + [
+                    subject.code,
+                    subject.name,
+                    *(_number(value) for value in entry.averages()),
+                    _number(grade),
+                    performance_category(grade) or '',
+                ]
+
+    def rows(self):
+        """Yield the header and then one list per CSV row."""
+        yield EXPORT_HEADER
+        chunk = []
+        students = self.students.values_list('id', 'student_id', 'fullname', 'grade_and_section', 'status')
+        for student in students.iterator(chunk_size=self.chunk_size):
+            chunk.append(student)
+            if len(chunk) == self.chunk_size:
+                yield from self._chunk_rows(chunk)
+                chunk = []
+        if chunk:
+            yield from self._chunk_rows(chunk)
+
+    def lines(self):
+        """Yield the CSV as text lines, for a StreamingHttpResponse."""
+        writer = csv.writer(_Echo())
+        for row in self.rows():
+            yield writer.writerow(row)
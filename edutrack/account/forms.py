@@ -221,6 +221,23 @@ class GradingComponentForm(forms.ModelForm):
         model = GradingComponent
         fields = ['component', 'weight', 'status']
 
+    def clean(self):
+        from .grading import COMPONENT_NAMES, component_key
+
+        cleaned_data = super().clean()
+        name = cleaned_data.get('component')
+        if name is None:
+            return cleaned_data
+        key = component_key(name)
+        if key is None:
+            accepted = ', '.join(sorted({k.title() for k in COMPONENT_NAMES.values()}))
+            self.add_error('component', f'Unknown grading component "{name}". Use one of: {accepted}.')
+        elif cleaned_data.get('status') == 'Active':
+            others = GradingComponent.objects.filter(status='Active').exclude(pk=self.instance.pk)
+            if any(component_key(other) == key for other in others.values_list('component', flat=True)):
+                self.add_error('component', f'An active {key} component already exists.')
+        return cleaned_data
+
 class RecordForm(forms.Form):
     student_id = forms.IntegerField(
         widget=forms.NumberInput(attrs={'class': 'form-control'}),
@@ -299,6 +316,28 @@ class RecordForm(forms.Form):
         required=True
     )
 
+class RosterRowForm(RecordForm):
+    """One row of a bulk roster import.
+
+    Same fields as RecordForm, except the section is given by name and an
+    account is created when both username and password are present.  The
+    name is not length-checked here: the importer matches it against the
+    existing Section rows, some of which are longer than Section.name's
+    max_length.
+    """
+    section = forms.CharField(required=True)
+    username = forms.CharField(max_length=150, required=False)
+    password = forms.CharField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        username = (cleaned_data.get('username') or '').strip()
+        password = cleaned_data.get('password') or ''
+        if bool(username) != bool(password):
+            raise forms.ValidationError('Username and password are required to create an account.')
+        cleaned_data['username'] = username
+        return cleaned_data
+
 class QuizSetupForm(forms.Form):
     subject = forms.ModelChoiceField(
         queryset=Subject.objects.filter(status='Active'),
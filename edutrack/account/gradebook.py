@@ -0,0 +1,131 @@
+"""Cohort-wide grade aggregation.
+
+Every score page, dashboard, ML helper and PDF report needs the same
+quiz/exam/project/attendance averages per (student, subject).  GradeBook
+loads them for a whole cohort with one grouped query per component instead
+of one query per student, subject and week.
+"""
+from django.db.models import Count, Sum
+from django.db.models.query import QuerySet
+
+from .models import (
+    ComponentAverages, QuizScore, ExamScore, ProjectScore, WeeklyAttendanceRecord,
+)
+
+
+COMPONENTS = ('quiz', 'exam', 'project', 'attendance')
+
+SCORE_MODELS = {
+    'quiz': QuizScore,
+    'exam': ExamScore,
+    'project': ProjectScore,
+}
+
+
+def performance_category(grade):
+    """Categorize: <70 = At Risk, 70-79 = Average, 80-89 = Good, 90+ = Excellent"""
+    if grade is None:
+        return None
+    if grade >= 90:
+        return 'Excellent'
+    elif grade >= 80:
+        return 'Good'
+    elif grade >= 70:
+        return 'Average'
+    return 'At Risk'
+
+
+class SubjectGrade(ComponentAverages):
+    """Component totals for one student in one subject."""
+
+    def __init__(self, student_id, subject_id):
+        self.student_id = student_id
+        self.subject_id = subject_id
+        self.quiz_sum = 0
+        self.quiz_count = 0
+        self.exam_sum = 0
+        self.exam_count = 0
+        self.project_sum = 0
+        self.project_count = 0
+        self.attendance_present = 0
+        self.attendance_total = 0
+
+
+def _id_filter(field, value):
+    """Build a filter kwarg restricting `field` to a queryset, instances or ids."""
+    if isinstance(value, QuerySet):
+        return {f'{field}__in': value.values('pk')}
+    ids = [getattr(v, 'pk', v) for v in value]
+    return {f'{field}__in': ids}
+
+
+class GradeBook:
+    """Component averages for a cohort of students, keyed by (student, subject).
+
+    `students` and `subjects` may be querysets, lists of instances or lists of
+    ids; None means no restriction.  Loading always costs four queries no matter
+    how many students, subjects or attendance weeks are involved.
+    """
+
+    def __init__(self, students=None, subjects=None):
+        self._grades = {}
+        self._by_student = {}
+        score_filters = {}
+        attendance_filters = {}
+        if students is not None:
+            score_filters.update(_id_filter('student', students))
+            attendance_filters.update(_id_filter('student', students))
+        if subjects is not None:
+            score_filters.update(_id_filter('subject', subjects))
+            attendance_filters.update(_id_filter('session__subject', subjects))
+        self._load_scores(score_filters)
+        self._load_attendance(attendance_filters)
+
+    def _entry(self, student_id, subject_id):
+        key = (student_id, subject_id)
+        entry = self._grades.get(key)
+        if entry is None:
+            entry = SubjectGrade(student_id, subject_id)
+            self._grades[key] = entry
+            self._by_student.setdefault(student_id, {})[subject_id] = entry
+        return entry
+
+    def _load_scores(self, filters):
+        for component, model in SCORE_MODELS.items():
+            rows = (
+                model.objects.filter(**filters)
+                .order_by()
+                .values('student_id', 'subject_id')
+                .annotate(total=Sum('score'), count=Count('id'))
+            )
+            for row in rows:
+                entry = self._entry(row['student_id'], row['subject_id'])
+                setattr(entry, f'{component}_sum', row['total'] or 0)
+                setattr(entry, f'{component}_count', row['count'])
+
+    def _load_attendance(self, filters):
+        rows = WeeklyAttendanceRecord.objects.filter(**filters).attendance_totals()
+        for row in rows:
+            entry = self._entry(row['student_id'], row['subject_id'])
+            entry.attendance_present = row['present']
+            entry.attendance_total = row['total']
+
+    def get(self, student_id, subject_id):
+        """Return the SubjectGrade for a pair, or None if it has no data."""
+        return self._grades.get((student_id, subject_id))
+
+    def for_student(self, student_id):
+        """Return {subject_id: SubjectGrade} for every subject the student has data in."""
+        return self._by_student.get(student_id, {})
+
+    def student_ids(self):
+        return list(self._by_student)
+
+    def subject_ids(self):
+        return {subject_id for _, subject_id in self._grades}
+
+    def __iter__(self):
+        return iter(self._grades.values())
+
+    def __len__(self):
+        return len(self._grades)
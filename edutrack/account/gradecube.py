@@ -0,0 +1,172 @@
+"""Dense student x subject x component grade cube for school-wide analytics.
+
+The cube is filled from a single fetch of StudentSubjectSummary rows and all
+grades, categories and distributions are computed as array operations.  NumPy
+is optional for the project; check NUMPY_AVAILABLE before building a cube.
+"""
+from django.db.models import Max, Min
+
+from .gradebook import COMPONENTS
+from .grading import get_grading_policy
+from .models import StudentSubjectSummary
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+CATEGORIES = ['Excellent', 'Good', 'Average', 'At Risk']
+
+SUMMARY_COLUMNS = [
+    'student_id', 'subject_id',
+    'quiz_sum', 'quiz_count',
+    'exam_sum', 'exam_count',
+    'project_sum', 'project_count',
+    'attendance_present', 'attendance_total',
+]
+
+
+class GradeCube:
+    """Component averages as a float array of shape (students, subjects, 4).
+
+    `values[i, j, k]` is the average of COMPONENTS[k] for `student_ids[i]` in
+    `subject_ids[j]`; `valid[i, j, k]` is False where that component has no
+    data (the value is then NaN).  `present[i, j]` marks pairs that have a
+    summary row at all.
+    """
+
+    def __init__(self, student_ids, subject_ids, values, valid, present):
+        self.student_ids = student_ids
+        self.subject_ids = subject_ids
+        self.values = values
+        self.valid = valid
+        self.present = present
+        self._student_index = {pk: i for i, pk in enumerate(student_ids)}
+        self._subject_index = {pk: j for j, pk in enumerate(subject_ids)}
+
+    @classmethod
+    def from_summaries(cls, summaries=None):
+        """Build the cube from a StudentSubjectSummary queryset (default: all rows)."""
+        if not NUMPY_AVAILABLE:
+            raise ImportError('GradeCube requires numpy')
+        if summaries is None:
+            summaries = StudentSubjectSummary.objects.all()
+        rows = list(summaries.order_by().values_list(*SUMMARY_COLUMNS))
+
+        student_ids = sorted({row[0] for row in rows})
+        subject_ids = sorted({row[1] for row in rows})
+        student_index = {pk: i for i, pk in enumerate(student_ids)}
+        subject_index = {pk: j for j, pk in enumerate(subject_ids)}
+
+        data = np.array([row[2:] for row in rows], dtype=float).reshape(len(rows), 8)
+        i = np.array([student_index[row[0]] for row in rows], dtype=int)
+        j = np.array([subject_index[row[1]] for row in rows], dtype=int)
+
+        totals = data[:, 0::2]
+        counts = data[:, 1::2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(counts > 0, totals / counts, np.nan)
+        # Attendance as an unrounded percentage, like ComponentAverages.component_values()
+        averages[:, 3] *= 100
+
+        shape = (len(student_ids), len(subject_ids))
+        values = np.full(shape + (len(COMPONENTS),), np.nan)
+        values[i, j] = averages
+        present = np.zeros(shape, dtype=bool)
+        present[i, j] = True
+        return cls(student_ids, subject_ids, values, ~np.isnan(values), present)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def get(self, student_id, subject_id):
+        """Return the four component values for a pair (None where missing)."""
+        i = self._student_index.get(student_id)
+        j = self._subject_index.get(subject_id)
+        if i is None or j is None or not self.present[i, j]:
+            return None
+        return [None if np.isnan(v) else float(v) for v in self.values[i, j]]
+
+    def grades(self, require_all=False, policy=None):
+        """Grade per (student, subject) under the grading policy; NaN where none.
+
+        With `require_all` pairs missing any weighted component get NaN,
+        matching ComponentAverages.compute_grade().
+        """
+        policy = policy or get_grading_policy()
+        return policy.grade_array(self.values, self.valid, require_all)
+
+    @staticmethod
+    def categorize(grades):
+        """Map a grade array to category labels ('' where the grade is NaN)."""
+        labels = np.select(
+            [grades >= 90, grades >= 80, grades >= 70, grades < 70],
+            CATEGORIES,
+            default='',
+        )
+        return labels
+
+    def categories(self, require_all=False):
+        return self.categorize(self.grades(require_all))
+
+    def worst_and_best(self, require_all=False):
+        """Per-student lowest and highest subject grade (NaN if none)."""
+        grades = self.grades(require_all)
+        missing = np.isnan(grades)
+        worst = np.where(missing, np.inf, grades).min(axis=1, initial=np.inf)
+        best = np.where(missing, -np.inf, grades).max(axis=1, initial=-np.inf)
+        no_grade = missing.all(axis=1)
+        worst[no_grade] = np.nan
+        best[no_grade] = np.nan
+        return worst, best
+
+    def student_categories(self):
+        """Categorize each student for the admin dashboard distribution.
+
+        A student with any subject below 70 is At Risk; otherwise the best
+        subject grade decides.  Students without grades get ''.
+        """
+        worst, best = self.worst_and_best()
+        return np.select(
+            [worst < 70, best >= 90, best >= 80, best >= 70],
+            ['At Risk', 'Excellent', 'Good', 'Average'],
+            default='',
+        )
+
+    def distribution(self):
+        """Return {category: number of students} over student_categories()."""
+        labels = self.student_categories()
+        return {category: int((labels == category).sum()) for category in CATEGORIES}
+
+
+def grade_distribution(summaries=None):
+    """Return {category: number of students} for the admin dashboard.
+
+    Uses the cube when NumPy is installed; otherwise falls back to a grouped
+    min/max query over the same summary rows.
+    """
+    if summaries is None:
+        summaries = StudentSubjectSummary.objects.all()
+    if NUMPY_AVAILABLE:
+        return GradeCube.from_summaries(summaries).distribution()
+
+    distribution = dict.fromkeys(CATEGORIES, 0)
+    student_grades = (
+        summaries.filter(grade__isnull=False)
+        .order_by()
+        .values('student_id')
+        .annotate(worst=Min('grade'), best=Max('grade'))
+    )
+    for row in student_grades:
+        if row['worst'] < 70:
+            distribution['At Risk'] += 1
+        elif row['best'] >= 90:
+            distribution['Excellent'] += 1
+        elif row['best'] >= 80:
+            distribution['Good'] += 1
+        elif row['best'] >= 70:
+            distribution['Average'] += 1
+    return distribution
@@ -0,0 +1,221 @@
+"""Grading policy built from the active GradingComponent rows.
+
+A GradingPolicy holds one weight per component (quiz, exam, project,
+attendance).  Rows are matched to components by their normalized name
+('Quiz', 'quizzes' and 'QUIZ' are the quiz component; 'Long Quiz' is not
+recognised), and components without an active row do not count.  Only
+when no active row is recognised at all do the school defaults apply.
+
+The grade is the weighted mean of the components that have data, with the
+weights renormalized over those components.  GradingPolicy.grade() is the
+Python form used by SubjectGrade and StudentSubjectSummary;
+grade_expression() is the same formula as a SQL expression over the
+StudentSubjectSummary columns.
+
+The policy is cached per process and rebuilt when a component is saved or
+deleted (see the receivers in models.py), or after POLICY_TTL seconds so
+that other worker processes pick up changes too.
+"""
+import re
+import time
+
+from django.db.models import Case, CharField, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+from django.utils import timezone
+
+from .gradebook import COMPONENTS
+from .models import GradingComponent, StudentSubjectSummary
+
+
+DEFAULT_WEIGHTS = {
+    'quiz': 25,
+    'exam': 30,
+    'project': 25,
+    'attendance': 20,
+}
+
+POLICY_TTL = 300
+
+# Summary columns holding each component's (numerator, denominator)
+COMPONENT_COLUMNS = {
+    'quiz': ('quiz_sum', 'quiz_count'),
+    'exam': ('exam_sum', 'exam_count'),
+    'project': ('project_sum', 'project_count'),
+    'attendance': ('attendance_present', 'attendance_total'),
+}
+
+
+# Normalized GradingComponent names accepted for each component
+COMPONENT_NAMES = {
+    'quiz': 'quiz',
+    'quizzes': 'quiz',
+    'exam': 'exam',
+    'exams': 'exam',
+    'examination': 'exam',
+    'examinations': 'exam',
+    'project': 'project',
+    'projects': 'project',
+    'attendance': 'attendance',
+}
+
+
+def normalize_component_name(name):
+    """Lower-case words of a component name, e.g. ' Quizzes! ' -> 'quizzes'."""
+    return ' '.join(re.findall(r'[a-z]+', (name or '').lower()))
+
+
+def component_key(name):
+    """Map a GradingComponent name to a component key, or None if unrecognised."""
+    return COMPONENT_NAMES.get(normalize_component_name(name))
+
+
+class GradingPolicy:
+    """Component weights in COMPONENTS order."""
+
+    def __init__(self, weights):
+        self.weights = tuple(float(weights.get(key, 0) or 0) for key in COMPONENTS)
+
+    @classmethod
+    def from_components(cls, components):
+        """Build a policy from (component name, weight) pairs of active rows.
+
+        Unrecognised names are ignored (GradingComponentForm rejects them);
+        with no recognised row the policy falls back to DEFAULT_WEIGHTS.
+        """
+        configured = {}
+        for name, weight in components:
+            key = component_key(name)
+            if key is not None:
+                configured[key] = configured.get(key, 0) + weight
+        return cls(configured or DEFAULT_WEIGHTS)
+
+    def as_dict(self):
+        return dict(zip(COMPONENTS, self.weights))
+
+    def grade(self, values, require_all=False):
+        """Weighted mean of component values given in COMPONENTS order.
+
+        Missing (None) components are left out and the remaining weights
+        renormalized; with `require_all` any missing weighted component
+        gives None.
+        """
+        total = 0.0
+        weight_total = 0.0
+        for value, weight in zip(values, self.weights):
+            if not weight:
+                continue
+            if value is None:
+                if require_all:
+                    return None
+                continue
+            total += weight * value
+            weight_total += weight
+        if not weight_total:
+            return None
+        return total / weight_total
+
+    def grade_array(self, values, valid, require_all=False):
+        """NumPy form of grade() over arrays whose last axis is COMPONENTS."""
+        import numpy as np
+
+        weights = np.asarray(self.weights)
+        weighted = valid & (weights > 0)
+        weight_total = np.where(weighted, weights, 0.0).sum(axis=-1)
+        total = np.where(weighted, values * weights, 0.0).sum(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grades = np.where(weight_total > 0, total / weight_total, np.nan)
+        if require_all:
+            grades[(~valid & (weights > 0)).any(axis=-1)] = np.nan
+        return grades
+
+    def grade_expression(self, require_all=False):
+        """SQL expression computing grade() from StudentSubjectSummary columns."""
+        total = Value(0.0)
+        weight_total = Value(0.0)
+        present = []
+        for key, weight in zip(COMPONENTS, self.weights):
+            if not weight:
+                continue
+            numerator, denominator = COMPONENT_COLUMNS[key]
+            has_data = Q(**{f'{denominator}__gt': 0})
+            value = Cast(F(numerator), FloatField()) / Cast(F(denominator), FloatField())
+            if key == 'attendance':
+                value = value * Value(100.0)
+            total = total + Case(
+                When(has_data, then=Value(weight) * value),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            weight_total = weight_total + Case(
+                When(has_data, then=Value(weight)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            present.append(has_data)
+
+        if not present:
+            return Value(None, output_field=FloatField())
+        condition = present[0]
+        for has_data in present[1:]:
+            condition = condition & has_data if require_all else condition | has_data
+        return Case(
+            When(condition, then=total / weight_total),
+            default=Value(None),
+            output_field=FloatField(),
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, GradingPolicy) and self.weights == other.weights
+
+    def __repr__(self):
+        return f'GradingPolicy({self.as_dict()})'
+
+
+_cache = {'policy': None, 'loaded_at': 0.0}
+
+
+def get_grading_policy():
+    """Return the current policy, loading it from the database when needed."""
+    policy = _cache['policy']
+    if policy is None or time.monotonic() - _cache['loaded_at'] > POLICY_TTL:
+        policy = GradingPolicy.from_components(
+            GradingComponent.objects.filter(status='Active').values_list('component', 'weight')
+        )
+        _cache['policy'] = policy
+        _cache['loaded_at'] = time.monotonic()
+    return policy
+
+
+def invalidate_grading_policy():
+    _cache['policy'] = None
+
+
+def category_expression(grade):
+    """SQL CASE mapping a grade expression to its performance category."""
+    return Case(
+        When(GreaterThanOrEqual(grade, 90), then=Value('Excellent')),
+        When(GreaterThanOrEqual(grade, 80), then=Value('Good')),
+        When(GreaterThanOrEqual(grade, 70), then=Value('Average')),
+        When(LessThan(grade, 70), then=Value('At Risk')),
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def regrade_summaries(policy=None):
+    """Recompute every stored summary grade and category with one UPDATE.
+
+    Returns the number of rows updated.
+    """
+    from .dashboard import invalidate_snapshot
+
+    policy = policy or get_grading_policy()
+    # The category is computed from the new grade, not the column being replaced
+    updated = StudentSubjectSummary.objects.update(
+        grade=policy.grade_expression(),
+        category=category_expression(policy.grade_expression()),
+        updated_at=timezone.now(),
+    )
+    invalidate_snapshot()
+    return updated
@@ -0,0 +1,125 @@
+"""Streaming CSV import of quiz, exam, project and attendance scores.
+
+The CSV has a header row with the columns
+
+    student_id, subject, kind, number, score[, session]
+
+where student_id is the school student ID, subject is the subject code,
+kind is quiz, exam, project or attendance and number is the assessment (or
+attendance week) number.  Attendance rows give the session (1-4) and a
+P/A/L/E mark as the score.
+
+Students and subjects are resolved through lookup maps built once per
+import.  Rows are read one at a time and written in chunks through
+write_cells(), each chunk in its own transaction, so memory stays flat and
+a bad row only rejects itself.
+"""
+import csv
+
+from .models import StudentRecord, Subject
+from .scorewriter import write_cells
+
+
+REQUIRED_COLUMNS = ('student_id', 'subject', 'kind', 'number', 'score')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 5000
+
+
+def _lookup(pairs):
+    """Map key -> id; keys shared by several rows map to None (ambiguous)."""
+    lookup = {}
+    for key, pk in pairs:
+        lookup[key] = None if key in lookup else pk
+    return lookup
+
+
+class ImportResult:
+    """Running totals of an import; `errors` holds (line number, message)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.errors = []
+
+    def summary(self):
+        return (
+            f'{self.rows} rows: {self.inserted} added, {self.updated} updated, '
+            f'{len(self.errors)} rejected'
+        )
+
+
+class ScoreImporter:
+    """Imports score CSV rows in chunks of `chunk_size`."""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f'chunk size must be 1-{MAX_CHUNK_SIZE}')
+        self.chunk_size = chunk_size
+        self.students = _lookup(
+            (str(student_id), pk) for student_id, pk in StudentRecord.objects.values_list('student_id', 'id')
+        )
+        self.subjects = _lookup(
+            (code.strip().lower(), pk) for code, pk in Subject.objects.values_list('code', 'id')
+        )
+
+    def _resolve(self, lookup, value, label):
+        value = (value or '').strip()
+        key = value.lower()
+        pk = lookup.get(key)
+        if pk is None:
+            if key in lookup:
+                raise ValueError(f'{label} "{value}" matches more than one record')
+            raise ValueError(f'unknown {label} "{value}"')
+        return pk
+
+    def _cell(self, row):
+        cell = {
+            'student_id': self._resolve(self.students, row.get('student_id'), 'student ID'),
+            'subject_id': self._resolve(self.subjects, row.get('subject'), 'subject code'),
+            'kind': (row.get('kind') or '').strip().lower(),
+            'number': (row.get('number') or '').strip(),
+            'score': (row.get('score') or '').strip(),
+        }
+        if cell['kind'] == 'attendance':
+            cell['session'] = (row.get('session') or '').strip()
+            cell['score'] = cell['score'].upper()
+        return cell
+
+    def _flush(self, cells, lines, result):
+        written = write_cells(cells)
+        result.inserted += written.inserted
+        result.updated += written.updated
+        result.errors.extend((lines[index], reason) for index, reason in written.rejected)
+
+    def run(self, lines, progress=None):
+        """Import CSV text lines; call `progress(result)` after each chunk.
+
+        Raises ValueError if the header is missing a required column.
+        """
+        reader = csv.DictReader(lines)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f'CSV is missing column(s): {", ".join(missing)}')
+
+        result = ImportResult()
+        cells = []
+        cell_lines = []
+        for row in reader:
+            result.rows += 1
+            try:
+                cells.append(self._cell(row))
+                cell_lines.append(reader.line_num)
+            except ValueError as e:
+                result.errors.append((reader.line_num, str(e)))
+            if result.rows % self.chunk_size == 0:
+                self._flush(cells, cell_lines, result)
+                cells, cell_lines = [], []
+                if progress:
+                    progress(result)
+        if cells or result.rows % self.chunk_size:
+            self._flush(cells, cell_lines, result)
+            if progress:
+                progress(result)
+        result.errors.sort()
+        return result
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from account.reportcards import render_merged, report_cards, scope_students, zip_report_cards
+
+class Command(BaseCommand):
+    help = 'Generate the report cards of every active student in a --section (e.g. "Grade 7 - A") or --grade (e.g. "Grade 7") as a ZIP of PDFs rendered in a pool of --workers processes, or as one merged PDF with --format pdf.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write (.zip or .pdf)')
+        parser.add_argument('--section', help='Full section label, e.g. "Grade 7 - A"')
+        parser.add_argument('--grade', help='Grade level, e.g. "Grade 7"')
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip', help='ZIP of one PDF per student (default) or one merged PDF')
+        parser.add_argument('--workers', type=int, help='Rendering processes for --format zip (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        section = options.get('section')
+        grade_level = options.get('grade')
+        output = options.get('output')
+        if not (section or grade_level):
+            raise CommandError('Give --section or --grade.')
+
+        cards = report_cards(scope_students(grade_level, section))
+        if not cards:
+            raise CommandError('No active students found for that section or grade level.')
+        self.stdout.write(f'Rendering {len(cards)} report cards...')
+
+        try:
+            with open(output, 'wb') as f:
+                if options.get('format') == 'pdf':
+                    f.write(render_merged(cards))
+                else:
+                    for data in zip_report_cards(cards, workers=options.get('workers')):
+                        f.write(data)
+        except ImportError:
+            raise CommandError('PDF generation requires reportlab. Please install: pip install reportlab')
+        except OSError as e:
+            raise CommandError(f'Could not write {output}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(cards)} report cards to {output}.'))
@@ -0,0 +1,48 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from account.roster import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, REQUIRED_COLUMNS, RosterImporter
+
+class Command(BaseCommand):
+    help = f'Enroll students from a CSV file with the columns {", ".join(REQUIRED_COLUMNS)} and optionally status, username and password (rows with both get a student account). Passwords of larger chunks are hashed in a pool of --workers processes and rows are inserted in chunks of --chunk-size, each in its own transaction; rejected rows are listed or written to --errors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'Rows per transaction (default {DEFAULT_CHUNK_SIZE}, max {MAX_CHUNK_SIZE})')
+        parser.add_argument('--workers', type=int, help='Password hashing processes (default: one per CPU; 1 hashes in this process)')
+        parser.add_argument('--errors', help='Write rejected rows (line, error) to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options.get('path')
+        errors_path = options.get('errors')
+
+        try:
+            importer = RosterImporter(chunk_size=options.get('chunk_size'), workers=options.get('workers'))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        def progress(result):
+            self.stdout.write(f'Processed {result.rows} rows ({result.records} students, {result.accounts} accounts, {len(result.errors)} rejected)')
+
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                result = importer.run(f, progress=progress)
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if errors_path:
+            with open(errors_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['line', 'error'])
+                writer.writerows(result.errors)
+            if result.errors:
+                self.stdout.write(self.style.WARNING(f'{len(result.errors)} rejected rows written to {errors_path}'))
+        else:
+            for line, message in result.errors[:20]:
+                self.stdout.write(self.style.WARNING(f'Line {line}: {message}'))
+            if len(result.errors) > 20:
+                self.stdout.write(self.style.WARNING(f'... and {len(result.errors) - 20} more (use --errors to save them all)'))
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {result.summary()}.'))
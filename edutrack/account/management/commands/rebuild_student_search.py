@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from account.search import ensure_search_index, rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Recreate the student search index (SQLite FTS5) and its triggers if missing, then re-index every student record.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to index')
+
+    def handle(self, *args, **options):
+        connection = connections[options.get('database')]
+        if not ensure_search_index(connection):
+            raise CommandError('Student search needs an SQLite database with FTS5; searches fall back to name matching.')
+        indexed = rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} student records.'))
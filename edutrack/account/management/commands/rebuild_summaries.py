@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from account.models import StudentRecord, Subject, StudentSubjectSummary
+from account.summaries import rebuild_summaries
+
+class Command(BaseCommand):
+    help = 'Recompute StudentSubjectSummary rows from the raw quiz, exam, project and attendance data. Use --student and/or --subject to limit the rebuild.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, help='StudentRecord ID to rebuild')
+        parser.add_argument('--subject', type=int, help='Subject ID to rebuild')
+
+    def handle(self, *args, **options):
+        student_id = options.get('student')
+        subject_id = options.get('subject')
+
+        students = None
+        subjects = None
+        if student_id:
+            if not StudentRecord.objects.filter(id=student_id).exists():
+                raise CommandError(f'StudentRecord with id={student_id} does not exist')
+            students = [student_id]
+        if subject_id:
+            if not Subject.objects.filter(id=subject_id).exists():
+                raise CommandError(f'Subject with id={subject_id} does not exist')
+            subjects = [subject_id]
+
+        before = StudentSubjectSummary.objects.count()
+        written = rebuild_summaries(students=students, subjects=subjects)
+        after = StudentSubjectSummary.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} summary rows ({before} rows before, {after} after).'
+        ))
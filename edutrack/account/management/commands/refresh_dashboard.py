@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from account.dashboard import SNAPSHOT_NAME, refresh_snapshot
+from account.models import DashboardSnapshot
+
+class Command(BaseCommand):
+    help = 'Recompute the cached admin dashboard snapshot. Use --loop to keep running as a background worker that refreshes the snapshot whenever it has been marked stale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and refresh stale snapshots every --interval seconds')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between staleness checks when looping (default 30)')
+
+    def handle(self, *args, **options):
+        loop = options.get('loop')
+        interval = options.get('interval')
+
+        if interval < 1:
+            raise CommandError('--interval must be at least 1 second')
+
+        if not loop:
+            snapshot = refresh_snapshot()
+            self.stdout.write(self.style.SUCCESS(f'Dashboard snapshot refreshed at {snapshot.computed_at:%Y-%m-%d %H:%M:%S}.'))
+            return
+
+        self.stdout.write(self.style.NOTICE(f'Refreshing stale dashboard snapshots every {interval}s (Ctrl+C to stop).'))
+        try:
+            while True:
+                snapshot = DashboardSnapshot.objects.filter(name=SNAPSHOT_NAME).first()
+                if snapshot is None or snapshot.is_stale:
+                    snapshot = refresh_snapshot()
+                    self.stdout.write(f'Dashboard snapshot refreshed at {snapshot.computed_at:%Y-%m-%d %H:%M:%S}.')
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:50
+
+import account.models
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def unweighted_grade(summary):
+    """Mean of the available component averages, frozen as of this migration."""
+    averages = []
+    for component in ('quiz', 'exam', 'project'):
+        count = getattr(summary, f'{component}_count')
+        if count:
+            averages.append(float(getattr(summary, f'{component}_sum')) / count)
+    if summary.attendance_total:
+        averages.append(round((summary.attendance_present / summary.attendance_total) * 100, 2))
+    if not averages:
+        return None
+    return sum(averages) / len(averages)
+
+
+def backfill_summaries(apps, schema_editor):
+    """Aggregate existing scores and attendance into summary rows."""
+    Summary = apps.get_model('account', 'StudentSubjectSummary')
+    WeeklyAttendanceRecord = apps.get_model('account', 'WeeklyAttendanceRecord')
+    rows = {}
+
+    def row(student_id, subject_id):
+        key = (student_id, subject_id)
+        if key not in rows:
+            rows[key] = Summary(student_id=student_id, subject_id=subject_id)
+        return rows[key]
+
+    for component in ('quiz', 'exam', 'project'):
+        model = apps.get_model('account', f'{component.capitalize()}Score')
+        totals = (
+            model.objects.order_by()
+            .values('student_id', 'subject_id')
+            .annotate(total=Sum('score'), count=Count('id'))
+        )
+        for item in totals:
+            summary = row(item['student_id'], item['subject_id'])
+            setattr(summary, f'{component}_sum', item['total'] or 0)
+            setattr(summary, f'{component}_count', item['count'])
+
+    marks = WeeklyAttendanceRecord.objects.order_by().values_list(
+        'student_id', 'session__subject_id',
+        'session_1', 'session_2', 'session_3', 'session_4',
+    )
+    for student_id, subject_id, *sessions in marks.iterator():
+        summary = row(student_id, subject_id)
+        summary.attendance_present += sum(1 for m in sessions if m == 'P')
+        summary.attendance_total += sum(1 for m in sessions if m and m != '-')
+
+    for summary in rows.values():
+        summary.grade = unweighted_grade(summary)
+        if summary.grade is None:
+            summary.category = None
+        elif summary.grade >= 90:
+            summary.category = 'Excellent'
+        elif summary.grade >= 80:
+            summary.category = 'Good'
+        elif summary.grade >= 70:
+            summary.category = 'Average'
+        else:
+            summary.category = 'At Risk'
+    Summary.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0027_remove_section_adviser_old_section_adviser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSubjectSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_sum', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('quiz_count', models.PositiveIntegerField(default=0)),
+                ('exam_sum', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('exam_count', models.PositiveIntegerField(default=0)),
+                ('project_sum', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('project_count', models.PositiveIntegerField(default=0)),
+                ('attendance_present', models.PositiveIntegerField(default=0)),
+                ('attendance_total', models.PositiveIntegerField(default=0)),
+                ('grade', models.FloatField(blank=True, db_index=True, null=True)),
+                ('category', models.CharField(blank=True, choices=[('Excellent', 'Excellent'), ('Good', 'Good'), ('Average', 'Average'), ('At Risk', 'At Risk')], max_length=20, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_summaries', to='account.studentrecord')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_summaries', to='account.subject')),
+            ],
+            options={
+                'ordering': ['student', 'subject'],
+                'unique_together': {('student', 'subject')},
+            },
+            bases=(account.models.ComponentAverages, models.Model),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
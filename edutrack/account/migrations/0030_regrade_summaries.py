@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def regrade(apps, schema_editor):
+    """Recompute stored summary grades with the weighted grading policy."""
+    from account.grading import GradingPolicy, category_expression
+
+    GradingComponent = apps.get_model('account', 'GradingComponent')
+    Summary = apps.get_model('account', 'StudentSubjectSummary')
+    policy = GradingPolicy.from_components(
+        GradingComponent.objects.filter(status='Active').values_list('component', 'weight')
+    )
+    Summary.objects.update(
+        grade=policy.grade_expression(),
+        category=category_expression(policy.grade_expression()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0029_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(regrade, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:31
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_grade_and_section(label):
+    """Split a 'Grade 7 - A' label into ('Grade 7', 'A'); copy of the model helper as of this migration."""
+    grade, _, section = (label or '').partition('-')
+    match = re.fullmatch(r'grade\s*(\d+)', grade.strip(), re.IGNORECASE)
+    grade = f'Grade {int(match.group(1))}' if match else ''
+    return grade, section.strip()
+
+
+def parse_labels(apps, schema_editor):
+    """Fill grade_level and section from the existing grade_and_section labels."""
+    Section = apps.get_model('account', 'Section')
+    StudentRecord = apps.get_model('account', 'StudentRecord')
+
+    # Active sections win over inactive ones of the same name
+    sections = {}
+    for pk, grade, name in Section.objects.order_by('-status', '-id').values_list('id', 'grade', 'name'):
+        sections[(grade, name.strip().lower())] = pk
+
+    records = list(StudentRecord.objects.only('id', 'grade_and_section'))
+    for record in records:
+        grade, section = parse_grade_and_section(record.grade_and_section)
+        record.grade_level = grade
+        record.section_id = sections.get((grade, section.lower())) if grade and section else None
+    StudentRecord.objects.bulk_update(records, ['grade_level', 'section'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0030_regrade_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrecord',
+            name='grade_level',
+            field=models.CharField(blank=True, choices=[('Grade 7', 'Grade 7'), ('Grade 8', 'Grade 8'), ('Grade 9', 'Grade 9'), ('Grade 10', 'Grade 10')], db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='studentrecord',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_records', to='account.section'),
+        ),
+        migrations.RunPython(parse_labels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of account.models.match_adviser as of this migration
+def match_adviser(label, candidates):
+    label = (label or '').strip().lower()
+    if not label:
+        return None
+    by_id, exact, partial = set(), set(), set()
+    for pk, username, first_name, last_name, email in candidates:
+        names = {username, f'{first_name or ""} {last_name or ""}'.strip(), email}
+        names = {name.lower() for name in names if name}
+        if label == str(pk):
+            by_id.add(pk)
+        elif label in names:
+            exact.add(pk)
+        elif any(name in label for name in names):
+            partial.add(pk)
+    matches = by_id or exact or partial
+    return next(iter(matches)) if len(matches) == 1 else None
+
+
+def resolve_advisers(apps, schema_editor):
+    """Resolve each section's adviser label to a user once, by id, username, full name or email."""
+    Section = apps.get_model('account', 'Section')
+    User = apps.get_model('account', 'User')
+
+    candidates = list(
+        User.objects.filter(
+            models.Q(is_faculty=True) | models.Q(is_admin=True) | models.Q(role__in=['faculty', 'admin'])
+        ).values_list('id', 'username', 'first_name', 'last_name', 'email')
+    )
+    sections = list(Section.objects.exclude(adviser__isnull=True).exclude(adviser=''))
+    for section in sections:
+        section.adviser_user_id = match_adviser(section.adviser, candidates)
+    Section.objects.bulk_update(sections, ['adviser_user'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0031_studentrecord_grade_level_section'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='adviser_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='advised_sections', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(resolve_advisers, migrations.RunPython.noop),
+    ]
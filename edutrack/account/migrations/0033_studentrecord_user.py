@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_accounts(apps, schema_editor):
+    """Link each record to the account named by its account_username.
+
+    A username shared by several records links only the oldest one.
+    """
+    StudentRecord = apps.get_model('account', 'StudentRecord')
+    User = apps.get_model('account', 'User')
+
+    user_ids = dict(User.objects.values_list('username', 'id'))
+    records = []
+    linked = set()
+    for record in StudentRecord.objects.exclude(account_username__isnull=True).exclude(account_username='').order_by('id'):
+        user_id = user_ids.get(record.account_username)
+        if user_id is None or user_id in linked:
+            continue
+        linked.add(user_id)
+        record.user_id = user_id
+        records.append(record)
+    StudentRecord.objects.bulk_update(records, ['user'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0032_section_adviser_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrecord',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_record', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_accounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from django.db import DatabaseError, migrations
+
+
+# Frozen copy of the index as account/search.py defined it when this
+# migration was written; later changes to that module must not alter it.
+TABLE = 'account_studentsearch'
+RECORD_TABLE = 'account_studentrecord'
+
+CREATE_TABLE = f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(fullname, student_id, parent, tokenize='unicode61')"
+INSERT_NEW = f'INSERT INTO {TABLE}(rowid, fullname, student_id, parent) VALUES (new.id, new.fullname, new.student_id, new.parent);'
+DELETE_OLD = f'DELETE FROM {TABLE} WHERE rowid = old.id;'
+TRIGGERS = {
+    f'{TABLE}_insert': f'AFTER INSERT ON {RECORD_TABLE} BEGIN {INSERT_NEW} END',
+    f'{TABLE}_delete': f'AFTER DELETE ON {RECORD_TABLE} BEGIN {DELETE_OLD} END',
+    f'{TABLE}_update': f'AFTER UPDATE OF fullname, student_id, parent ON {RECORD_TABLE} BEGIN {DELETE_OLD} {INSERT_NEW} END',
+}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(CREATE_TABLE)
+        except DatabaseError:
+            # SQLite built without FTS5; searches use the icontains fallback
+            return
+        for name, body in TRIGGERS.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'CREATE TRIGGER {name} {body}')
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE}(rowid, fullname, student_id, parent) '
+            f'SELECT id, fullname, student_id, parent FROM {RECORD_TABLE}'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0033_studentrecord_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
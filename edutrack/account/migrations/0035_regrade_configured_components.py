@@ -0,0 +1,92 @@
+import re
+
+from django.db import migrations
+from django.db.models import Case, CharField, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+
+# The grading policy as of this migration, copied from account/grading.py
+# so later policy changes cannot alter what a fresh migrate computes.
+# Components without an active GradingComponent no longer count.
+DEFAULT_WEIGHTS = {'quiz': 25, 'exam': 30, 'project': 25, 'attendance': 20}
+COMPONENT_NAMES = {
+    'quiz': 'quiz', 'quizzes': 'quiz',
+    'exam': 'exam', 'exams': 'exam', 'examination': 'exam', 'examinations': 'exam',
+    'project': 'project', 'projects': 'project',
+    'attendance': 'attendance',
+}
+COMPONENT_COLUMNS = {
+    'quiz': ('quiz_sum', 'quiz_count'),
+    'exam': ('exam_sum', 'exam_count'),
+    'project': ('project_sum', 'project_count'),
+    'attendance': ('attendance_present', 'attendance_total'),
+}
+
+
+def policy_weights(components):
+    weights = {}
+    for name, weight in components:
+        key = COMPONENT_NAMES.get(' '.join(re.findall(r'[a-z]+', (name or '').lower())))
+        if key is not None:
+            weights[key] = weights.get(key, 0) + weight
+    return weights or DEFAULT_WEIGHTS
+
+
+def grade_expression(weights):
+    """Weighted mean of the components with data, renormalized over them."""
+    total = Value(0.0)
+    weight_total = Value(0.0)
+    present = []
+    for key, (numerator, denominator) in COMPONENT_COLUMNS.items():
+        weight = float(weights.get(key, 0) or 0)
+        if not weight:
+            continue
+        has_data = Q(**{f'{denominator}__gt': 0})
+        value = Cast(F(numerator), FloatField()) / Cast(F(denominator), FloatField())
+        if key == 'attendance':
+            value = value * Value(100.0)
+        total = total + Case(When(has_data, then=Value(weight) * value), default=Value(0.0), output_field=FloatField())
+        weight_total = weight_total + Case(When(has_data, then=Value(weight)), default=Value(0.0), output_field=FloatField())
+        present.append(has_data)
+    if not present:
+        return Value(None, output_field=FloatField())
+    condition = present[0]
+    for has_data in present[1:]:
+        condition = condition | has_data
+    return Case(When(condition, then=total / weight_total), default=Value(None), output_field=FloatField())
+
+
+def category_expression(grade):
+    return Case(
+        When(GreaterThanOrEqual(grade, 90), then=Value('Excellent')),
+        When(GreaterThanOrEqual(grade, 80), then=Value('Good')),
+        When(GreaterThanOrEqual(grade, 70), then=Value('Average')),
+        When(LessThan(grade, 70), then=Value('At Risk')),
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def regrade(apps, schema_editor):
+    """Regrade summaries now that unconfigured components no longer count."""
+    GradingComponent = apps.get_model('account', 'GradingComponent')
+    Summary = apps.get_model('account', 'StudentSubjectSummary')
+    weights = policy_weights(
+        GradingComponent.objects.filter(status='Active').values_list('component', 'weight')
+    )
+    Summary.objects.update(
+        grade=grade_expression(weights),
+        category=category_expression(grade_expression(weights)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0034_student_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(regrade, migrations.RunPython.noop),
+    ]
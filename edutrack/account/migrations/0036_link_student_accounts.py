@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+def link_remaining_accounts(apps, schema_editor):
+    """Link student accounts 0033 could not, by the rules the dashboard used to apply per request.
+
+    Accounts made by add_user and edit never set account_username, so
+    each unlinked student account is matched once to an unlinked record
+    whose student_id equals its numeric username, or failing that whose
+    fullname equals its first and last name (case-insensitive).  A record
+    is linked only when it is the single match.
+    """
+    StudentRecord = apps.get_model('account', 'StudentRecord')
+    User = apps.get_model('account', 'User')
+
+    records = list(StudentRecord.objects.filter(user__isnull=True).order_by('id'))
+    by_student_id = {}
+    by_fullname = {}
+    for record in records:
+        by_student_id.setdefault(record.student_id, []).append(record)
+        by_fullname.setdefault(record.fullname.strip().lower(), []).append(record)
+
+    linked_users = set(StudentRecord.objects.filter(user__isnull=False).values_list('user_id', flat=True))
+    users = User.objects.filter(role='student').exclude(id__in=linked_users).order_by('id')
+    to_update = []
+    taken = set()
+    for user in users:
+        candidates = []
+        if user.username.isdigit():
+            candidates.append(by_student_id.get(int(user.username), []))
+        fullname = f'{user.first_name} {user.last_name}'.strip().lower()
+        if fullname:
+            candidates.append(by_fullname.get(fullname, []))
+        for matches in candidates:
+            if not matches:
+                continue
+            if len(matches) == 1 and matches[0].id not in taken:
+                record = matches[0]
+                record.user_id = user.id
+                record.account_username = user.username
+                taken.add(record.id)
+                to_update.append(record)
+            break
+    StudentRecord.objects.bulk_update(to_update, ['user', 'account_username'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0035_regrade_configured_components'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_remaining_accounts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+import re
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth import get_user_model
@@ -78,6 +80,57 @@ class Student(models.Model):
 # ------------------------
 # Section model
 # ------------------------
+def adviser_candidates(users):
+    """(id, username, first_name, last_name, email) of the users who can advise a section."""
+    return users.filter(
+        models.Q(is_faculty=True) | models.Q(is_admin=True) | models.Q(role__in=['faculty', 'admin'])
+    ).values_list('id', 'username', 'first_name', 'last_name', 'email')
+
+ADVISER_CANDIDATES_KEY = 'account:adviser_candidates'
+# Fields of User that adviser_candidates() reads
+ADVISER_FIELDS = {'username', 'first_name', 'last_name', 'email', 'is_faculty', 'is_admin', 'role'}
+
+def cached_adviser_candidates():
+    """adviser_candidates() of every user, kept in Django's cache until a user changes."""
+    from django.core.cache import cache
+    candidates = cache.get(ADVISER_CANDIDATES_KEY)
+    if candidates is None:
+        candidates = list(adviser_candidates(User.objects.all()))
+        cache.set(ADVISER_CANDIDATES_KEY, candidates, 300)
+    return candidates
+
+def invalidate_adviser_candidates():
+    from django.core.cache import cache
+    from django.db import transaction
+    cache.delete(ADVISER_CANDIDATES_KEY)
+    # Again after commit, in case another request cached the old list meanwhile
+    transaction.on_commit(lambda: cache.delete(ADVISER_CANDIDATES_KEY))
+
+def match_adviser(label, candidates):
+    """Return the id of the user a Section.adviser label refers to, or None.
+
+    The label may hold a user id (what the section forms store), username,
+    full name or email.  An id match wins, then an exact case-insensitive
+    match, then a single user whose username, full name or email appears
+    within the label.  A label matching several users at the deciding step
+    resolves to nobody rather than to the wrong teacher.
+    """
+    label = (label or '').strip().lower()
+    if not label:
+        return None
+    by_id, exact, partial = set(), set(), set()
+    for pk, username, first_name, last_name, email in candidates:
+        names = {username, f'{first_name or ""} {last_name or ""}'.strip(), email}
+        names = {name.lower() for name in names if name}
+        if label == str(pk):
+            by_id.add(pk)
+        elif label in names:
+            exact.add(pk)
+        elif any(name in label for name in names):
+            partial.add(pk)
+    matches = by_id or exact or partial
+    return next(iter(matches)) if len(matches) == 1 else None
+
 class Section(models.Model):
     grade = models.CharField(max_length=10, choices=[
         ('Grade 7','Grade 7'),
@@ -87,6 +140,8 @@ class Section(models.Model):
     ])
     name = models.CharField(max_length=10)
     adviser = models.CharField(max_length=100, null=True, blank=True)
+    # The user the adviser label refers to, resolved on save (see sync_section_adviser)
+    adviser_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='advised_sections')
     number_of_students = models.IntegerField()
     status = models.CharField(max_length=10, choices=[('Active','Active'),('Inactive','Inactive')])
 
@@ -122,6 +177,45 @@ class AssignedSubject(models.Model):
 # ------------------------
 # StudentRecord model
 # ------------------------
+def parse_grade_and_section(label):
+    """Split a 'Grade 7 - A' label into ('Grade 7', 'A').
+
+    The grade comes back in its canonical 'Grade <n>' form, or '' when the
+    label does not start with one; a missing section comes back as ''.
+    """
+    grade, _, section = (label or '').partition('-')
+    match = re.fullmatch(r'grade\s*(\d+)', grade.strip(), re.IGNORECASE)
+    grade = f'Grade {int(match.group(1))}' if match else ''
+    return grade, section.strip()
+
+def section_name_q(name, grade='', prefix=''):
+    """Q matching the students of the section called `name`, optionally in `grade`.
+
+    Records whose label names a section without a Section row have no
+    section FK; those are matched on the grade_and_section text instead.
+    """
+    linked = models.Q(**{f'{prefix}section__name__iexact': name})
+    if grade:
+        text = models.Q(**{f'{prefix}grade_and_section__iexact': f'{grade} - {name}'})
+    else:
+        text = models.Q(**{f'{prefix}grade_and_section__iendswith': f'- {name}'})
+    return linked | (models.Q(**{f'{prefix}section__isnull': True}) & text)
+
+def grade_section_q(label, prefix=''):
+    """Q matching the students of a grade ('Grade 7') or section ('Grade 7 - A').
+
+    Uses the indexed grade_level and section columns; `prefix` is the path
+    to the StudentRecord, e.g. 'student__'.
+    """
+    grade, section = parse_grade_and_section(label)
+    if not grade:
+        # Not a 'Grade <n>' label; fall back to matching the stored text
+        return models.Q(**{f'{prefix}grade_and_section__istartswith': label.strip()})
+    q = models.Q(**{f'{prefix}grade_level': grade})
+    if section:
+        q &= section_name_q(section, grade, prefix)
+    return q
+
 class StudentRecord(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -143,6 +237,9 @@ class StudentRecord(models.Model):
     student_id = models.PositiveIntegerField()
     fullname = models.CharField(max_length=100)
     grade_and_section = models.CharField(max_length=20, choices=SECTION_CHOICES, default='active')
+    # Parsed from grade_and_section whenever the record is saved (see sync_grade_and_section)
+    grade_level = models.CharField(max_length=10, choices=SECTION_CHOICES, blank=True, default='', db_index=True)
+    section = models.ForeignKey(Section, on_delete=models.SET_NULL, null=True, blank=True, related_name='student_records')
     gender = models.CharField(max_length=20, choices=GENDER_CHOICES, default='active')
     age = models.PositiveIntegerField()
     address = models.CharField(max_length=200)
@@ -151,10 +248,24 @@ class StudentRecord(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     # Optional: store linked account username for reliable lookup
     account_username = models.CharField(max_length=150, blank=True, null=True)
+    # The student's login account; student pages resolve the record through it
+    user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='student_record')
 
     def __str__(self):
         return self.fullname
 
+    def link_account(self, user):
+        """Link this record to `user` unless the account already belongs to another record.
+
+        Returns True if the record is now linked to `user`.
+        """
+        if StudentRecord.objects.filter(user=user).exclude(pk=self.pk).exists():
+            return False
+        self.user = user
+        self.account_username = user.username
+        self.save(update_fields=['user', 'account_username'])
+        return True
+
 # ------------------------
 # GradingComponent model
 # ------------------------
@@ -243,6 +354,60 @@ class WeeklyAttendanceSession(models.Model):
     def __str__(self):
         return f"{self.subject.name} - Week {self.week_number}"
 
+ATTENDANCE_SESSION_FIELDS = ['session_1', 'session_2', 'session_3', 'session_4']
+
+def _count_marks(condition):
+    """Sum over the four session columns of 1 where `condition(field)` holds."""
+    return sum(
+        models.Case(
+            models.When(condition(field), then=1),
+            default=0,
+            output_field=models.IntegerField(),
+        )
+        for field in ATTENDANCE_SESSION_FIELDS
+    )
+
+def present_marks():
+    """Expression counting 'P' marks in a record."""
+    return _count_marks(lambda field: models.Q(**{field: 'P'}))
+
+def recorded_marks():
+    """Expression counting marks that were taken (not blank, null or '-')."""
+    return _count_marks(
+        lambda field: models.Q(**{f'{field}__isnull': False}) & ~models.Q(**{f'{field}__in': ['', '-']})
+    )
+
+class WeeklyAttendanceRecordQuerySet(models.QuerySet):
+    """Attendance counts computed in SQL over the session_1..session_4 columns."""
+
+    def for_weeks(self, start=None, end=None):
+        """Restrict to weeks `start`..`end` (inclusive, either may be None)."""
+        qs = self
+        if start is not None:
+            qs = qs.filter(session__week_number__gte=start)
+        if end is not None:
+            qs = qs.filter(session__week_number__lte=end)
+        return qs
+
+    def for_section(self, grade_and_section):
+        """Restrict to students of one section, e.g. 'Grade 7 - A'."""
+        return self.filter(grade_section_q(grade_and_section, prefix='student__'))
+
+    def with_counts(self):
+        """Annotate each record with its `present` and `total` marks."""
+        return self.annotate(present=present_marks(), total=recorded_marks())
+
+    def attendance_totals(self):
+        """Present and total marks per (student, subject), one row per pair.
+
+        Returns dicts with student_id, subject_id, present and total.
+        """
+        return (
+            self.order_by()
+            .values('student_id', subject_id=models.F('session__subject_id'))
+            .annotate(present=models.Sum(present_marks()), total=models.Sum(recorded_marks()))
+        )
+
 class WeeklyAttendanceRecord(models.Model):
     """Individual student attendance record for a weekly session"""
     ATTENDANCE_CHOICES = [
@@ -260,6 +425,8 @@ class WeeklyAttendanceRecord(models.Model):
     session_4 = models.CharField(max_length=1, choices=ATTENDANCE_CHOICES, default='A', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = WeeklyAttendanceRecordQuerySet.as_manager()
     
     class Meta:
         unique_together = ['session', 'student']
@@ -319,11 +486,248 @@ class MLPredictionStatus(models.Model):
         return f"{self.student.fullname} - {self.subject.name} - {self.predicted_category or 'Not Predicted'}"
 
 
-from django.db.models.signals import post_save
+class ComponentAverages:
+    """Average helpers shared by anything carrying component sums and counts.
+
+    Expects quiz/exam/project `_sum` and `_count` attributes plus
+    `attendance_present` and `attendance_total`.
+    """
+
+    @staticmethod
+    def _average(total, count):
+        return float(total) / count if count else None
+
+    @property
+    def quiz_average(self):
+        return self._average(self.quiz_sum, self.quiz_count)
+
+    @property
+    def exam_average(self):
+        return self._average(self.exam_sum, self.exam_count)
+
+    @property
+    def project_average(self):
+        return self._average(self.project_sum, self.project_count)
+
+    @property
+    def attendance_average(self):
+        """Overall attendance percentage across all weeks of the subject."""
+        if not self.attendance_total:
+            return None
+        return round((self.attendance_present / self.attendance_total) * 100, 2)
+
+    def averages(self):
+        """Return the quiz, exam, project and attendance averages in that order."""
+        return [
+            self.quiz_average,
+            self.exam_average,
+            self.project_average,
+            self.attendance_average,
+        ]
+
+    @property
+    def has_scores(self):
+        return any(avg is not None for avg in self.averages())
+
+    def component_values(self):
+        """Component averages used for grading: like averages(), but with the
+        attendance percentage unrounded so it matches the SQL grade expression."""
+        values = self.averages()
+        if self.attendance_total:
+            values[3] = (self.attendance_present / self.attendance_total) * 100
+        return values
+
+    def compute_grade(self, require_all=False, policy=None):
+        """Weighted grade under the current GradingPolicy (see grading.py).
+
+        With `require_all` the grade is only computed when every weighted
+        component is present (score overview, PDF report); otherwise the
+        available components are used (dashboards, at-risk list).
+        """
+        if policy is None:
+            from .grading import get_grading_policy
+            policy = get_grading_policy()
+        return policy.grade(self.component_values(), require_all)
+
+class StudentSubjectSummaryQuerySet(models.QuerySet):
+
+    def at_risk(self, threshold=70, grade_level=None, section=None, subject=None):
+        """Active students' subjects whose current grade is below `threshold`.
+
+        `grade_level` is e.g. 'Grade 7', `section` a full 'Grade 7 - A' label
+        and `subject` a Subject or its id; None skips that filter.
+        """
+        qs = self.filter(student__status='active', grade__lt=threshold)
+        if grade_level:
+            qs = qs.filter(grade_section_q(grade_level, prefix='student__'))
+        if section:
+            qs = qs.filter(grade_section_q(section, prefix='student__'))
+        if subject:
+            qs = qs.filter(subject=subject)
+        return qs
+
+class StudentSubjectSummary(ComponentAverages, models.Model):
+    """Precomputed component totals and grade for one student in one subject.
+
+    Maintained from the score and attendance write paths (see summaries.py);
+    run `manage.py rebuild_summaries` to backfill or repair it.
+    """
+    student = models.ForeignKey(StudentRecord, on_delete=models.CASCADE, related_name='subject_summaries')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='student_summaries')
+    quiz_sum = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    quiz_count = models.PositiveIntegerField(default=0)
+    exam_sum = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    exam_count = models.PositiveIntegerField(default=0)
+    project_sum = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    project_count = models.PositiveIntegerField(default=0)
+    attendance_present = models.PositiveIntegerField(default=0)
+    attendance_total = models.PositiveIntegerField(default=0)
+    # Weighted grade over the available components, as shown on the dashboards
+    grade = models.FloatField(null=True, blank=True, db_index=True)
+    category = models.CharField(max_length=20, choices=[
+        ('Excellent', 'Excellent'),
+        ('Good', 'Good'),
+        ('Average', 'Average'),
+        ('At Risk', 'At Risk'),
+    ], null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StudentSubjectSummaryQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ['student', 'subject']
+        ordering = ['student', 'subject']
+
+    def __str__(self):
+        return f"{self.student.fullname} - {self.subject.name} - {self.grade}"
+
+class DashboardSnapshot(models.Model):
+    """Precomputed admin dashboard figures, refreshed by `manage.py refresh_dashboard`."""
+    name = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    is_stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.name} snapshot ({self.computed_at:%Y-%m-%d %H:%M})"
+
+
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 
+@receiver(pre_save, sender=Section)
+def sync_section_adviser(sender, instance, update_fields=None, **kwargs):
+    """Point adviser_user at the user the adviser label refers to."""
+    if update_fields is not None and 'adviser' not in update_fields:
+        return
+    instance.adviser_user_id = match_adviser(instance.adviser, cached_adviser_candidates())
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def resolve_section_advisers(sender, instance, update_fields=None, **kwargs):
+    """Re-resolve section advisers when a user who may be one changes.
+
+    An account created after its section, a renamed teacher or a new
+    namesake can all change which user a label refers to.
+    """
+    if update_fields is not None and not set(update_fields) & ADVISER_FIELDS:
+        return
+    invalidate_adviser_candidates()
+    candidates = cached_adviser_candidates()
+    changed = []
+    for section in Section.objects.exclude(adviser__isnull=True).exclude(adviser='').only('id', 'adviser', 'adviser_user'):
+        user_id = match_adviser(section.adviser, candidates)
+        if section.adviser_user_id != user_id:
+            section.adviser_user_id = user_id
+            changed.append(section)
+    Section.objects.bulk_update(changed, ['adviser_user'])
+
+@receiver(post_save, sender=Section)
+def sync_section_records(sender, instance, created, **kwargs):
+    """Relabel the section's students after a rename and link students whose label names it."""
+    label = f'{instance.grade} - {instance.name}'
+    if not created:
+        StudentRecord.objects.filter(section=instance).exclude(grade_and_section=label).update(
+            grade_and_section=label, grade_level=instance.grade,
+        )
+    StudentRecord.objects.filter(
+        section__isnull=True, grade_level=instance.grade, grade_and_section__iexact=label,
+    ).update(section=instance)
+
+@receiver(pre_save, sender=StudentRecord)
+def sync_grade_and_section(sender, instance, update_fields=None, **kwargs):
+    """Keep grade_level and section in step with the grade_and_section label."""
+    if update_fields is not None and 'grade_and_section' not in update_fields:
+        return
+    grade, section = parse_grade_and_section(instance.grade_and_section)
+    instance.grade_level = grade
+    instance.section = (
+        Section.objects.filter(grade=grade, name__iexact=section).order_by('status', 'id').first()
+        if grade and section else None
+    )
+
 @receiver(post_save, sender=StudentRecord)
 def create_student_score(sender, instance, created, **kwargs):
     if created:
         Score.objects.get_or_create(student=instance)
 
+@receiver(post_save, sender=QuizScore)
+@receiver(post_save, sender=ExamScore)
+@receiver(post_save, sender=ProjectScore)
+@receiver(post_delete, sender=QuizScore)
+@receiver(post_delete, sender=ExamScore)
+@receiver(post_delete, sender=ProjectScore)
+def refresh_score_summary(sender, instance, **kwargs):
+    from .summaries import queue_refresh
+    queue_refresh(instance.student_id, instance.subject_id)
+
+@receiver(post_save, sender=WeeklyAttendanceRecord)
+@receiver(post_delete, sender=WeeklyAttendanceRecord)
+def refresh_attendance_summary(sender, instance, **kwargs):
+    from .summaries import queue_refresh
+    try:
+        subject_id = instance.session.subject_id
+    except WeeklyAttendanceSession.DoesNotExist:
+        # Session already removed; its pre_delete receiver queued the pairs
+        return
+    queue_refresh(instance.student_id, subject_id)
+
+@receiver(pre_delete, sender=WeeklyAttendanceSession)
+def refresh_session_summaries(sender, instance, **kwargs):
+    from .summaries import queue_refresh
+    student_ids = instance.attendance_records.values_list('student_id', flat=True)
+    for student_id in student_ids:
+        queue_refresh(student_id, instance.subject_id)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=StudentRecord)
+@receiver(post_delete, sender=StudentRecord)
+def invalidate_dashboard_totals(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the dashboard does not show
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    from .dashboard import invalidate_snapshot
+    invalidate_snapshot()
+
+@receiver(post_save, sender=FacultyAssignment)
+@receiver(post_delete, sender=FacultyAssignment)
+@receiver(m2m_changed, sender=FacultyAssignment.subjects.through)
+@receiver(post_save, sender=AssignedSubject)
+@receiver(post_delete, sender=AssignedSubject)
+@receiver(post_delete, sender=Subject)
+def invalidate_faculty_scope_cache(sender, action=None, **kwargs):
+    # m2m_changed fires before and after each change; one bump is enough.
+    # Deleting a subject drops its assignment rows without m2m_changed.
+    if action is not None and not action.startswith('post_'):
+        return
+    from .scope import invalidate_faculty_scopes
+    invalidate_faculty_scopes()
+
+@receiver(post_save, sender=GradingComponent)
+@receiver(post_delete, sender=GradingComponent)
+def regrade_on_component_change(sender, instance, **kwargs):
+    from django.db import transaction
+    from .grading import invalidate_grading_policy, regrade_summaries
+    invalidate_grading_policy()
+    transaction.on_commit(regrade_summaries)
@@ -0,0 +1,287 @@
+"""Report-card PDFs for one student or a whole section or grade.
+
+report_cards() loads the grades of every student in scope with a single
+GradeBook and returns one plain dict per student.  The dicts pickle
+cheaply, so render_report_cards() can hand them to a process pool where
+ReportLab builds the PDFs in parallel; zip_report_cards() streams the
+results as a ZIP archive while later cards are still rendering.  Only the
+generate_report_cards command uses a pool; views render with workers=1.
+
+Single report cards are cached on disk by REPORT_CARD_CACHE, keyed by the
+student and a data version that changes whenever anything printed on the
+card does, so repeat downloads are served without rendering again.
+
+ReportLab is optional: it is imported when a PDF is built, and a missing
+install surfaces as ImportError from the rendering functions.
+"""
+import functools
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+from .gradebook import GradeBook
+from .grading import get_grading_policy
+from .models import StudentRecord, StudentSubjectSummary, Subject
+from .scoregrid import filter_grade_level
+from .workers import default_workers, map_chunksize, process_pool
+
+
+def scope_students(grade_level=None, section=None):
+    """Active students of a grade ('Grade 7') or section ('Grade 7 - A'), by name."""
+    students = StudentRecord.objects.filter(status='active')
+    students = filter_grade_level(students, grade_level)
+    students = filter_grade_level(students, section)
+    return students.order_by('grade_and_section', 'fullname', 'id')
+
+
+def report_cards(students):
+    """Return one report-card dict per student, loading all grades in bulk."""
+    students = list(students)
+    gradebook = GradeBook(students=students)
+    subjects = list(Subject.objects.filter(id__in=gradebook.subject_ids()).order_by('id'))
+    policy = get_grading_policy()
+    generated = datetime.now()
+
+    cards = []
+    for student in students:
+        grades = gradebook.for_student(student.id)
+        cards.append({
+            'id': student.id,
+            'student_id': student.student_id,
+            'fullname': student.fullname,
+            'grade_and_section': student.grade_and_section,
+            'generated': generated,
+            'subjects': [
+                {
+                    'name': subject.name,
+                    'code': subject.code,
+                    'averages': grades[subject.id].averages(),
+                    'grade': grades[subject.id].compute_grade(require_all=True, policy=policy),
+                }
+                for subject in subjects if subject.id in grades
+            ],
+        })
+    return cards
+
+
+def report_card_filename(card):
+    return f"grade_report_{card['fullname']}_{card['generated'].strftime('%Y%m%d')}.pdf"
+
+
+@functools.lru_cache(maxsize=None)
+def _report_styles():
+    """Paragraph and table styles, built once per process."""
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=30,
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f2937')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+    return styles, title_style, table_style
+
+
+def _report_card_story(card):
+    """ReportLab flowables for one report card."""
+    from reportlab.platypus import Table, Paragraph, Spacer
+    from reportlab.lib.units import inch
+
+    styles, title_style, table_style = _report_styles()
+
+    elements = []
+    elements.append(Paragraph(f"Grade Report - {card['fullname']}", title_style))
+    elements.append(Paragraph(f"Student ID: {card['student_id']} | Grade & Section: {card['grade_and_section']}", styles['Normal']))
+    elements.append(Paragraph(f"Generated on: {card['generated'].strftime('%B %d, %Y')}", styles['Normal']))
+    elements.append(Spacer(1, 0.3*inch))
+
+    for subject in card['subjects']:
+        avg_quiz, avg_exam, avg_project, avg_attendance = subject['averages']
+        grade = subject['grade']
+
+        elements.append(Paragraph(f"<b>{subject['name']} ({subject['code']})</b>", styles['Heading2']))
+
+        data = [
+            ['Category', 'Average'],
+            ['Quiz', f"{avg_quiz:.2f}" if avg_quiz else "N/A"],
+            ['Exam', f"{avg_exam:.2f}" if avg_exam else "N/A"],
+            ['Project', f"{avg_project:.2f}" if avg_project else "N/A"],
+            ['Attendance', f"{avg_attendance:.2f}%" if avg_attendance else "N/A"],
+            ['Overall Grade', f"{grade:.2f}" if grade else "N/A"],
+        ]
+
+        table = Table(data, colWidths=[3*inch, 2*inch])
+        table.setStyle(table_style)
+
+        elements.append(table)
+        elements.append(Spacer(1, 0.3*inch))
+    return elements
+
+
+def _build(elements):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def render_report_card(card):
+    """PDF bytes of one report card."""
+    return _build(_report_card_story(card))
+
+
+class ReportCardCache:
+    """On-disk cache of single report-card PDFs.
+
+    Files are named <student pk>-<version>.pdf; writing a new version
+    removes the student's older ones.  A request may still be about to open
+    one of those, so open_pdf() renders again when its file has gone.  The
+    directory defaults to a folder in the system temp directory and can be
+    set with the REPORT_CARD_CACHE_DIR setting.
+    """
+
+    # Part of every version; bump it when the PDF layout changes
+    LAYOUT = 1
+
+    def __init__(self, directory=None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        directory = self._directory or getattr(settings, 'REPORT_CARD_CACHE_DIR', None)
+        return Path(directory or Path(tempfile.gettempdir()) / 'edutrack-report-cards')
+
+    def version(self, student):
+        """Data version of a student's report card.
+
+        Every score and attendance write refreshes the student's summary
+        rows (see summaries.py), bumping their updated_at, so the summaries
+        stand in for the latest score and attendance changes.  The grading
+        weights, the subject and student details and the "Generated on"
+        date printed on the card are part of the version too.
+        """
+        summaries = (
+            StudentSubjectSummary.objects.filter(student=student)
+            .order_by('subject_id')
+            .values_list('subject_id', 'subject__code', 'subject__name', 'updated_at')
+        )
+        digest = hashlib.sha1()
+        parts = [
+            self.LAYOUT, datetime.now().date(), student.student_id, student.fullname,
+            student.grade_and_section, get_grading_policy().weights, *summaries,
+        ]
+        for part in parts:
+            digest.update(repr(part).encode())
+        return digest.hexdigest()[:20]
+
+    def path(self, student, version):
+        return self.directory / f'{student.pk}-{version}.pdf'
+
+    def open_pdf(self, student, version):
+        """Binary file object of the student's PDF for `version`, rendering it if it is not cached."""
+        path = self.path(student, version)
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass
+
+        pdf = render_report_card(report_cards([student])[0])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so concurrent requests never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+        for old in path.parent.glob(f'{student.pk}-*.pdf'):
+            if old != path:
+                try:
+                    old.unlink(missing_ok=True)
+                except OSError:
+                    # Still open elsewhere (Windows); the next write retries
+                    pass
+        # Served from memory, since a newer version may already be replacing the file
+        return io.BytesIO(pdf)
+
+
+REPORT_CARD_CACHE = ReportCardCache()
+
+
+def render_merged(cards):
+    """PDF bytes of several report cards, each starting on a new page."""
+    from reportlab.platypus import PageBreak
+
+    elements = []
+    for card in cards:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(_report_card_story(card))
+    return _build(elements)
+
+
+def render_report_cards(cards, workers=None):
+    """Yield (card, PDF bytes) in order, rendering in `workers` processes."""
+    workers = default_workers() if workers is None else workers
+    if workers < 2 or len(cards) < 2:
+        for card in cards:
+            yield card, render_report_card(card)
+        return
+    with process_pool(workers) as pool:
+        yield from zip(cards, pool.map(render_report_card, cards, chunksize=map_chunksize(cards, workers)))
+
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink for ZipFile whose written bytes are collected by drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_report_cards(cards, workers=None):
+    """Yield a ZIP archive of the report cards piece by piece as they render."""
+    stream = _ZipStream()
+    names = set()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for card, pdf in render_report_cards(cards, workers):
+            name = report_card_filename(card)
+            if name in names:
+                # Two students with the same name
+                name = name.replace('.pdf', f"_{card['student_id']}.pdf")
+            names.add(name)
+            archive.writestr(name, pdf)
+            yield stream.drain()
+    yield stream.drain()
@@ -0,0 +1,206 @@
+"""Bulk roster import: student records with optional login accounts.
+
+The CSV has a header row with the columns
+
+    student_id, fullname, grade_level, section, gender, age, address,
+    parent, parent_contact[, status, username, password]
+
+validated like the Add Student form (section is the section name within the
+grade, status defaults to active).  A row that gives a username and
+password also gets a student account, created the way the add view does it.
+
+Hashing a password is by far the slowest part of creating an account, so
+chunks with at least MIN_POOL_PASSWORDS passwords are hashed in a process
+pool, started on first use.  Users, Student profiles, StudentRecords and
+their legacy Score rows are then inserted with bulk_create, each chunk in
+its own transaction, keyed by the primary keys bulk_create returns.  bulk_create does not send
+post_save, so the Score row create_student_score would add is inserted in
+bulk here and the dashboard snapshot is invalidated once at the end.
+"""
+import csv
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from .dashboard import invalidate_snapshot
+from .forms import RosterRowForm
+from .models import Score, Section, Student, StudentRecord, User
+from .workers import default_workers, map_chunksize, process_pool
+
+
+REQUIRED_COLUMNS = (
+    'student_id', 'fullname', 'grade_level', 'section', 'gender', 'age',
+    'address', 'parent', 'parent_contact',
+)
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+
+# Fewer passwords are hashed inline; starting the workers would cost more
+MIN_POOL_PASSWORDS = 8
+
+
+class RosterImportResult:
+    """Running totals of a roster import; `errors` holds (line number, message)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.records = 0
+        self.accounts = 0
+        self.errors = []
+
+    def summary(self):
+        return (
+            f'{self.rows} rows: {self.records} students added, {self.accounts} accounts created, '
+            f'{len(self.errors)} rejected'
+        )
+
+
+class RosterImporter:
+    """Imports roster CSV rows in chunks of `chunk_size`, hashing with `workers` processes."""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f'chunk size must be 1-{MAX_CHUNK_SIZE}')
+        workers = default_workers() if workers is None else workers
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._pool = None
+        self.sections = {
+            (grade, name.strip().lower()): (pk, name)
+            for pk, grade, name in Section.objects.filter(status='Active').values_list('id', 'grade', 'name')
+        }
+        self.student_ids = set(StudentRecord.objects.values_list('student_id', flat=True))
+        self.usernames = set(User.objects.values_list('username', flat=True))
+
+    def _entry(self, row):
+        """Validate one CSV row; returns its cleaned data or raises ValueError."""
+        data = {key: (value or '').strip() for key, value in row.items() if key}
+        data['status'] = data.get('status') or 'active'
+        form = RosterRowForm(data)
+        if not form.is_valid():
+            field, errors = next(iter(form.errors.items()))
+            prefix = '' if field == '__all__' else f'{field}: '
+            raise ValueError(f'{prefix}{errors[0]}')
+        entry = form.cleaned_data
+
+        section = self.sections.get((entry['grade_level'], entry['section'].lower()))
+        if section is None:
+            raise ValueError(f'no active section "{entry["section"]}" in {entry["grade_level"]}')
+        entry['section_id'], entry['section'] = section
+        if entry['student_id'] in self.student_ids:
+            raise ValueError(f'student ID {entry["student_id"]} already exists')
+        if entry['username'] and entry['username'] in self.usernames:
+            raise ValueError(f'username "{entry["username"]}" already exists')
+
+        self.student_ids.add(entry['student_id'])
+        if entry['username']:
+            self.usernames.add(entry['username'])
+        return entry
+
+    def _hash_passwords(self, passwords):
+        if self.workers < 2 or len(passwords) < MIN_POOL_PASSWORDS:
+            return [make_password(password) for password in passwords]
+        if self._pool is None:
+            self._pool = process_pool(self.workers)
+        return list(self._pool.map(make_password, passwords, chunksize=map_chunksize(passwords, self.workers)))
+
+    def _write(self, entries, lines, result):
+        accounts = [entry for entry in entries if entry['username']]
+        hashes = self._hash_passwords([entry['password'] for entry in accounts])
+        try:
+            with transaction.atomic():
+                users = []
+                for entry, password in zip(accounts, hashes):
+                    names = entry['fullname'].split()
+                    users.append(User(
+                        username=entry['username'],
+                        password=password,
+                        first_name=names[0] if names else '',
+                        last_name=' '.join(names[1:]),
+                        is_student=True,
+                        role='student',
+                    ))
+                User.objects.bulk_create(users, batch_size=self.chunk_size)
+                user_ids = {user.username: user.pk for user in users}
+                Student.objects.bulk_create([
+                    Student(
+                        user_id=user_ids[entry['username']],
+                        year_level=int(entry['grade_level'].split()[-1]),
+                        section=entry['section'],
+                        course='N/A',
+                        status=entry['status'],
+                    )
+                    for entry in accounts
+                ], batch_size=self.chunk_size)
+
+                records = StudentRecord.objects.bulk_create([
+                    StudentRecord(
+                        student_id=entry['student_id'],
+                        fullname=entry['fullname'],
+                        grade_and_section=f"{entry['grade_level']} - {entry['section']}",
+                        # bulk_create skips sync_grade_and_section, so set these directly
+                        grade_level=entry['grade_level'],
+                        section_id=entry['section_id'],
+                        gender=entry['gender'],
+                        age=entry['age'],
+                        address=entry['address'],
+                        parent=entry['parent'],
+                        parent_contact=entry['parent_contact'],
+                        status=entry['status'],
+                        account_username=entry['username'] or None,
+                        user_id=user_ids.get(entry['username']),
+                    )
+                    for entry in entries
+                ], batch_size=self.chunk_size)
+                # Stands in for create_student_score, which bulk_create does not trigger
+                Score.objects.bulk_create(
+                    [Score(student_id=record.pk) for record in records], batch_size=self.chunk_size
+                )
+        except IntegrityError as e:
+            # Something else wrote a clashing user or record since the import started
+            result.errors.extend((line, f'not imported: {e}') for line in lines)
+            return
+        result.records += len(entries)
+        result.accounts += len(accounts)
+
+    def run(self, lines, progress=None):
+        """Import CSV text lines; call `progress(result)` after each chunk.
+
+        Raises ValueError if the header is missing a required column.
+        """
+        reader = csv.DictReader(lines)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f'CSV is missing column(s): {", ".join(missing)}')
+
+        result = RosterImportResult()
+        try:
+            entries = []
+            entry_lines = []
+            for row in reader:
+                result.rows += 1
+                try:
+                    entries.append(self._entry(row))
+                    entry_lines.append(reader.line_num)
+                except ValueError as e:
+                    result.errors.append((reader.line_num, str(e)))
+                if len(entries) == self.chunk_size:
+                    self._write(entries, entry_lines, result)
+                    entries, entry_lines = [], []
+                    if progress:
+                        progress(result)
+            if entries:
+                self._write(entries, entry_lines, result)
+            if progress:
+                progress(result)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        if result.records:
+            invalidate_snapshot()
+        result.errors.sort()
+        return result
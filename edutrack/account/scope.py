@@ -0,0 +1,101 @@
+"""Cached subject and grade-level scope of faculty users.
+
+A faculty user sees the subjects of their active FacultyAssignments and the
+students of the grade levels those subjects are actively assigned to.
+FacultyScope holds both, is computed with two queries and is kept in
+Django's cache under a key that includes a global scope version.  Changes
+to FacultyAssignment, its subjects or AssignedSubject bump the version
+(see the receivers in models.py), so every cached scope is replaced on its
+next use rather than deleted one by one.
+
+With a per-process cache backend (the default LocMemCache) other processes
+may serve a stale scope for up to FACULTY_SCOPE_CACHE_TIMEOUT seconds.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AssignedSubject, FacultyAssignment, Subject
+
+
+VERSION_KEY = 'account:faculty_scope:version'
+
+
+def cache_timeout():
+    return getattr(settings, 'FACULTY_SCOPE_CACHE_TIMEOUT', 300)
+
+
+class FacultyScope:
+    """Subject ids and grade levels a faculty user is assigned to."""
+
+    def __init__(self, subject_ids=(), grade_levels=()):
+        self.subject_ids = tuple(sorted(subject_ids))
+        self.grade_levels = tuple(sorted(grade_levels))
+
+    @classmethod
+    def compute(cls, user):
+        subject_ids = set(
+            FacultyAssignment.subjects.through.objects.filter(
+                facultyassignment__faculty=user,
+                facultyassignment__status='Active',
+            ).values_list('subject_id', flat=True)
+        )
+        grade_levels = set()
+        if subject_ids:
+            grade_levels = set(
+                AssignedSubject.objects.filter(subject_id__in=subject_ids, status='Active')
+                .values_list('grade_level', flat=True)
+            )
+        return cls(subject_ids, grade_levels)
+
+    def __bool__(self):
+        return bool(self.subject_ids)
+
+    def subjects(self):
+        return Subject.objects.filter(id__in=self.subject_ids)
+
+    def students(self, queryset):
+        """Narrow a StudentRecord queryset to the assigned grade levels."""
+        return queryset.filter(grade_level__in=self.grade_levels)
+
+    def __repr__(self):
+        return f'FacultyScope(subjects={list(self.subject_ids)}, grade_levels={list(self.grade_levels)})'
+
+
+def _new_version():
+    # Never reuses the number of a version the cache has evicted
+    return time.time_ns()
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() keeps a version another request stored in the meantime
+        cache.add(VERSION_KEY, _new_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_faculty_scope(user):
+    """Return the FacultyScope of `user`, from the cache when it is current."""
+    key = f'account:faculty_scope:{_version()}:{user.pk}'
+    scope = cache.get(key)
+    if scope is None:
+        scope = FacultyScope.compute(user)
+        cache.set(key, scope, cache_timeout())
+    return scope
+
+
+def invalidate_faculty_scopes():
+    """Retire every cached scope once the transaction commits."""
+    transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # No version stored; a new one is as good as an increment
+        cache.add(VERSION_KEY, _new_version(), None)
@@ -0,0 +1,225 @@
+"""Subject-by-subject grids for the quiz, exam, project and attendance pages.
+
+Each page shows one table per subject: the subject's students down the side,
+one column per assessment number (or attendance week) and a row average.
+Subjects are paginated first and only the subjects on the requested page
+are loaded; all their scores or attendance records come from a single
+query and are pivoted in memory.
+"""
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.core.paginator import Paginator
+
+from .models import (
+    ATTENDANCE_SESSION_FIELDS, AssignedSubject, ExamScore, ProjectScore, QuizScore,
+    StudentRecord, WeeklyAttendanceRecord, WeeklyAttendanceSession, grade_section_q,
+)
+from .search import search_students
+
+
+SUBJECTS_PER_PAGE = 5
+
+
+def paginate_subjects(subjects, page, per_page=SUBJECTS_PER_PAGE):
+    """Return the requested page of subjects, falling back to the first page."""
+    paginator = Paginator(subjects, per_page)
+    try:
+        return paginator.page(page)
+    except Exception:
+        return paginator.page(1)
+
+
+def filter_search(students, search):
+    """Apply the score pages' search box: name, student ID or parent name."""
+    return search_students(students, search)
+
+
+def filter_grade_level(students, grade_level):
+    """Limit students to an AssignedSubject grade level.
+
+    A grade level containing a section (e.g. 'Grade 7 - A') matches that
+    section only; otherwise every section of the grade (e.g. 'Grade 7') matches.
+    """
+    grade_level = (grade_level or '').strip()
+    if not grade_level:
+        return students
+    return students.filter(grade_section_q(grade_level))
+
+
+def subject_students(subject_ids, search=''):
+    """Return {subject_id: [active StudentRecord, ...]} ordered by name.
+
+    Students are limited to the grade level of the subject's first active
+    AssignedSubject; subjects without one show every active student.
+    Subjects sharing a grade level share one student query.
+    """
+    grade_levels = {}
+    assignments = (
+        AssignedSubject.objects.filter(subject_id__in=subject_ids, status='Active')
+        .order_by('id')
+        .values_list('subject_id', 'grade_level')
+    )
+    for subject_id, grade_level in assignments:
+        grade_levels.setdefault(subject_id, (grade_level or '').strip())
+
+    by_level = {}
+    students = {}
+    for subject_id in subject_ids:
+        grade_level = grade_levels.get(subject_id, '')
+        if grade_level not in by_level:
+            queryset = filter_grade_level(StudentRecord.objects.filter(status='active'), grade_level)
+            by_level[grade_level] = list(filter_search(queryset, search).order_by('fullname'))
+        students[subject_id] = by_level[grade_level]
+    return students
+
+
+class SubjectGrid(ABC):
+    """Base for grids built for one page of subjects at a time."""
+
+    @abstractmethod
+    def build(self, subjects, search=''):
+        """Return one table dict per subject in `subjects`."""
+
+    def page(self, subjects, page, search='', per_page=SUBJECTS_PER_PAGE):
+        """Paginate `subjects` and build the grid for the requested page only."""
+        page_obj = paginate_subjects(subjects, page, per_page)
+        page_obj.object_list = self.build(page_obj.object_list, search)
+        return page_obj
+
+
+class ScoreGrid(SubjectGrid):
+    """Builds the per-subject score tables for one score model.
+
+    `number_field` is the assessment number column (e.g. 'quiz_number'); the
+    numbers of each subject are exposed under '<number_field>s', matching
+    the templates ('quiz_numbers', 'exam_numbers', 'project_numbers').
+    """
+
+    def __init__(self, model, number_field):
+        self.model = model
+        self.number_field = number_field
+        self.numbers_key = f'{number_field}s'
+
+    def build(self, subjects, search=''):
+        """Return one {'subject', numbers_key, 'student_rows'} dict per subject.
+
+        Each student row holds the student, their scores in assessment order
+        (None where missing) and the average of the recorded scores.
+        """
+        subjects = list(subjects)
+        subject_ids = [subject.id for subject in subjects]
+        students = subject_students(subject_ids, search)
+
+        numbers = defaultdict(set)
+        cells = defaultdict(dict)
+        scores = (
+            self.model.objects.filter(subject_id__in=subject_ids)
+            .order_by()
+            .values_list('subject_id', 'student_id', self.number_field, 'score')
+        )
+        for subject_id, student_id, number, score in scores:
+            numbers[subject_id].add(number)
+            cells[subject_id][student_id, number] = float(score)
+
+        data = []
+        for subject in subjects:
+            subject_numbers = sorted(numbers[subject.id])
+            subject_cells = cells[subject.id]
+            student_rows = []
+            for student in students[subject.id]:
+                row = [subject_cells.get((student.id, number)) for number in subject_numbers]
+                recorded = [value for value in row if value is not None]
+                student_rows.append({
+                    'student': student,
+                    'scores': row,
+                    'average': sum(recorded) / len(recorded) if recorded else None,
+                })
+            data.append({
+                'subject': subject,
+                self.numbers_key: subject_numbers,
+                'student_rows': student_rows,
+            })
+        return data
+
+
+def _percentage(present, total):
+    return round((present / total * 100), 2) if total > 0 else 0
+
+
+class AttendanceGrid(SubjectGrid):
+    """Builds the per-subject weekly attendance tables.
+
+    The records of every subject on the page are read in one query with the
+    present/recorded mark counts computed in SQL; the weekly and overall
+    percentages are derived from those counts.
+    """
+
+    def build(self, subjects, search=''):
+        """Return one {'subject', 'weeks', 'student_rows'} dict per subject.
+
+        Each student row holds one {'summary', 'percentage', 'session_id'}
+        entry per week and the student's overall attendance percentage.
+        """
+        subjects = list(subjects)
+        subject_ids = [subject.id for subject in subjects]
+        students = subject_students(subject_ids, search)
+
+        weeks = defaultdict(list)
+        sessions = WeeklyAttendanceSession.objects.filter(
+            subject_id__in=subject_ids
+        ).order_by('subject_id', 'week_number')
+        for session in sessions:
+            weeks[session.subject_id].append(session)
+
+        cells = {}
+        records = (
+            WeeklyAttendanceRecord.objects.filter(session__subject_id__in=subject_ids)
+            .with_counts()
+            .order_by()
+            .values_list('session_id', 'student_id', 'present', 'total', *ATTENDANCE_SESSION_FIELDS)
+        )
+        for session_id, student_id, present, total, *marks in records:
+            cells[session_id, student_id] = (present, total, marks)
+
+        data = []
+        for subject in subjects:
+            student_rows = []
+            for student in students[subject.id]:
+                week_attendance = []
+                present_total = 0
+                recorded_total = 0
+                for session in weeks[subject.id]:
+                    cell = cells.get((session.id, student.id))
+                    if cell is None:
+                        week_attendance.append({
+                            'summary': '-',
+                            'percentage': 0,
+                            'session_id': session.id,
+                        })
+                        continue
+                    present, total, marks = cell
+                    present_total += present
+                    recorded_total += total
+                    week_attendance.append({
+                        'summary': ','.join(mark or '-' for mark in marks),
+                        'percentage': _percentage(present, total),
+                        'session_id': session.id,
+                    })
+                student_rows.append({
+                    'student': student,
+                    'week_attendance': week_attendance,
+                    'overall_percentage': _percentage(present_total, recorded_total),
+                })
+            data.append({
+                'subject': subject,
+                'weeks': weeks[subject.id],
+                'student_rows': student_rows,
+            })
+        return data
+
+
+QUIZ_GRID = ScoreGrid(QuizScore, 'quiz_number')
+EXAM_GRID = ScoreGrid(ExamScore, 'exam_number')
+PROJECT_GRID = ScoreGrid(ProjectScore, 'project_number')
+ATTENDANCE_GRID = AttendanceGrid()
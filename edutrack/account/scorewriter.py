@@ -0,0 +1,228 @@
+"""Bulk writes of quiz, exam and project scores.
+
+A ScoreWriter validates a batch of score cells and upserts them with one
+bulk INSERT ... ON CONFLICT on the model's (student, subject, number) key
+inside a single transaction, instead of an update_or_create per cell.
+bulk_create() bypasses the post_save receivers, so the affected summary
+rows are refreshed here.
+
+write_cells() applies a mixed batch of spreadsheet cells (scores and
+attendance marks) for the JSON cell-update endpoint.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .attendance import ATTENDANCE_MARKS, CLEAR_MARK, save_marks
+from .models import (
+    ATTENDANCE_SESSION_FIELDS, ExamScore, ProjectScore, QuizScore, StudentRecord, Subject,
+    WeeklyAttendanceSession,
+)
+from .summaries import refresh_summaries
+
+
+MAX_SCORE = Decimal('100')
+BATCH_SIZE = 500
+
+
+def parse_score(value):
+    """Return `value` as a Decimal with two places; raise ValueError if invalid."""
+    try:
+        score = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'"{value}" is not a number')
+    if not score.is_finite():
+        raise ValueError(f'"{value}" is not a number')
+    if score < 0 or score > MAX_SCORE:
+        raise ValueError(f'{value} is outside 0-{MAX_SCORE}')
+    return score.quantize(Decimal('0.01'))
+
+
+class ScoreWriteResult:
+    """Counts of a bulk write; `rejected` holds (cell, reason) pairs and
+    `pairs` the (student_id, subject_id) pairs that were written."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = []
+        self.pairs = set()
+
+    def reject(self, cell, reason):
+        self.rejected.append((cell, reason))
+
+    @property
+    def saved(self):
+        return self.inserted + self.updated
+
+    def summary(self):
+        text = f'{self.inserted} added, {self.updated} updated'
+        if self.rejected:
+            text += f', {len(self.rejected)} rejected'
+        return text
+
+
+class ScoreWriter:
+    """Upserts scores for one score model keyed by `number_field`."""
+
+    def __init__(self, model, number_field):
+        self.model = model
+        self.number_field = number_field
+
+    def parse_post(self, data, subject_id, student_ids, numbers, result):
+        """Read the 'score_<student id>_<number>' fields of a score form.
+
+        Blank fields are skipped; invalid ones are recorded on `result`.
+        Returns {(student_id, subject_id, number): Decimal}.
+        """
+        cells = {}
+        for student_id in student_ids:
+            for number in numbers:
+                field = f'score_{student_id}_{number}'
+                value = data.get(field)
+                if not value:
+                    continue
+                try:
+                    cells[student_id, subject_id, number] = parse_score(value)
+                except ValueError as e:
+                    result.reject(field, str(e))
+        return cells
+
+    def write(self, cells, result=None):
+        """Upsert {(student_id, subject_id, number): score} in one transaction.
+
+        Returns a ScoreWriteResult (the one passed in, if any).
+        """
+        result = result or ScoreWriteResult()
+        if not cells:
+            return result
+
+        student_ids = {student_id for student_id, _, _ in cells}
+        subject_ids = {subject_id for _, subject_id, _ in cells}
+        rows = [
+            self.model(student_id=student_id, subject_id=subject_id, score=score,
+                       **{self.number_field: number})
+            for (student_id, subject_id, number), score in cells.items()
+        ]
+        with transaction.atomic():
+            existing = set(
+                self.model.objects.filter(student_id__in=student_ids, subject_id__in=subject_ids)
+                .order_by()
+                .values_list('student_id', 'subject_id', self.number_field)
+            )
+            self.model.objects.bulk_create(
+                rows,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student', 'subject', self.number_field],
+                update_fields=['score'],
+            )
+            refresh_summaries({(student_id, subject_id) for student_id, subject_id, _ in cells})
+
+        result.pairs.update((student_id, subject_id) for student_id, subject_id, _ in cells)
+        updated = sum(1 for key in cells if key in existing)
+        result.updated += updated
+        result.inserted += len(cells) - updated
+        return result
+
+
+QUIZ_WRITER = ScoreWriter(QuizScore, 'quiz_number')
+EXAM_WRITER = ScoreWriter(ExamScore, 'exam_number')
+PROJECT_WRITER = ScoreWriter(ProjectScore, 'project_number')
+
+SCORE_WRITERS = {
+    'quiz': QUIZ_WRITER,
+    'exam': EXAM_WRITER,
+    'project': PROJECT_WRITER,
+}
+
+CELL_KINDS = tuple(SCORE_WRITERS) + ('attendance',)
+
+
+def _positive_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    value = int(value)
+    if value < 1:
+        raise ValueError
+    return value
+
+
+def write_cells(cells):
+    """Validate and apply a batch of cells in one transaction.
+
+    Each cell is a dict with student_id, subject_id, kind (quiz, exam,
+    project or attendance), number and score.  For attendance, number is
+    the week number, `session` is 1-4 and score is a mark (P, A, L or E,
+    or '-' to clear it).
+    Invalid cells are skipped and reported on the result as
+    (index in `cells`, reason); the others are written.
+    """
+    result = ScoreWriteResult()
+    parsed = []
+    for index, cell in enumerate(cells):
+        try:
+            if not isinstance(cell, dict):
+                raise ValueError('cell must be an object')
+            kind = cell.get('kind')
+            if kind not in CELL_KINDS:
+                raise ValueError(f'kind must be one of {", ".join(CELL_KINDS)}')
+            try:
+                student_id = _positive_int(cell.get('student_id'))
+                subject_id = _positive_int(cell.get('subject_id'))
+                number = _positive_int(cell.get('number'))
+            except (TypeError, ValueError):
+                raise ValueError('student_id, subject_id and number must be positive integers')
+            if kind == 'attendance':
+                try:
+                    field = ATTENDANCE_SESSION_FIELDS[_positive_int(cell.get('session')) - 1]
+                except (TypeError, ValueError, IndexError):
+                    raise ValueError(f'session must be 1-{len(ATTENDANCE_SESSION_FIELDS)}')
+                mark = cell.get('score')
+                if mark == CLEAR_MARK:
+                    mark = None
+                elif mark not in ATTENDANCE_MARKS:
+                    raise ValueError(f'mark must be one of {", ".join(ATTENDANCE_MARKS)} or {CLEAR_MARK} to clear')
+                value = (field, mark)
+            else:
+                value = parse_score(cell.get('score'))
+        except ValueError as e:
+            result.reject(index, str(e))
+            continue
+        parsed.append((index, kind, student_id, subject_id, number, value))
+
+    students = set(StudentRecord.objects.filter(id__in={p[2] for p in parsed}).values_list('id', flat=True))
+    subjects = set(Subject.objects.filter(id__in={p[3] for p in parsed}).values_list('id', flat=True))
+    weeks = {
+        (session.subject_id, session.week_number): session
+        for session in WeeklyAttendanceSession.objects.filter(
+            subject_id__in={p[3] for p in parsed if p[1] == 'attendance'}
+        )
+    }
+
+    scores = {kind: {} for kind in SCORE_WRITERS}
+    marks = {}
+    for index, kind, student_id, subject_id, number, value in parsed:
+        if student_id not in students:
+            result.reject(index, f'student {student_id} does not exist')
+        elif subject_id not in subjects:
+            result.reject(index, f'subject {subject_id} does not exist')
+        elif kind == 'attendance':
+            session = weeks.get((subject_id, number))
+            if session is None:
+                result.reject(index, f'week {number} does not exist for subject {subject_id}')
+                continue
+            field, mark = value
+            marks.setdefault(session, {}).setdefault(student_id, {})[field] = mark
+        else:
+            scores[kind][student_id, subject_id, number] = value
+
+    with transaction.atomic():
+        for kind, writer in SCORE_WRITERS.items():
+            writer.write(scores[kind], result)
+        for session, session_marks in marks.items():
+            created, updated = save_marks(session, session_marks)
+            result.inserted += created
+            result.updated += updated
+            result.pairs.update((student_id, session.subject_id) for student_id in session_marks)
+    return result
@@ -0,0 +1,144 @@
+"""Full-text student search on SQLite FTS5.
+
+account_studentsearch is an FTS5 table holding the full name, student ID
+and parent name of every StudentRecord under the record's id as rowid.
+SQLite triggers on account_studentrecord keep it in step with every write,
+bulk_create and queryset update() included.  Each word of a search matches
+the start of a word in any of the three columns, and all words must match,
+so "ana cruz" finds "Ana Maria Cruz" and "2024" finds student ID 20240117.
+
+Migrations that rebuild account_studentrecord on SQLite drop its triggers,
+so ensure_search_index() runs after every migrate (see AccountConfig) and
+recreates them, re-indexing the table, when they are missing.  On other
+databases, or an SQLite build without FTS5, searches fall back to the old
+fullname__icontains filter.
+
+Whether the index exists is remembered per process for READY_TIMEOUT
+seconds.  The MATCH runs when search_students() is called; if it fails
+because the index has gone in the meantime (a migrate from another
+process) the search falls back and forgets the cached answer.
+"""
+import re
+import time
+
+from django.db import DatabaseError, OperationalError, connections, transaction
+from django.db.models import Q
+
+
+TABLE = 'account_studentsearch'
+RECORD_TABLE = 'account_studentrecord'
+
+# Words beyond this are ignored; typeahead queries are short
+MAX_TERMS = 8
+
+_CREATE_TABLE = f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(fullname, student_id, parent, tokenize='unicode61')"
+_INSERT_NEW = f'INSERT INTO {TABLE}(rowid, fullname, student_id, parent) VALUES (new.id, new.fullname, new.student_id, new.parent);'
+_DELETE_OLD = f'DELETE FROM {TABLE} WHERE rowid = old.id;'
+TRIGGERS = {
+    f'{TABLE}_insert': f'AFTER INSERT ON {RECORD_TABLE} BEGIN {_INSERT_NEW} END',
+    f'{TABLE}_delete': f'AFTER DELETE ON {RECORD_TABLE} BEGIN {_DELETE_OLD} END',
+    f'{TABLE}_update': f'AFTER UPDATE OF fullname, student_id, parent ON {RECORD_TABLE} BEGIN {_DELETE_OLD} {_INSERT_NEW} END',
+}
+
+# Seconds a per-process answer to "does the index exist?" is trusted
+READY_TIMEOUT = 60
+
+# alias -> (whether the index can be queried, time.monotonic() of the check)
+_ready = {}
+
+
+def ensure_search_index(connection):
+    """Create the index and its triggers if missing; returns True if the index is usable.
+
+    When a trigger has to be (re)created the index is rebuilt from
+    account_studentrecord, since writes made without it were not indexed.
+    """
+    _ready.pop(connection.alias, None)
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(_CREATE_TABLE)
+        except DatabaseError:
+            # SQLite built without FTS5
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [RECORD_TABLE]
+        )
+        existing = {name for (name,) in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in existing]
+        if not missing:
+            return True
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {TRIGGERS[name]}')
+        rebuild_search_index(connection)
+    return True
+
+
+def rebuild_search_index(connection):
+    """Re-index every StudentRecord; returns the number of rows indexed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE}(rowid, fullname, student_id, parent) '
+            f'SELECT id, fullname, student_id, parent FROM {RECORD_TABLE}'
+        )
+        return cursor.rowcount
+
+
+def drop_search_index(connection):
+    _ready.pop(connection.alias, None)
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def search_index_ready(using='default'):
+    ready, checked = _ready.get(using, (None, 0))
+    if ready is None or time.monotonic() - checked > READY_TIMEOUT:
+        connection = connections[using]
+        ready = connection.vendor == 'sqlite' and TABLE in connection.introspection.table_names()
+        _ready[using] = (ready, time.monotonic())
+    return ready
+
+
+def _matching_ids(using, expression):
+    """Ids of the records matching `expression`, or None, forgetting the
+    cached readiness, if the index has gone since it was checked."""
+    try:
+        # A savepoint, so a failure does not break the caller's transaction
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [expression])
+            return [rowid for (rowid,) in cursor.fetchall()]
+    except OperationalError:
+        _ready.pop(using, None)
+        return None
+
+
+def match_expression(search):
+    """FTS5 query matching every word of `search` as a prefix, or None if it has no words."""
+    terms = re.findall(r'\w+', search)[:MAX_TERMS]
+    if not terms:
+        return None
+    # Quoted, so words like AND or NEAR are not read as operators
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_students(students, search):
+    """Narrow a StudentRecord queryset to records matching `search`."""
+    search = (search or '').strip()
+    if not search:
+        return students
+    if search_index_ready(students.db):
+        expression = match_expression(search)
+        if expression is None:
+            return students.none()
+        ids = _matching_ids(students.db, expression)
+        if ids is not None:
+            return students.filter(id__in=ids)
+    if search.isdigit():
+        return students.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
+    return students.filter(fullname__icontains=search)
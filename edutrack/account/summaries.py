@@ -0,0 +1,159 @@
+"""Maintenance of the StudentSubjectSummary table.
+
+Single-row saves and deletes of quiz, exam, project and attendance rows are
+picked up by the signal receivers in models.py, which queue the affected
+(student, subject) pairs and refresh them once the surrounding transaction
+commits.  Bulk writers (bulk_create, bulk_update, QuerySet.update) bypass
+signals and must call refresh_summaries() with the pairs they touched.
+"""
+import threading
+
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_snapshot
+from .gradebook import GradeBook, performance_category
+from .models import StudentSubjectSummary
+
+
+TOTAL_FIELDS = [
+    'quiz_sum', 'quiz_count',
+    'exam_sum', 'exam_count',
+    'project_sum', 'project_count',
+    'attendance_present', 'attendance_total',
+]
+
+SUMMARY_FIELDS = TOTAL_FIELDS + ['grade', 'category', 'updated_at']
+
+BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+def _copy_entry(summary, entry):
+    """Copy GradeBook totals onto a summary row; return True if anything changed."""
+    changed = False
+    for field in TOTAL_FIELDS:
+        value = getattr(entry, field)
+        if getattr(summary, field) != value:
+            setattr(summary, field, value)
+            changed = True
+    grade = entry.compute_grade()
+    category = performance_category(grade)
+    if summary.grade != grade or summary.category != category:
+        summary.grade = grade
+        summary.category = category
+        changed = True
+    return changed
+
+
+def _build(entry):
+    summary = StudentSubjectSummary(student_id=entry.student_id, subject_id=entry.subject_id)
+    _copy_entry(summary, entry)
+    return summary
+
+
+def refresh_summaries(pairs):
+    """Recompute the summary rows for an iterable of (student_id, subject_id) pairs.
+
+    Rows are created, updated or deleted so that they match the raw scores.
+    Returns the number of rows written or removed.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+
+    student_ids = {student_id for student_id, _ in pairs}
+    subject_ids = {subject_id for _, subject_id in pairs}
+    gradebook = GradeBook(students=student_ids, subjects=subject_ids)
+    existing = {
+        (row.student_id, row.subject_id): row
+        for row in StudentSubjectSummary.objects.filter(
+            student_id__in=student_ids, subject_id__in=subject_ids
+        )
+    }
+
+    to_create, to_update, stale = [], [], []
+    for pair in pairs:
+        entry = gradebook.get(*pair)
+        summary = existing.get(pair)
+        if entry is None:
+            if summary is not None:
+                stale.append(summary.pk)
+        elif summary is None:
+            to_create.append(_build(entry))
+        elif _copy_entry(summary, entry):
+            to_update.append(summary)
+
+    # bulk_update() does not touch auto_now fields
+    now = timezone.now()
+    for summary in to_update:
+        summary.updated_at = now
+
+    with transaction.atomic():
+        if stale:
+            StudentSubjectSummary.objects.filter(pk__in=stale).delete()
+        if to_update:
+            StudentSubjectSummary.objects.bulk_update(to_update, SUMMARY_FIELDS, batch_size=BATCH_SIZE)
+        if to_create:
+            # A concurrent refresh may have created the row since it was read
+            StudentSubjectSummary.objects.bulk_create(
+                to_create,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student', 'subject'],
+                update_fields=SUMMARY_FIELDS,
+            )
+        changed = len(stale) + len(to_update) + len(to_create)
+        if changed:
+            invalidate_snapshot()
+    return changed
+
+
+def _flush():
+    pairs = getattr(_pending, 'pairs', None)
+    if pairs:
+        _pending.pairs = set()
+        refresh_summaries(pairs)
+
+
+def _flush_registered():
+    connection = transaction.get_connection()
+    return any(callback is _flush for _, callback, _ in connection.run_on_commit)
+
+
+def queue_refresh(student_id, subject_id):
+    """Refresh a pair after the current transaction commits.
+
+    Pairs queued within one transaction are refreshed together by a single
+    flush.  Outside a transaction the refresh happens immediately.
+    """
+    pairs = getattr(_pending, 'pairs', None)
+    if pairs is None:
+        pairs = _pending.pairs = set()
+    # Pending pairs mean a flush is already queued, unless a rollback
+    # discarded it; the pairs are then refreshed by the next one
+    schedule = not pairs or not _flush_registered()
+    pairs.add((student_id, subject_id))
+    if schedule:
+        transaction.on_commit(_flush)
+
+
+def rebuild_summaries(students=None, subjects=None):
+    """Drop and recompute all summary rows in scope (None means everything).
+
+    Returns the number of rows written.
+    """
+    gradebook = GradeBook(students=students, subjects=subjects)
+    summaries = StudentSubjectSummary.objects.all()
+    if students is not None:
+        summaries = summaries.filter(student__in=students)
+    if subjects is not None:
+        summaries = summaries.filter(subject__in=subjects)
+
+    rows = [_build(entry) for entry in gradebook]
+    with transaction.atomic():
+        summaries.delete()
+        StudentSubjectSummary.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        invalidate_snapshot()
+    return len(rows)
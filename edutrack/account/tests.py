@@ -1,3 +1,1004 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import math
+import os
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import gradecube, search, summaries
+from .attendance import parse_marks, save_marks
+from .dashboard import get_snapshot
+from .forms import GradingComponentForm
+from .gradebook import performance_category
+from .gradecube import GradeCube, grade_distribution
+from .grading import DEFAULT_WEIGHTS, GradingPolicy, component_key, invalidate_grading_policy
+from .importer import ScoreImporter
+from .models import (
+    ATTENDANCE_SESSION_FIELDS, AssignedSubject, DashboardSnapshot, ExamScore, FacultyAssignment, GradingComponent,
+    ProjectScore, QuizScore, Score, Section, StudentRecord, StudentSubjectSummary, Subject, User,
+    WeeklyAttendanceRecord, WeeklyAttendanceSession, grade_section_q, match_adviser,
+)
+from .reportcards import ReportCardCache
+from .roster import RosterImporter
+from .scope import get_faculty_scope
+from .scorewriter import QUIZ_WRITER, ScoreWriteResult, parse_score
+from .summaries import rebuild_summaries, refresh_summaries
+
+
+def make_subject(code='MATH7', grade_level='Grade 7'):
+    return Subject.objects.create(code=code, name=f'Subject {code}', department='Gen', grade_level=grade_level, status='Active')
+
+
+def make_student(student_id, fullname=None, grade_and_section='Grade 7 - A', **fields):
+    fields.setdefault('parent', 'Parent Name')
+    fields.setdefault('status', 'active')
+    return StudentRecord.objects.create(
+        student_id=student_id,
+        fullname=fullname or f'Student {student_id}',
+        grade_and_section=grade_and_section,
+        gender='Male',
+        age=13,
+        address='Address',
+        parent_contact=1234,
+        **fields,
+    )
+
+
+class GradingPolicyTests(TestCase):
+
+    def tearDown(self):
+        invalidate_grading_policy()
+
+    def test_component_names_are_matched_exactly(self):
+        self.assertEqual(component_key('Quizzes'), 'quiz')
+        self.assertEqual(component_key(' EXAM '), 'exam')
+        self.assertIsNone(component_key('Pre-exam quiz'))
+        self.assertIsNone(component_key('Project attendance'))
+
+    def test_only_configured_components_count(self):
+        policy = GradingPolicy.from_components([('Quiz', 40), ('Exam', 60)])
+        self.assertEqual(policy.as_dict(), {'quiz': 40.0, 'exam': 60.0, 'project': 0.0, 'attendance': 0.0})
+        self.assertEqual(policy.grade([80, 90, 10, 10]), 86.0)
+
+    def test_defaults_apply_without_recognised_components(self):
+        defaults = GradingPolicy(DEFAULT_WEIGHTS)
+        self.assertEqual(GradingPolicy.from_components([]), defaults)
+        self.assertEqual(GradingPolicy.from_components([('Long Quiz', 50)]), defaults)
+
+    def test_python_numpy_and_sql_grades_agree(self):
+        import numpy as np
+
+        subject = make_subject()
+        rows = [
+            dict(quiz_sum=Decimal('170'), quiz_count=2, exam_sum=Decimal('90'), exam_count=1,
+                 project_sum=Decimal('75'), project_count=1, attendance_present=7, attendance_total=8),
+            dict(quiz_sum=Decimal('60'), quiz_count=1),
+            dict(exam_sum=Decimal('88.5'), exam_count=1, attendance_present=1, attendance_total=3),
+            dict(),
+        ]
+        summaries = [
+            StudentSubjectSummary.objects.create(student=make_student(1000 + i), subject=subject, **row)
+            for i, row in enumerate(rows)
+        ]
+        for policy in (GradingPolicy(DEFAULT_WEIGHTS), GradingPolicy({'quiz': 40, 'attendance': 60})):
+            for require_all in (False, True):
+                expected = [policy.grade(s.component_values(), require_all) for s in summaries]
+                sql = list(
+                    StudentSubjectSummary.objects.order_by('id')
+                    .annotate(value=policy.grade_expression(require_all))
+                    .values_list('value', flat=True)
+                )
+                values = np.array([[np.nan if v is None else v for v in s.component_values()] for s in summaries])
+                array = policy.grade_array(np.nan_to_num(values), ~np.isnan(values), require_all)
+                for python_grade, sql_grade, array_grade in zip(expected, sql, array):
+                    if python_grade is None:
+                        self.assertIsNone(sql_grade)
+                        self.assertTrue(np.isnan(array_grade))
+                    else:
+                        self.assertAlmostEqual(python_grade, sql_grade)
+                        self.assertAlmostEqual(python_grade, float(array_grade))
+
+    def test_form_rejects_unknown_and_duplicate_components(self):
+        GradingComponent.objects.create(component='Quiz', weight=25, status='Active')
+        self.assertFalse(GradingComponentForm({'component': 'Pre-exam quiz', 'weight': 10, 'status': 'Active'}).is_valid())
+        self.assertFalse(GradingComponentForm({'component': 'quizzes', 'weight': 10, 'status': 'Active'}).is_valid())
+        self.assertTrue(GradingComponentForm({'component': 'quizzes', 'weight': 10, 'status': 'Inactive'}).is_valid())
+        self.assertTrue(GradingComponentForm({'component': 'Exam', 'weight': 30, 'status': 'Active'}).is_valid())
+
+
+class SectionScopeTests(TestCase):
+
+    def matching(self, label):
+        return sorted(StudentRecord.objects.filter(grade_section_q(label)).values_list('student_id', flat=True))
+
+    def test_label_without_section_row_still_matches(self):
+        make_student(1, grade_and_section='Grade 7 - Rizal')
+        self.assertIsNone(StudentRecord.objects.get(student_id=1).section)
+        self.assertEqual(self.matching('Grade 7 - Rizal'), [1])
+        self.assertEqual(self.matching('Grade 7'), [1])
+
+    def test_creating_and_renaming_a_section_resyncs_students(self):
+        make_student(1, grade_and_section='Grade 7 - Rizal')
+        section = Section.objects.create(grade='Grade 7', name='Rizal', number_of_students=30, status='Active')
+        self.assertEqual(StudentRecord.objects.get(student_id=1).section, section)
+
+        section.name = 'Mabini'
+        section.save()
+        record = StudentRecord.objects.get(student_id=1)
+        self.assertEqual(record.grade_and_section, 'Grade 7 - Mabini')
+        self.assertEqual(self.matching('Grade 7 - Mabini'), [1])
+        self.assertEqual(self.matching('Grade 7 - Rizal'), [])
+
+
+class FacultyScopeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = make_subject()
+        self.teacher = User.objects.create_user('teacher', role='faculty', first_name='Maria', last_name='Reyes')
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment = FacultyAssignment.objects.create(faculty=self.teacher, status='Active')
+            assignment.subjects.add(self.subject)
+            self.assigned = AssignedSubject.objects.create(grade_level='Grade 7', subject=self.subject, status='Active')
+
+    def test_assignment_changes_replace_the_cached_scope(self):
+        scope = get_faculty_scope(self.teacher)
+        self.assertEqual((scope.subject_ids, scope.grade_levels), ((self.subject.id,), ('Grade 7',)))
+        with self.assertNumQueries(0):
+            get_faculty_scope(self.teacher)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assigned.grade_level = 'Grade 8'
+            self.assigned.save()
+        self.assertEqual(get_faculty_scope(self.teacher).grade_levels, ('Grade 8',))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assigned.delete()
+        scope = get_faculty_scope(self.teacher)
+        self.assertEqual((scope.subject_ids, scope.grade_levels), ((self.subject.id,), ()))
+
+    def test_section_changes_apply_next_to_the_cached_scope(self):
+        make_student(1, fullname='Ana Cruz')
+        make_student(2, fullname='Ana Lim', grade_and_section='Grade 9 - Rizal')
+        self.client.force_login(self.teacher)
+
+        def found():
+            response = self.client.get(reverse('api_student_search'), {'q': 'ana'})
+            return [row['student_id'] for row in response.json()['results']]
+
+        self.assertEqual(found(), [1])
+        # Advised sections are matched live, next to the cached grade levels
+        section = Section.objects.create(grade='Grade 9', name='Rizal', number_of_students=30, status='Active')
+        self.assertEqual(found(), [1])
+        section.adviser = 'Maria Reyes'
+        section.save()
+        self.assertEqual(found(), [1, 2])
+
+
+class ScoreCellTests(TestCase):
+
+    def setUp(self):
+        self.subject = make_subject()
+        self.student = make_student(1)
+        self.client.force_login(User.objects.create_user('teacher', role='faculty'))
+
+    def post_cells(self, cells):
+        response = self.client.post(
+            reverse('api_update_score_cells'), json.dumps({'cells': cells}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def cell(self, number, score, kind='quiz'):
+        return {'kind': kind, 'student_id': self.student.id, 'subject_id': self.subject.id,
+                'number': number, 'score': score}
+
+    def test_invalid_cells_are_rejected_and_valid_ones_saved(self):
+        data = self.post_cells([self.cell(1, '80'), self.cell(2, '101'), self.cell(3, 'abc'), self.cell(4, '90', 'grade')])
+        self.assertFalse(data['success'])
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2, 3])
+        self.assertEqual(list(QuizScore.objects.values_list('quiz_number', 'score')), [(1, Decimal('80.00'))])
+
+    def test_response_carries_the_new_summary(self):
+        self.post_cells([self.cell(1, '80')])
+        data = self.post_cells([self.cell(1, '70'), self.cell(2, '90')])
+        self.assertTrue(data['success'])
+        self.assertEqual((data['inserted'], data['updated']), (1, 1))
+        [summary] = data['summaries']
+        self.assertEqual((summary['student_id'], summary['subject_id']), (self.student.id, self.subject.id))
+        self.assertEqual(summary['quiz_average'], 80.0)
+        self.assertIsNone(summary['exam_average'])
+
+    def test_edit_form_uses_the_same_validation(self):
+        QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=1, score=50)
+        QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=2, score=60)
+        url = reverse('edit_quiz_scores', args=[self.student.id, self.subject.id])
+        field = f'score_{self.student.id}_%d'
+        response = self.client.post(url, {field % 1: '75', field % 2: '150'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        data = response.json()
+        self.assertFalse(data['success'])
+        self.assertEqual([error['field'] for error in data['errors']], [field % 2])
+        self.assertEqual(
+            list(QuizScore.objects.order_by('quiz_number').values_list('score', flat=True)),
+            [Decimal('75.00'), Decimal('60.00')],
+        )
+        self.assertEqual(data['summaries'][0]['quiz_average'], 67.5)
+
+
+ROSTER_HEADER = 'student_id,fullname,grade_level,section,gender,age,address,parent,parent_contact,username,password'
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RosterImportTests(TestCase):
+
+    def setUp(self):
+        # Longer than Section.name's max_length, as in existing data
+        self.section = Section.objects.create(
+            grade='Grade 8', name='William Shakespeare', number_of_students=30, status='Active'
+        )
+
+    def run_import(self, *rows):
+        return RosterImporter(chunk_size=2, workers=1).run([ROSTER_HEADER, *rows])
+
+    def test_rows_are_imported_with_accounts(self):
+        result = self.run_import(
+            '101,Ana Cruz,Grade 8,william shakespeare,Female,14,Town,Parent,5551,ana,pw1',
+            '102,Ben Reyes,Grade 8,William Shakespeare,Male,14,Town,Parent,5552,,',
+            '103,Cy Lim,Grade 8,William Shakespeare,Male,14,Town,Parent,5553,cy,pw3',
+        )
+        self.assertEqual((result.rows, result.records, result.accounts, result.errors), (3, 3, 2, []))
+        ana = StudentRecord.objects.get(student_id=101)
+        self.assertEqual(ana.section, self.section)
+        self.assertEqual(ana.grade_and_section, 'Grade 8 - William Shakespeare')
+        self.assertEqual(ana.user.username, 'ana')
+        self.assertTrue(ana.user.check_password('pw1'))
+        self.assertIsNone(StudentRecord.objects.get(student_id=102).user)
+
+    def test_invalid_rows_are_reported_by_line(self):
+        make_student(101)
+        result = self.run_import(
+            '101,Ana Cruz,Grade 8,William Shakespeare,Female,14,Town,Parent,5551,,',
+            '104,Di Tan,Grade 8,Rizal,Female,14,Town,Parent,5554,,',
+            '105,Ed Go,Grade 8,William Shakespeare,Male,14,Town,Parent,5555,ed,',
+            '106,Flo Uy,Grade 8,William Shakespeare,Female,14,Town,Parent,5556,,',
+        )
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 4])
+        self.assertIn('already exists', result.errors[0][1])
+        self.assertIn('no active section', result.errors[1][1])
+        self.assertEqual(result.records, 1)
+        self.assertTrue(StudentRecord.objects.filter(student_id=106).exists())
+
+    def test_score_rows_follow_the_inserted_records(self):
+        importer = RosterImporter(chunk_size=2, workers=1)
+        # Written by someone else after the importer read the existing IDs
+        other = make_student(101)
+        result = importer.run([ROSTER_HEADER, '101,Ana Cruz,Grade 8,William Shakespeare,Female,14,Town,Parent,5551,,'])
+        self.assertEqual(result.records, 1)
+        for record in StudentRecord.objects.filter(student_id=101):
+            self.assertEqual(Score.objects.filter(student=record).count(), 1)
+        self.assertEqual(Score.objects.filter(student=other).count(), 1)
+
+    def test_passwords_are_hashed_inline_below_the_pool_threshold(self):
+        def accounts(first, username):
+            return [ROSTER_HEADER] + [
+                f'{number},Student {number},Grade 8,William Shakespeare,Male,14,Town,Parent,5551,{username}{number},pw'
+                for number in range(first, first + 4)
+            ]
+
+        with mock.patch('account.roster.process_pool') as pool:
+            result = RosterImporter(chunk_size=2, workers=4).run(accounts(1, 'user'))
+        pool.assert_not_called()
+        self.assertEqual(result.accounts, 4)
+
+        with mock.patch('account.roster.MIN_POOL_PASSWORDS', 2), \
+                mock.patch('account.roster.process_pool', side_effect=ThreadPoolExecutor) as pool:
+            result = RosterImporter(chunk_size=2, workers=4).run(accounts(11, 'again'))
+        # Started once, on the first chunk that needs it, and reused
+        pool.assert_called_once_with(4)
+        self.assertEqual(result.accounts, 4)
+        self.assertTrue(User.objects.get(username='again11').check_password('pw'))
+
+
+class ReportCardViewTests(TestCase):
+
+    def setUp(self):
+        make_student(1, fullname='Ana Cruz', grade_and_section='Grade 7 - A"b')
+        make_student(2, fullname='Ben Reyes', grade_and_section='Grade 7 - A"b')
+        self.client.force_login(User.objects.create_user('teacher', role='faculty'))
+
+    def test_zip_is_rendered_without_a_process_pool(self):
+        with mock.patch('account.reportcards.default_workers', return_value=4), \
+                mock.patch('account.reportcards.process_pool') as pool:
+            response = self.client.get(reverse('generate_report_cards'), {'section': 'Grade 7 - A"b'})
+            content = b''.join(response.streaming_content)
+        pool.assert_not_called()
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="report_cards_grade-7-ab_\d{8}\.zip"$')
+        self.assertEqual(len(zipfile.ZipFile(io.BytesIO(content)).namelist()), 2)
+
+
+class GradebookExportTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('principal', role='admin', is_admin=True))
+
+    def test_bad_subject_ids_are_client_errors(self):
+        url = reverse('export_gradebook')
+        self.assertEqual(self.client.get(url, {'subject': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'subject': '999'}).status_code, 404)
+
+    def test_filename_is_slugified(self):
+        response = self.client.get(reverse('export_gradebook'), {'section': 'Grade 7 - A"\r\nX'})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="gradebook-grade-7-a-x-\d{8}\.csv"$')
+
+
+class ReportCardCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = ReportCardCache(self.directory.name)
+        self.student = make_student(1)
+
+    def test_version_changes_with_the_printed_date(self):
+        with mock.patch('account.reportcards.datetime') as clock:
+            clock.now.return_value.date.return_value = date(2026, 1, 5)
+            monday = self.cache.version(self.student)
+            clock.now.return_value.date.return_value = date(2026, 1, 6)
+            self.assertNotEqual(self.cache.version(self.student), monday)
+
+    def test_a_removed_version_is_rendered_again(self):
+        version = self.cache.version(self.student)
+        with self.cache.open_pdf(self.student, version) as pdf:
+            content = pdf.read()
+        self.assertTrue(content.startswith(b'%PDF'))
+        path = self.cache.path(self.student, version)
+        with open(path, 'rb') as cached:
+            self.assertEqual(cached.read(), content)
+
+        # Another request wrote a newer version and removed this one
+        path.unlink()
+        with mock.patch('account.reportcards.render_report_card', return_value=b'%PDF-again') as render:
+            with self.cache.open_pdf(self.student, version) as pdf:
+                self.assertEqual(pdf.read(), b'%PDF-again')
+        render.assert_called_once()
+
+
+class AttendanceSessionTests(TestCase):
+
+    def test_existing_week_is_reported_not_recreated(self):
+        subject = make_subject()
+        data = {'subject': subject.id, 'week_number': 1, 'week_start_date': '2026-01-05',
+                'week_end_date': '2026-01-09', 'sessions_per_week': 4}
+        url = reverse('add_attendance_session')
+        first = self.client.post(url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        second = self.client.post(url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        self.assertTrue(first['success'])
+        self.assertFalse(second['success'])
+        self.assertIn('already exists', second['message'])
+        self.assertEqual(subject.attendance_sessions.count(), 1)
+
+
+class StudentAccountTests(TestCase):
+
+    def test_migration_links_accounts_without_account_username(self):
+        migration = importlib.import_module('account.migrations.0036_link_student_accounts')
+        by_id = User.objects.create_user('20240001', role='student')
+        by_name = User.objects.create_user('ana', first_name='Ana', last_name='Cruz', role='student')
+        ambiguous = User.objects.create_user('ben', first_name='Ben', last_name='Reyes', role='student')
+        make_student(20240001, fullname='Carla Lim')
+        ana = make_student(2, fullname='ANA CRUZ')
+        make_student(3, fullname='Ben Reyes')
+        make_student(4, fullname='Ben Reyes')
+
+        migration.link_remaining_accounts(apps, None)
+
+        self.assertEqual(StudentRecord.objects.get(student_id=20240001).user, by_id)
+        ana.refresh_from_db()
+        self.assertEqual((ana.user, ana.account_username), (by_name, 'ana'))
+        self.assertFalse(StudentRecord.objects.filter(user=ambiguous).exists())
+        # Running it again changes nothing
+        migration.link_remaining_accounts(apps, None)
+        self.assertEqual(StudentRecord.objects.filter(user__isnull=False).count(), 2)
+
+    def test_dashboard_only_follows_the_account_link(self):
+        user = User.objects.create_user('20240001', first_name='Ana', last_name='Cruz', role='student')
+        record = make_student(20240001, fullname='Ana Cruz', account_username='20240001')
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertIsNone(response.context['student_record'])
+        record.refresh_from_db()
+        self.assertIsNone(record.user)
+
+        self.assertTrue(record.link_account(user))
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['student_record'], record)
+
+
+class StudentSearchTests(TestCase):
+
+    def setUp(self):
+        self.assertTrue(search.search_index_ready())
+
+    def tearDown(self):
+        search._ready.clear()
+
+    def found(self, text):
+        return sorted(search.search_students(StudentRecord.objects.all(), text).values_list('student_id', flat=True))
+
+    def test_every_word_prefixes_a_word_of_any_column(self):
+        make_student(20240117, fullname='Ana Maria Cruz', parent='Jose Cruz')
+        make_student(20230001, fullname='Anabel Reyes', parent='Rosa Reyes')
+        self.assertEqual(self.found('ana cr'), [20240117])
+        self.assertEqual(self.found('ana'), [20230001, 20240117])
+        self.assertEqual(self.found('2024'), [20240117])
+        self.assertEqual(self.found('rosa'), [20230001])
+        self.assertEqual(self.found('"AND" NEAR'), [])
+        self.assertEqual(self.found('--'), [])
+
+    def test_triggers_follow_inserts_updates_and_deletes(self):
+        record = make_student(1, fullname='Ana Cruz')
+        record.fullname = 'Bea Santos'
+        record.save()
+        self.assertEqual(self.found('ana'), [])
+        self.assertEqual(self.found('bea'), [1])
+
+        StudentRecord.objects.filter(pk=record.pk).update(fullname='Cora Lim')
+        self.assertEqual(self.found('bea'), [])
+        self.assertEqual(self.found('cora'), [1])
+
+        record.delete()
+        self.assertEqual(self.found('cora'), [])
+
+    def test_the_index_is_queried_once_per_search(self):
+        make_student(1, fullname='Ana Cruz')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.found('ana'), [1])
+        self.assertEqual(sum(' MATCH ' in query['sql'] for query in queries.captured_queries), 1)
+
+    def test_a_dropped_index_falls_back_and_is_rechecked(self):
+        make_student(1, fullname='Ana Cruz')
+        with connection.cursor() as cursor:
+            for name in search.TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+            cursor.execute(f'DROP TABLE {search.TABLE}')
+        # The cached answer still says the index exists
+        self.assertEqual(self.found('ana'), [1])
+        self.assertNotIn('default', search._ready)
+        self.assertFalse(search.search_index_ready())
+
+
+class SummaryTests(TestCase):
+
+    def setUp(self):
+        self.subject = make_subject()
+        self.student = make_student(1)
+
+    def summary(self):
+        return StudentSubjectSummary.objects.filter(student=self.student, subject=self.subject).first()
+
+    def test_single_writes_refresh_the_summary_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=1, score=80)
+            quiz = QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=2, score=90)
+            ExamScore.objects.create(student=self.student, subject=self.subject, exam_number=1, score=70)
+        summary = self.summary()
+        self.assertEqual((summary.quiz_sum, summary.quiz_count, summary.exam_count), (Decimal('170'), 2, 1))
+        self.assertEqual(summary.quiz_average, 85.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz.score = 100
+            quiz.save()
+        self.assertEqual(self.summary().quiz_average, 90.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizScore.objects.all().delete()
+            ExamScore.objects.all().delete()
+        self.assertIsNone(self.summary())
+
+    def test_one_flush_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for number in range(1, 4):
+                QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=number, score=80)
+            ExamScore.objects.create(student=self.student, subject=self.subject, exam_number=1, score=70)
+        self.assertEqual(sum(1 for callback in callbacks if callback is summaries._flush), 1)
+        self.assertEqual(self.summary().quiz_count, 3)
+
+    def test_refresh_tolerates_a_row_created_concurrently(self):
+        QuizScore.objects.bulk_create([
+            QuizScore(student=self.student, subject=self.subject, quiz_number=1, score=60),
+        ])
+        # Another request created the row after this one found it missing
+        real_filter = StudentSubjectSummary.objects.filter
+        with mock.patch.object(StudentSubjectSummary.objects, 'filter') as filter_:
+            filter_.side_effect = lambda *args, **kwargs: real_filter(*args, **kwargs).none()
+            StudentSubjectSummary.objects.create(student=self.student, subject=self.subject, quiz_count=9)
+            self.assertEqual(refresh_summaries({(self.student.id, self.subject.id)}), 1)
+        summary = self.summary()
+        self.assertEqual((summary.quiz_sum, summary.quiz_count), (Decimal('60'), 1))
+
+    def test_rebuild_matches_the_incremental_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=1, score=75)
+            ExamScore.objects.create(student=self.student, subject=self.subject, exam_number=1, score=88)
+        fields = ['student_id', 'subject_id', 'quiz_sum', 'quiz_count', 'exam_sum', 'exam_count', 'grade', 'category']
+        incremental = list(StudentSubjectSummary.objects.values_list(*fields))
+        self.assertEqual(rebuild_summaries(), 1)
+        self.assertEqual(list(StudentSubjectSummary.objects.values_list(*fields)), incremental)
+
+
+class AttendanceQuerySetTests(TestCase):
+
+    def setUp(self):
+        self.math, self.science = make_subject(), make_subject('SCI7')
+        self.ana = make_student(1)
+        self.ben = make_student(2, grade_and_section='Grade 7 - B')
+        marks = {
+            # (subject, week): {student: session_1..session_4}
+            (self.math, 1): {self.ana: ['P', 'P', 'A', 'L'], self.ben: ['P', 'A', None, None]},
+            (self.math, 2): {self.ana: ['P', 'P', 'P', 'P'], self.ben: ['A', 'A', 'A', 'A']},
+            (self.math, 3): {self.ana: ['E', None, None, None]},
+            (self.science, 1): {self.ana: ['P', 'A', 'A', 'A']},
+        }
+        for (subject, week), rows in marks.items():
+            session = WeeklyAttendanceSession.objects.create(
+                subject=subject, week_number=week,
+                week_start_date=date(2026, 1, 7 * week - 2), week_end_date=date(2026, 1, 7 * week + 2),
+            )
+            for student, values in rows.items():
+                WeeklyAttendanceRecord.objects.create(
+                    session=session, student=student, **dict(zip(ATTENDANCE_SESSION_FIELDS, values))
+                )
+
+    def totals(self, qs):
+        return sorted(
+            (row['student_id'], row['subject_id'], row['present'], row['total'])
+            for row in qs.attendance_totals()
+        )
+
+    def weeks(self, qs):
+        return sorted(set(qs.values_list('session__week_number', flat=True)))
+
+    def test_for_weeks(self):
+        records = WeeklyAttendanceRecord.objects.all()
+        self.assertEqual(self.weeks(records.for_weeks()), [1, 2, 3])
+        self.assertEqual(self.weeks(records.for_weeks(start=2)), [2, 3])
+        self.assertEqual(self.weeks(records.for_weeks(end=2)), [1, 2])
+        self.assertEqual(self.weeks(records.for_weeks(2, 2)), [2])
+
+    def test_for_section(self):
+        records = WeeklyAttendanceRecord.objects.for_section('Grade 7 - B')
+        self.assertEqual(set(records.values_list('student_id', flat=True)), {self.ben.id})
+        self.assertEqual(WeeklyAttendanceRecord.objects.for_section('Grade 7').count(), 6)
+
+    def test_attendance_totals(self):
+        math, science = self.math.id, self.science.id
+        self.assertEqual(self.totals(WeeklyAttendanceRecord.objects.all()), [
+            (self.ana.id, math, 6, 9), (self.ana.id, science, 1, 4), (self.ben.id, math, 1, 6),
+        ])
+        self.assertEqual(self.totals(WeeklyAttendanceRecord.objects.for_weeks(end=1)), [
+            (self.ana.id, math, 2, 4), (self.ana.id, science, 1, 4), (self.ben.id, math, 1, 2),
+        ])
+        self.assertEqual(self.totals(WeeklyAttendanceRecord.objects.for_weeks(start=2).for_section('Grade 7 - A')), [
+            (self.ana.id, math, 4, 5),
+        ])
+        self.assertEqual(self.totals(WeeklyAttendanceRecord.objects.for_section('Grade 8')), [])
+
+
+class GradeCubeTests(TestCase):
+
+    # (student, subject): quiz, exam and project (sum, count), attendance (present, total)
+    TOTALS = {
+        (1, 'MATH7'): [(180, 2), (85, 1), (90, 1), (7, 8)],
+        (1, 'SCI7'): [(95, 1), (None, 0), (None, 0), (None, 0)],
+        (2, 'MATH7'): [(None, 0), (None, 0), (None, 0), (1, 3)],
+        (2, 'SCI7'): [(150, 2), (70, 1), (88, 1), (2, 3)],
+        (3, 'MATH7'): [(160, 2), (82, 1), (None, 0), (4, 4)],
+        (4, 'SCI7'): [(None, 0), (None, 0), (None, 0), (None, 0)],
+    }
+
+    def setUp(self):
+        subjects = {code: make_subject(code) for code in ('MATH7', 'SCI7')}
+        students = {number: make_student(number) for number in (1, 2, 3, 4)}
+        rows = []
+        for (number, code), totals in self.TOTALS.items():
+            (quiz_sum, quiz_count), (exam_sum, exam_count), (project_sum, project_count), attendance = totals
+            summary = StudentSubjectSummary(
+                student=students[number], subject=subjects[code],
+                quiz_sum=quiz_sum or 0, quiz_count=quiz_count,
+                exam_sum=exam_sum or 0, exam_count=exam_count,
+                project_sum=project_sum or 0, project_count=project_count,
+                attendance_present=attendance[0] or 0, attendance_total=attendance[1],
+            )
+            summary.grade = summary.compute_grade()
+            summary.category = performance_category(summary.grade)
+            rows.append(summary)
+        StudentSubjectSummary.objects.bulk_create(rows)
+
+    @unittest.skipUnless(gradecube.NUMPY_AVAILABLE, 'numpy is not installed')
+    def test_cube_grades_match_compute_grade(self):
+        cube = GradeCube.from_summaries()
+        for require_all in (False, True):
+            grades = cube.grades(require_all)
+            categories = cube.categorize(grades)
+            for summary in StudentSubjectSummary.objects.all():
+                i = cube.student_ids.index(summary.student_id)
+                j = cube.subject_ids.index(summary.subject_id)
+                expected = summary.compute_grade(require_all)
+                with self.subTest(pair=(summary.student.student_id, summary.subject.code), require_all=require_all):
+                    if expected is None:
+                        self.assertTrue(math.isnan(grades[i, j]))
+                        self.assertEqual(categories[i, j], '')
+                    else:
+                        self.assertAlmostEqual(grades[i, j], expected)
+                        self.assertEqual(categories[i, j], performance_category(expected))
+        # Only two pairs have every component
+        self.assertEqual(sum(not math.isnan(grade) for grade in cube.grades(require_all=True).flat), 2)
+
+    def test_fallback_gives_the_same_distribution(self):
+        expected = {'Excellent': 1, 'Good': 1, 'Average': 0, 'At Risk': 1}
+        if gradecube.NUMPY_AVAILABLE:
+            self.assertEqual(grade_distribution(), expected)
+        with mock.patch.object(gradecube, 'NUMPY_AVAILABLE', False):
+            self.assertEqual(grade_distribution(), expected)
+            with self.assertRaises(ImportError):
+                GradeCube.from_summaries()
+
+
+class DashboardSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = make_subject()
+        self.student = make_student(1)
+        self.first = get_snapshot()
+
+    def assert_stale_then_rebuilt(self):
+        self.assertTrue(DashboardSnapshot.objects.get().is_stale)
+        snapshot = get_snapshot()
+        self.assertFalse(DashboardSnapshot.objects.get().is_stale)
+        self.assertGreater(snapshot['computed_at'], self.first['computed_at'])
+        return snapshot['data']
+
+    def test_snapshot_is_served_from_the_cache(self):
+        self.assertFalse(DashboardSnapshot.objects.get().is_stale)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_snapshot(), self.first)
+
+    def test_score_write_rebuilds_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizScore.objects.create(student=self.student, subject=self.subject, quiz_number=1, score=95)
+        self.assertEqual(self.first['data']['excellent_count'], 0)
+        self.assertEqual(self.assert_stale_then_rebuilt()['excellent_count'], 1)
+
+    def test_attendance_write_rebuilds_the_snapshot(self):
+        session = WeeklyAttendanceSession.objects.create(
+            subject=self.subject, week_number=1, week_start_date=date(2026, 1, 5), week_end_date=date(2026, 1, 9)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            save_marks(session, {self.student.id: {'session_1': 'A'}})
+        self.assertEqual(self.assert_stale_then_rebuilt()['at_risk_count'], 1)
+
+    def test_student_write_rebuilds_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student(2)
+        self.assertEqual(self.first['data']['total_student_records'], 1)
+        self.assertEqual(self.assert_stale_then_rebuilt()['total_student_records'], 2)
+
+
+class AtRiskViewTests(TestCase):
+
+    def setUp(self):
+        self.math, self.science = make_subject(), make_subject('SCI7')
+        self.ana = make_student(1, fullname='Ana Cruz')
+        self.ben = make_student(2, fullname='Ben Lim', grade_and_section='Grade 7 - B')
+        self.cora = make_student(3, fullname='Cora Tan', grade_and_section='Grade 8 - A')
+        inactive = make_student(4, fullname='Dan Uy', status='inactive')
+        QUIZ_WRITER.write({
+            (student.id, subject.id, 1): Decimal(score)
+            for student, subject, score in [
+                (self.ana, self.math, '60'), (self.ana, self.science, '75'), (self.ben, self.math, '50'),
+                (self.cora, self.math, '65'), (inactive, self.math, '40'),
+            ]
+        })
+        self.client.force_login(User.objects.create_user('teacher', role='faculty'))
+
+    def at_risk(self, **params):
+        response = self.client.get(reverse('at_risk_students'), {'format': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def found(self, **params):
+        return [(row['student_id'], row['subject_id']) for row in self.at_risk(**params)['results']]
+
+    def test_filters(self):
+        math, science = self.math.id, self.science.id
+        self.assertEqual(self.found(), [(self.ana.id, math), (self.ben.id, math), (self.cora.id, math)])
+        self.assertEqual(self.found(threshold='80'), [
+            (self.ana.id, math), (self.ana.id, science), (self.ben.id, math), (self.cora.id, math),
+        ])
+        self.assertEqual(self.found(threshold='55'), [(self.ben.id, math)])
+        self.assertEqual(self.found(grade_level='Grade 8'), [(self.cora.id, math)])
+        self.assertEqual(self.found(section='Grade 7 - B'), [(self.ben.id, math)])
+        self.assertEqual(self.found(threshold='80', subject=str(science)), [(self.ana.id, science)])
+        # Unparseable values fall back to the defaults
+        self.assertEqual(len(self.found(threshold='abc', subject='x')), 3)
+
+    def test_json_shape_and_paging(self):
+        data = self.at_risk(per_page='2', page='2')
+        self.assertEqual(
+            {key: data[key] for key in ('success', 'threshold', 'count', 'page', 'num_pages')},
+            {'success': True, 'threshold': 70.0, 'count': 3, 'page': 2, 'num_pages': 2},
+        )
+        self.assertEqual(data['results'], [{
+            'student_id': self.cora.id,
+            'fullname': 'Cora Tan',
+            'grade_and_section': 'Grade 8 - A',
+            'subject_id': self.math.id,
+            'subject': 'Subject MATH7',
+            'current_grade': 65.0,
+            'performance_category': 'At Risk',
+            'avg_quiz': 65.0,
+            'avg_exam': None,
+            'avg_project': None,
+            'avg_attendance': None,
+        }])
+        # per_page is clamped to 1-100
+        self.assertEqual(self.at_risk(per_page='0')['num_pages'], 3)
+
+
+class ScoreWriterTests(TestCase):
+
+    def test_parse_score_bounds(self):
+        self.assertEqual(parse_score(' 87.456 '), Decimal('87.46'))
+        self.assertEqual(parse_score('100'), Decimal('100.00'))
+        for value in ('-1', '100.01', 'abc', 'nan', 'inf', ''):
+            with self.assertRaises(ValueError):
+                parse_score(value)
+
+    def test_bulk_upsert_counts_and_refreshes_summaries(self):
+        subject = make_subject()
+        first, second = make_student(1), make_student(2)
+        result = QUIZ_WRITER.write({
+            (first.id, subject.id, 1): Decimal('80'),
+            (second.id, subject.id, 1): Decimal('60'),
+        })
+        self.assertEqual((result.inserted, result.updated), (2, 0))
+
+        result = QUIZ_WRITER.write({
+            (first.id, subject.id, 1): Decimal('90'),
+            (first.id, subject.id, 2): Decimal('70'),
+        })
+        self.assertEqual((result.inserted, result.updated), (1, 1))
+        self.assertEqual(result.pairs, {(first.id, subject.id)})
+        self.assertEqual(
+            list(QuizScore.objects.order_by('student_id', 'quiz_number').values_list('student_id', 'quiz_number', 'score')),
+            [(first.id, 1, Decimal('90.00')), (first.id, 2, Decimal('70.00')), (second.id, 1, Decimal('60.00'))],
+        )
+        summary = StudentSubjectSummary.objects.get(student=first, subject=subject)
+        self.assertEqual((summary.quiz_sum, summary.quiz_count), (Decimal('160'), 2))
+
+    def test_parse_post_reads_score_fields(self):
+        result = ScoreWriteResult()
+        cells = QUIZ_WRITER.parse_post(
+            {'score_1_1': '95', 'score_1_2': '', 'score_2_1': '120'}, 7, [1, 2], [1, 2], result
+        )
+        self.assertEqual(cells, {(1, 7, 1): Decimal('95.00')})
+        self.assertEqual([cell for cell, _ in result.rejected], ['score_2_1'])
+
+
+class AttendanceMarkTests(TestCase):
+
+    def setUp(self):
+        self.subject = make_subject()
+        self.session = WeeklyAttendanceSession.objects.create(
+            subject=self.subject, week_number=1, week_start_date=date(2026, 1, 5), week_end_date=date(2026, 1, 9)
+        )
+        self.first, self.second = make_student(1), make_student(2)
+
+    def test_parse_marks_keeps_valid_marks_only(self):
+        data = {'attendance_1_session_1': 'P', 'attendance_1_session_2': 'X', 'attendance_2_session_4': 'L'}
+        self.assertEqual(parse_marks(data, [1, 2]), {1: {'session_1': 'P'}, 2: {'session_4': 'L'}})
+
+    def test_only_changed_records_are_written(self):
+        all_present = dict.fromkeys(['session_1', 'session_2', 'session_3', 'session_4'], 'P')
+        marks = {self.first.id: all_present, self.second.id: {'session_1': 'P'}}
+        self.assertEqual(save_marks(self.session, marks), (2, 0))
+        summary = StudentSubjectSummary.objects.get(student=self.first, subject=self.subject)
+        self.assertEqual((summary.attendance_present, summary.attendance_total), (4, 4))
+
+        self.assertEqual(save_marks(self.session, marks), (0, 0))
+
+        unchanged = WeeklyAttendanceRecord.objects.get(student=self.first).updated_at
+        marks[self.second.id] = {'session_1': 'P', 'session_2': 'P'}
+        self.assertEqual(save_marks(self.session, marks), (0, 1))
+        self.assertEqual(WeeklyAttendanceRecord.objects.get(student=self.first).updated_at, unchanged)
+        self.assertEqual(WeeklyAttendanceRecord.objects.get(student=self.second).session_2, 'P')
+
+    def test_cleared_marks_without_a_record_create_nothing(self):
+        self.assertEqual(save_marks(self.session, {self.first.id: {'session_1': None}}), (0, 0))
+
+    def test_edit_view_saves_and_clears_marks(self):
+        url = reverse('edit_attendance_scores', args=[self.first.id, self.subject.id])
+        field = f'attendance_{self.session.id}_session_%d'
+        data = self.client.post(
+            url, {field % 1: 'P', field % 2: '-', field % 3: 'L'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ).json()
+        self.assertTrue(data['success'])
+        record = WeeklyAttendanceRecord.objects.get(student=self.first)
+        self.assertEqual(
+            [record.session_1, record.session_2, record.session_3, record.session_4], ['P', None, 'L', 'A']
+        )
+        self.assertEqual(data['summaries'][0]['attendance_average'], 33.33)
+
+        self.client.post(url, {field % 1: '-'})
+        record.refresh_from_db()
+        self.assertIsNone(record.session_1)
+
+    def test_cell_endpoint_clears_marks(self):
+        save_marks(self.session, {self.first.id: {'session_1': 'P'}})
+        self.client.force_login(User.objects.create_user('teacher', role='faculty'))
+        cell = {'kind': 'attendance', 'student_id': self.first.id, 'subject_id': self.subject.id,
+                'number': 1, 'session': 1, 'score': '-'}
+        response = self.client.post(
+            reverse('api_update_score_cells'), json.dumps({'cells': [cell]}), content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+        self.assertIsNone(WeeklyAttendanceRecord.objects.get(student=self.first).session_1)
+
+
+class SectionAdviserTests(TestCase):
+
+    CANDIDATES = [
+        (1, 'mreyes', 'Maria', 'Reyes', 'maria@school.test'),
+        (2, 'jcruz', 'Jose', 'Cruz', 'jose@school.test'),
+        (3, 'jcruz2', 'Jose', 'Cruz', ''),
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def make_section(self, adviser):
+        return Section.objects.create(grade='Grade 7', name='Rizal', adviser=adviser, number_of_students=30, status='Active')
+
+    def test_match_adviser(self):
+        self.assertEqual(match_adviser('2', self.CANDIDATES), 2)
+        self.assertEqual(match_adviser(' MREYES ', self.CANDIDATES), 1)
+        self.assertEqual(match_adviser('Mrs. Maria Reyes', self.CANDIDATES), 1)
+        self.assertEqual(match_adviser('jose@school.test', self.CANDIDATES), 2)
+        # Two teachers with this name: nobody rather than the wrong one
+        self.assertIsNone(match_adviser('Jose Cruz', self.CANDIDATES))
+        self.assertIsNone(match_adviser('Ana Lim', self.CANDIDATES))
+        self.assertIsNone(match_adviser('', self.CANDIDATES))
+
+    def test_account_created_after_the_section_is_linked(self):
+        section = self.make_section('Maria Reyes')
+        self.assertIsNone(section.adviser_user)
+        teacher = User.objects.create_user('mreyes', first_name='Maria', last_name='Reyes', role='faculty')
+        section.refresh_from_db()
+        self.assertEqual(section.adviser_user, teacher)
+
+    def test_renames_and_namesakes_re_resolve(self):
+        teacher = User.objects.create_user('mreyes', first_name='Maria', last_name='Reyes', role='faculty')
+        section = self.make_section('Maria Reyes')
+        self.assertEqual(section.adviser_user, teacher)
+
+        User.objects.create_user('mreyes2', first_name='Maria', last_name='Reyes', role='faculty')
+        section.refresh_from_db()
+        self.assertIsNone(section.adviser_user)
+
+        teacher.last_name = 'Santos'
+        teacher.save()
+        section.refresh_from_db()
+        self.assertNotEqual(section.adviser_user, teacher)
+        self.assertIsNotNone(section.adviser_user)
+
+    def test_logins_do_not_re_resolve(self):
+        teacher = User.objects.create_user('mreyes', first_name='Maria', last_name='Reyes', role='faculty')
+        self.make_section('Maria Reyes')
+        with self.assertNumQueries(1):
+            teacher.save(update_fields=['last_login'])
+
+
+SCORE_CSV = """student_id,subject,kind,number,score,session
+101,MATH7,quiz,1,85
+101,math7,quiz,2,90.5
+102,MATH7,exam,1,77
+103,MATH7,quiz,1,80
+101,SCI7,quiz,1,80
+101,MATH7,quiz,1,101
+101,MATH7,attendance,1,p,2
+101,MATH7,attendance,2,P,1
+102,MATH7,project,1,60
+"""
+
+SCORE_CSV_ERRORS = [
+    (5, 'student ID "103" matches more than one record'),
+    (6, 'unknown subject code "SCI7"'),
+    (7, '101 is outside 0-100'),
+    (9, 'week 2 does not exist for subject {subject}'),
+]
+
+
+class ScoreImportTests(TestCase):
+
+    def setUp(self):
+        self.subject = make_subject()
+        self.first, self.second = make_student(101), make_student(102)
+        make_student(103, fullname='Twin One')
+        make_student(103, fullname='Twin Two')
+        self.session = WeeklyAttendanceSession.objects.create(
+            subject=self.subject, week_number=1, week_start_date=date(2026, 1, 5), week_end_date=date(2026, 1, 9)
+        )
+        self.expected_errors = [
+            (line, message.format(subject=self.subject.id)) for line, message in SCORE_CSV_ERRORS
+        ]
+
+    def assert_rows_written(self):
+        self.assertEqual(
+            list(QuizScore.objects.order_by('quiz_number').values_list('student_id', 'quiz_number', 'score')),
+            [(self.first.id, 1, Decimal('85.00')), (self.first.id, 2, Decimal('90.50'))],
+        )
+        self.assertEqual(ExamScore.objects.get().student, self.second)
+        self.assertEqual(ProjectScore.objects.get().score, Decimal('60.00'))
+        self.assertEqual(WeeklyAttendanceRecord.objects.get(student=self.first).session_2, 'P')
+
+    def test_command_flushes_chunks_and_reports_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scores.csv')
+            errors_path = os.path.join(directory, 'errors.csv')
+            with open(path, 'w') as f:
+                f.write(SCORE_CSV)
+            out = io.StringIO()
+            # 9 rows in chunks of 2 ends on a partial chunk
+            call_command('import_scores', path, chunk_size=2, errors=errors_path, stdout=out)
+            with open(errors_path, newline='') as f:
+                errors = [(int(line), message) for line, message in list(csv.reader(f))[1:]]
+        self.assertEqual(errors, self.expected_errors)
+        self.assertEqual(out.getvalue().count('Processed'), 5)
+        self.assertIn('Imported 9 rows: 5 added, 0 updated, 4 rejected.', out.getvalue())
+        self.assert_rows_written()
+
+    def test_chunk_boundary_and_reimport(self):
+        lines = SCORE_CSV.splitlines(keepends=True)
+        progress = []
+        # 9 rows in chunks of 3: exactly three full chunks
+        result = ScoreImporter(chunk_size=3).run(lines, progress=lambda r: progress.append(r.rows))
+        self.assertEqual(progress, [3, 6, 9])
+        self.assertEqual(result.errors, self.expected_errors)
+        self.assert_rows_written()
+
+        # Scores are upserted again; the unchanged attendance mark is not rewritten
+        again = ScoreImporter(chunk_size=3).run(lines)
+        self.assertEqual((again.inserted, again.updated), (0, 4))
+
+    def test_view_imports_an_upload(self):
+        self.client.force_login(User.objects.create_user('principal', role='admin', is_admin=True))
+        upload = SimpleUploadedFile('scores.csv', SCORE_CSV.encode('utf-8-sig'), content_type='text/csv')
+        response = self.client.post(reverse('import_scores'), {'file': upload, 'chunk_size': '4'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['errors'], self.expected_errors)
+        self.assertEqual(response.context['result'].rows, 9)
+        self.assert_rows_written()
+
+        response = self.client.post(reverse('import_scores'), {
+            'file': SimpleUploadedFile('bad.csv', b'student_id,score\n1,2\n'),
+        })
+        self.assertIn('missing column', response.context['error'])
@@ -69,8 +69,11 @@ path('academic_setup/grading/delete/<int:pk>/', views.delete_grading, name='dele
     path('assign_subject/delete/<int:pk>/', views.delete_assigned_subject, name='delete_assigned_subject'),
     path('score/', views.score, name='score'),
     path('score/pdf/<int:student_id>/', views.generate_grade_pdf, name='generate_grade_pdf'),
+    path('score/pdf/report-cards/', views.generate_report_cards, name='generate_report_cards'),
     path('score/predict/<int:student_id>/<int:subject_id>/', views.predict_student_performance, name='predict_student_performance'),
     path('score/at-risk/', views.get_at_risk_students, name='at_risk_students'),
+    path('score/import/', views.import_scores, name='import_scores'),
+    path('score/export/', views.export_gradebook, name='export_gradebook'),
     path('score/edit/quiz/<int:student_id>/<int:subject_id>/', views.edit_quiz_scores, name='edit_quiz_scores'),
     path('score/edit/exam/<int:student_id>/<int:subject_id>/', views.edit_exam_scores, name='edit_exam_scores'),
     path('score/edit/project/<int:student_id>/<int:subject_id>/', views.edit_project_scores, name='edit_project_scores'),
@@ -94,6 +97,9 @@ path('academic_setup/grading/delete/<int:pk>/', views.delete_grading, name='dele
     # API endpoints
     path('api/sections/', views.get_sections_by_grade, name='get_sections_by_grade'),
     path('api/subject-assigned/', views.api_subject_assigned, name='api_subject_assigned'),
+    path('api/attendance/weeks/', views.api_create_attendance_weeks, name='api_create_attendance_weeks'),
+    path('api/scores/cells/', views.api_update_score_cells, name='api_update_score_cells'),
+    path('api/students/search/', views.api_student_search, name='api_student_search'),
 
 
 
@@ -4,11 +4,16 @@ from django.contrib.auth import authenticate, login, get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.contrib.messages import success
+from django.db import transaction
 from django.db.models import Q, Avg
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.text import slugify
 from datetime import datetime, timedelta
+import io
+import json
 from io import BytesIO
 from types import SimpleNamespace
 
@@ -17,9 +22,22 @@ from .models import (
     User, Student, Faculty, Subject, AuditTrail, SchoolYear, Section,
     FacultyAssignment, GradingComponent, StudentRecord, QuizScore, ExamScore,
     ProjectScore, AssignedSubject, WeeklyAttendanceSession, WeeklyAttendanceRecord,
-    MLPredictionStatus, Score
+    MLPredictionStatus, Score, StudentSubjectSummary, ATTENDANCE_SESSION_FIELDS, grade_section_q, section_name_q
 )
 
+from .gradebook import GradeBook, performance_category
+from .gradecube import GradeCube
+from .grading import get_grading_policy
+from .dashboard import dashboard_context, get_snapshot
+from .scope import get_faculty_scope
+from .search import search_students
+from .scoregrid import ATTENDANCE_GRID, EXAM_GRID, PROJECT_GRID, QUIZ_GRID, filter_grade_level, subject_students
+from .attendance import ATTENDANCE_MARKS, CLEAR_MARK, MAX_WEEKS, create_weeks, parse_marks, save_marks, term_weeks
+from .exports import GradebookExport, gradebook_students
+from .reportcards import REPORT_CARD_CACHE, render_merged, report_cards, scope_students, zip_report_cards
+from .importer import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, REQUIRED_COLUMNS, ScoreImporter
+from .scorewriter import EXAM_WRITER, PROJECT_WRITER, QUIZ_WRITER, ScoreWriteResult, write_cells
+
 # Form imports
 from .forms import (
     LoginForm, UserForm, StudentForm, FacultyForm, SchoolYearForm, SubjectForm,
@@ -49,53 +67,15 @@ except ImportError:
 
 
 def _find_advised_sections_for_user(user):
-    """Return (is_adviser, queryset) trying several stored formats for Section.adviser.
-    Section.adviser is a CharField in this project and may contain username, fullname,
-    email, or a stringified id. Try common variants to improve detection.
-    """
-    from django.db.models import Q
-    try:
-        # candidate strings to match against adviser field
-        candidates = set()
-        try:
-            candidates.add(str(user.username))
-        except Exception:
-            pass
-        try:
-            full = f"{user.first_name} {user.last_name}".strip()
-            if full:
-                candidates.add(full)
-        except Exception:
-            pass
-        try:
-            candidates.add(str(user))
-        except Exception:
-            pass
-        try:
-            if getattr(user, 'email', None):
-                candidates.add(user.email)
-        except Exception:
-            pass
-        try:
-            candidates.add(str(getattr(user, 'id', '')))
-        except Exception:
-            pass
+    """Return (is_adviser, sections) for the sections whose adviser is `user`.
 
-        # build Q query for case-insensitive exact matches and contains as fallback
-        q = Q()
-        for c in candidates:
-            if not c:
-                continue
-            q |= Q(adviser__iexact=c)
-            q |= Q(adviser__icontains=c)
-
-        if q:
-            qs = Section.objects.filter(q)
-            if qs.exists():
-                return True, qs
-    except Exception:
-        pass
-    return False, Section.objects.none()
+    Section.adviser_user is resolved from the free-text adviser label when a
+    section is saved (see sync_section_adviser in models.py).
+    """
+    if not user.is_authenticated:
+        return False, []
+    sections = list(Section.objects.filter(adviser_user=user))
+    return bool(sections), sections
 
 
 
@@ -168,6 +148,15 @@ def api_subject_assigned(request):
 def student(request):
     return render(request,'student.html')
 
+def _student_record_for_user(user):
+    """The StudentRecord linked to a student account, or None.
+
+    Read-only: accounts are linked when they are created (see add, edit,
+    add_user and the roster import) and existing ones by migrations 0033
+    and 0036.
+    """
+    return StudentRecord.objects.filter(user=user).first()
+
 @login_required
 def student_dashboard(request):
     """Student dashboard showing only their own information"""
@@ -175,33 +164,7 @@ def student_dashboard(request):
         messages.error(request, 'Access denied. This page is for students only.')
         return redirect('adminpage' if request.user.role == 'admin' else 'faculty')
 
-    # Try to find student record by matching User's name to StudentRecord's fullname
-    student_record = None
-    try:
-        # First, try to match by fullname (most reliable)
-        user_fullname = f"{request.user.first_name} {request.user.last_name}".strip()
-        if user_fullname:
-            student_record = StudentRecord.objects.filter(
-                fullname__iexact=user_fullname
-            ).first()
-
-        # If not found, try matching by username as student_id (if numeric)
-        if not student_record:
-            try:
-                student_id = int(request.user.username)
-                student_record = StudentRecord.objects.filter(
-                    student_id=student_id
-                ).first()
-            except (ValueError, TypeError):
-                pass
-
-        # Last resort: try partial name match
-        if not student_record and user_fullname:
-            student_record = StudentRecord.objects.filter(
-                fullname__icontains=request.user.first_name
-            ).first()
-    except Exception as e:
-        pass
+    student_record = _student_record_for_user(request.user)
 
     if not student_record:
         messages.warning(request, 'Student record not found. Please contact administrator.')
@@ -211,91 +174,22 @@ def student_dashboard(request):
             'tab': 'student'
         })
 
-    # Get all subjects with scores for this student
-    subjects_with_scores = Subject.objects.filter(
-        Q(quiz_scores__student=student_record) |
-        Q(exam_scores__student=student_record) |
-        Q(project_scores__student=student_record) |
-        Q(attendance_sessions__attendance_records__student=student_record)
-    ).distinct().order_by('name')
+    # Precomputed averages for every subject this student has scores in
+    summaries = StudentSubjectSummary.objects.filter(
+        student=student_record
+    ).select_related('subject').order_by('subject__name', 'subject_id')
 
-    # Calculate averages per subject
     student_subjects = []
-    for subject in subjects_with_scores:
-        # Calculate quiz average
-        quiz_scores = QuizScore.objects.filter(student=student_record, subject=subject)
-        avg_quiz = None
-        if quiz_scores.exists():
-            scores = [float(qs.score) for qs in quiz_scores]
-            avg_quiz = sum(scores) / len(scores) if scores else None
-
-        # Calculate exam average
-        exam_scores = ExamScore.objects.filter(student=student_record, subject=subject)
-        avg_exam = None
-        if exam_scores.exists():
-            scores = [float(es.score) for es in exam_scores]
-            avg_exam = sum(scores) / len(scores) if scores else None
-
-        # Calculate project average
-        project_scores = ProjectScore.objects.filter(student=student_record, subject=subject)
-        avg_project = None
-        if project_scores.exists():
-            scores = [float(ps.score) for ps in project_scores]
-            avg_project = sum(scores) / len(scores) if scores else None
-
-        # Calculate attendance
-        attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-        avg_attendance = None
-        if attendance_sessions.exists():
-            overall_present = 0
-            overall_total = 0
-            for session in attendance_sessions:
-                try:
-                    record = WeeklyAttendanceRecord.objects.get(session=session, student=student_record)
-                    summary = record.get_attendance_summary()
-                    sessions_list = summary.split(',')
-                    present_count = sum(1 for s in sessions_list if s == 'P')
-                    total_count = len([s for s in sessions_list if s != '-'])
-                    overall_present += present_count
-                    overall_total += total_count
-                except WeeklyAttendanceRecord.DoesNotExist:
-                    continue
-            if overall_total > 0:
-                avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-        # Calculate grade from available scores (no need for all)
-        available_scores = []
-        if avg_quiz is not None:
-            available_scores.append(avg_quiz)
-        if avg_exam is not None:
-            available_scores.append(avg_exam)
-        if avg_project is not None:
-            available_scores.append(avg_project)
-        if avg_attendance is not None:
-            available_scores.append(avg_attendance)
-
-        grade = None
-        performance_category = None
-        if available_scores:
-            grade = sum(available_scores) / len(available_scores)
-            # Categorize: <70 = At Risk, 70-79 = Average, 80-89 = Good, 90+ = Excellent
-            if grade >= 90:
-                performance_category = 'Excellent'
-            elif grade >= 80:
-                performance_category = 'Good'
-            elif grade >= 70:
-                performance_category = 'Average'
-            else:
-                performance_category = 'At Risk'
-
+    for summary in summaries:
         student_subjects.append({
-            'subject': subject,
-            'quiz_average': avg_quiz,
-            'exam_average': avg_exam,
-            'project_average': avg_project,
-            'attendance_average': avg_attendance,
-            'grade': grade,
-            'performance_category': performance_category,
+            'subject': summary.subject,
+            'quiz_average': summary.quiz_average,
+            'exam_average': summary.exam_average,
+            'project_average': summary.project_average,
+            'attendance_average': summary.attendance_average,
+            # Grade from available scores (no need for all)
+            'grade': summary.grade,
+            'performance_category': summary.category,
         })
 
     return render(request, 'student_dashboard.html', {
@@ -311,77 +205,26 @@ def student_scores(request):
         messages.error(request, 'Access denied.')
         return redirect('adminpage' if request.user.role == 'admin' else 'faculty')
 
-    # Same logic as student_dashboard
-    student_record = None
-    try:
-        student_record = StudentRecord.objects.filter(student_id=request.user.username).first()
-        if not student_record:
-            student_record = StudentRecord.objects.filter(fullname__icontains=request.user.username).first()
-    except:
-        pass
+    student_record = _student_record_for_user(request.user)
 
     if not student_record:
         messages.warning(request, 'Student record not found.')
         return redirect('student_dashboard')
 
     # Get subjects with scores
-    subjects_with_scores = Subject.objects.filter(
-        Q(quiz_scores__student=student_record) |
-        Q(exam_scores__student=student_record) |
-        Q(project_scores__student=student_record) |
-        Q(attendance_sessions__attendance_records__student=student_record)
-    ).distinct().order_by('name')
+    summaries = StudentSubjectSummary.objects.filter(
+        student=student_record
+    ).select_related('subject').order_by('subject__name', 'subject_id')
 
     student_subjects = []
-    for subject in subjects_with_scores:
-        quiz_scores = QuizScore.objects.filter(student=student_record, subject=subject)
-        avg_quiz = None
-        if quiz_scores.exists():
-            scores = [float(qs.score) for qs in quiz_scores]
-            avg_quiz = sum(scores) / len(scores) if scores else None
-
-        exam_scores = ExamScore.objects.filter(student=student_record, subject=subject)
-        avg_exam = None
-        if exam_scores.exists():
-            scores = [float(es.score) for es in exam_scores]
-            avg_exam = sum(scores) / len(scores) if scores else None
-
-        project_scores = ProjectScore.objects.filter(student=student_record, subject=subject)
-        avg_project = None
-        if project_scores.exists():
-            scores = [float(ps.score) for ps in project_scores]
-            avg_project = sum(scores) / len(scores) if scores else None
-
-        attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-        avg_attendance = None
-        if attendance_sessions.exists():
-            overall_present = 0
-            overall_total = 0
-            for session in attendance_sessions:
-                try:
-                    record = WeeklyAttendanceRecord.objects.get(session=session, student=student_record)
-                    summary = record.get_attendance_summary()
-                    sessions_list = summary.split(',')
-                    present_count = sum(1 for s in sessions_list if s == 'P')
-                    total_count = len([s for s in sessions_list if s != '-'])
-                    overall_present += present_count
-                    overall_total += total_count
-                except WeeklyAttendanceRecord.DoesNotExist:
-                    continue
-            if overall_total > 0:
-                avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-        grade = None
-        if avg_quiz is not None and avg_exam is not None and avg_project is not None and avg_attendance is not None:
-            grade = (avg_quiz + avg_exam + avg_project + avg_attendance) / 4
-
+    for summary in summaries:
         student_subjects.append({
-            'subject': subject,
-            'quiz_average': avg_quiz,
-            'exam_average': avg_exam,
-            'project_average': avg_project,
-            'attendance_average': avg_attendance,
-            'grade': grade,
+            'subject': summary.subject,
+            'quiz_average': summary.quiz_average,
+            'exam_average': summary.exam_average,
+            'project_average': summary.project_average,
+            'attendance_average': summary.attendance_average,
+            'grade': summary.compute_grade(require_all=True),
         })
 
     return render(request, 'student_scores.html', {
@@ -399,39 +242,17 @@ def faculty(request):
         return redirect('adminpage' if request.user.role == 'admin' else 'student_dashboard')
 
     # Get assigned subjects for this faculty
-    assignments = FacultyAssignment.objects.filter(
-        faculty=request.user,
-        status='Active'
-    )
-    assigned_subjects = []
-    assigned_subject_ids = []
-    for assignment in assignments:
-        assigned_subjects.extend(assignment.subjects.all())
-        assigned_subject_ids.extend(assignment.subjects.values_list('id', flat=True))
-    assigned_subjects = list(set(assigned_subjects))  # Remove duplicates
-    assigned_subject_ids = list(set(assigned_subject_ids))
+    scope = get_faculty_scope(request.user)
+    assigned_subjects = list(scope.subjects())
 
     # Adviser sections: use robust helper to detect sections advised by this user
     is_adviser, advised_sections = _find_advised_sections_for_user(request.user)
 
     # Filter students by grade level of assigned subjects
-    if assigned_subject_ids:
-        assigned_subjects_objs = Subject.objects.filter(id__in=assigned_subject_ids)
-        assigned_grade_levels = AssignedSubject.objects.filter(
-            subject__in=assigned_subjects_objs,
-            status='Active'
-        ).values_list('grade_level', flat=True).distinct()
-
-        # Filter students whose grade_and_section starts with any assigned grade level
-        all_students = StudentRecord.objects.filter(status='active')
-        filtered_student_ids = []
-        for student in all_students:
-            if student.grade_and_section:
-                # Extract grade level from grade_and_section (format: "Grade 7 - A" or just "Grade 7")
-                student_grade = student.grade_and_section.split(' - ')[0].strip()
-                if student_grade in assigned_grade_levels:
-                    filtered_student_ids.append(student.id)
-        student_records = StudentRecord.objects.filter(id__in=filtered_student_ids).order_by('fullname')
+    if scope:
+        student_records = scope.students(
+            StudentRecord.objects.filter(status='active')
+        ).order_by('fullname')
     else:
         # No assigned subjects - show empty
         student_records = StudentRecord.objects.none()
@@ -451,125 +272,12 @@ def faculty(request):
 
 @login_required
 def admin_dashboard(request):
-    # Count users by role
-    total_admins = User.objects.filter(role='admin').count()
-    total_faculty = User.objects.filter(role='faculty').count()
-    total_students = User.objects.filter(role='student').count()
-    total_student_records = StudentRecord.objects.count()
+    # Role totals and grade distribution come from the cached snapshot
+    context = dashboard_context(get_snapshot())
 
     # Get active school year
-    active_school_year = "2025-2026"  # Replace with dynamic model if you have one
+    context['active_school_year'] = "2025-2026"  # Replace with dynamic model if you have one
 
-    # Get grade distribution for visualization - count unique students
-    at_risk_students = set()
-    excellent_students = set()
-    good_students = set()
-    average_students = set()
-
-    # Process all active students
-    for student in StudentRecord.objects.filter(status='active'):
-        subjects_with_scores = Subject.objects.filter(
-            Q(quiz_scores__student=student) |
-            Q(exam_scores__student=student) |
-            Q(project_scores__student=student) |
-            Q(attendance_sessions__attendance_records__student=student)
-        ).distinct()
-
-        # Track student's worst grade across all subjects
-        student_worst_grade = None
-        student_best_grade = None
-
-        for subject in subjects_with_scores:
-            quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-            exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-            project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-            attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-
-            avg_quiz = None
-            if quiz_scores.exists():
-                scores = [float(qs.score) for qs in quiz_scores]
-                avg_quiz = sum(scores) / len(scores) if scores else None
-
-            avg_exam = None
-            if exam_scores.exists():
-                scores = [float(es.score) for es in exam_scores]
-                avg_exam = sum(scores) / len(scores) if scores else None
-
-            avg_project = None
-            if project_scores.exists():
-                scores = [float(ps.score) for ps in project_scores]
-                avg_project = sum(scores) / len(scores) if scores else None
-
-            avg_attendance = None
-            if attendance_sessions.exists():
-                overall_present = 0
-                overall_total = 0
-                for session in attendance_sessions:
-                    try:
-                        record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                        summary = record.get_attendance_summary()
-                        sessions_list = summary.split(',')
-                        present_count = sum(1 for s in sessions_list if s == 'P')
-                        total_count = len([s for s in sessions_list if s != '-'])
-                        overall_present += present_count
-                        overall_total += total_count
-                    except WeeklyAttendanceRecord.DoesNotExist:
-                        continue
-                if overall_total > 0:
-                    avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-            # Calculate grade from available scores
-            available_scores = []
-            if avg_quiz is not None:
-                available_scores.append(avg_quiz)
-            if avg_exam is not None:
-                available_scores.append(avg_exam)
-            if avg_project is not None:
-                available_scores.append(avg_project)
-            if avg_attendance is not None:
-                available_scores.append(avg_attendance)
-
-            if available_scores:
-                grade = sum(available_scores) / len(available_scores)
-                if student_worst_grade is None or grade < student_worst_grade:
-                    student_worst_grade = grade
-                if student_best_grade is None or grade > student_best_grade:
-                    student_best_grade = grade
-
-        # Categorize student based on worst grade (if they have any at-risk subject, they're at risk)
-        if student_worst_grade is not None:
-            if student_worst_grade < 70:
-                at_risk_students.add(student.id)
-            elif student_best_grade >= 90:
-                excellent_students.add(student.id)
-            elif student_best_grade >= 80:
-                good_students.add(student.id)
-            elif student_best_grade >= 70:
-                average_students.add(student.id)
-
-    # Calculate counts (unique students)
-    excellent = len(excellent_students)
-    good = len(good_students)
-    average = len(average_students)
-    at_risk = len(at_risk_students)
-
-    context = {
-        'total_admins': total_admins,
-        'total_faculty': total_faculty,
-        'total_students': total_students,
-        'total_student_records': total_student_records,
-        'active_school_year': active_school_year,
-        'excellent_count': excellent,
-        'good_count': good,
-        'average_count': average,
-        'at_risk_count': at_risk,
-        'grade_distribution': {
-            'Excellent (90+)': excellent,
-            'Good (80-89)': good,
-            'Average (70-79)': average,
-            'At Risk (<70)': at_risk,
-        }
-    }
     return render(request, 'admin.html', context)
 
 def faculty_dashboard(request):
@@ -638,33 +346,23 @@ def manage_user(request):
         students_list = students
     else:
         # Build list of SimpleNamespace objects matching fields used in template
-        records = StudentRecord.objects.all()
-        if search:
-            records = records.filter(fullname__icontains=search)
+        records = search_students(StudentRecord.objects.all(), search)
         if gender_filter:
             try:
                 records = records.filter(gender=gender_filter)
             except Exception:
                 pass
-        # filter by grade using grade_and_section field if provided
+        # filter by grade using the grade_level column if provided
         if grade_filter:
-            # normalize grade prefix to match format stored in grade_and_section
-            if grade_filter.isdigit():
-                grade_prefix = f"Grade {grade_filter}"
-            elif grade_filter.lower().startswith('grade'):
+            # normalize to the "Grade 7" form stored in grade_level
+            if grade_filter.lower().startswith('grade'):
                 grade_prefix = grade_filter
             else:
                 grade_prefix = f"Grade {grade_filter}"
-            try:
-                records = records.filter(grade_and_section__istartswith=grade_prefix)
-            except Exception:
-                pass
-        # optional section filter (exact match after the dash)
+            records = records.filter(grade_section_q(grade_prefix))
+        # optional section filter (exact section name)
         if section_filter:
-            try:
-                records = records.filter(grade_and_section__icontains=f"- {section_filter}")
-            except Exception:
-                pass
+            records = records.filter(section_name_q(section_filter))
         tmp = []
         for r in records:
             # user-like object with get_full_name and email attributes expected by template
@@ -817,7 +515,9 @@ def add_user(request, role):
                     address=form.cleaned_data['address'],
                     parent=form.cleaned_data['parent'],
                     parent_contact=form.cleaned_data['parent_contact'],
-                    status=form.cleaned_data['status']
+                    status=form.cleaned_data['status'],
+                    user=user,
+                    account_username=user.username,
                 )
 
                 messages.success(request, f'Student account and record created successfully for {full_name}!')
@@ -1126,7 +826,7 @@ def academic_setup(request):
                         messages.warning(request, f"Component saved. Total active weight is {total_after}%.")
                     return redirect('academic_setup')
             else:
-                messages.error(request, "Invalid grading component data.")
+                messages.error(request, "Invalid grading component data: " + " ".join(e for errors in form.errors.values() for e in errors))
         else:
             messages.error(request, "Unknown action.")
     else:
@@ -1447,7 +1147,7 @@ def academic_setup(request):
                         messages.warning(request, f"Component saved. Total active weight is {total_after}%.")
                     return redirect('academic_setup')
             else:
-                messages.error(request, "Invalid grading component data.")
+                messages.error(request, "Invalid grading component data: " + " ".join(e for errors in form.errors.values() for e in errors))
         else:
             messages.error(request, "Unknown action.")
     else:
@@ -1499,6 +1199,7 @@ def academic_setup(request):
         'faculties': faculties,
         'subjects_qs': subjects_qs,
         'search': search,
+        'grading_weights': get_grading_policy().as_dict(),
     }
     return render(request, 'academic_setup.html', context)
 
@@ -1600,10 +1301,16 @@ def edit_faculty(request, pk):
 def edit_grading(request, pk):
     obj = get_object_or_404(GradingComponent, pk=pk)
     if request.method == 'POST':
-        obj.component = request.POST.get('component')
-        obj.weight = float(request.POST.get('weight', 0))
-        obj.status = request.POST.get('status', 'Active')
-        obj.save()
+        data = request.POST.copy()
+        data.setdefault('status', 'Active')
+        form = GradingComponentForm(data, instance=obj)
+        if not form.is_valid():
+            message = ' '.join(error for errors in form.errors.values() for error in errors)
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({'success': False, 'message': message}, status=400)
+            messages.error(request, message)
+            return redirect('/academic_setup/?tab=grading')
+        form.save()
         messages.success(request, "Grading Component updated!")
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'message': 'Grading Component updated!'})
@@ -1683,11 +1390,12 @@ def delete_score_type(request, score_type, student_id, subject_id):
             messages.success(request, f'Attendance records deleted for {student.fullname} in {subject.name}.')
         elif st == 'all':
             # reuse delete_student_scores logic inline
-            QuizScore.objects.filter(student=student, subject=subject).delete()
-            ExamScore.objects.filter(student=student, subject=subject).delete()
-            ProjectScore.objects.filter(student=student, subject=subject).delete()
-            sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-            WeeklyAttendanceRecord.objects.filter(session__in=sessions, student=student).delete()
+            with transaction.atomic():
+                QuizScore.objects.filter(student=student, subject=subject).delete()
+                ExamScore.objects.filter(student=student, subject=subject).delete()
+                ProjectScore.objects.filter(student=student, subject=subject).delete()
+                sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
+                WeeklyAttendanceRecord.objects.filter(session__in=sessions, student=student).delete()
             messages.success(request, f'All scores & attendance deleted for {student.fullname} in {subject.name}.')
         else:
             messages.error(request, f'Unknown score type: {score_type}')
@@ -1839,51 +1547,20 @@ def record(request):
 
     # If adviser, restrict accounts to students in advised sections
     if is_adviser and advised_sections:
-        advised_ids = []
-        for sec in advised_sections:
-            # match grade_and_section like "Grade 7 - A" or similar
-            try:
-                matched = StudentRecord.objects.filter(grade_and_section__icontains=f"{sec.grade} - {sec.name}")
-            except Exception:
-                matched = StudentRecord.objects.none()
-            advised_ids.extend(list(matched.values_list('id', flat=True)))
-        accounts_qs = accounts_qs.filter(id__in=list(set(advised_ids)))
+        accounts_qs = accounts_qs.filter(section__adviser_user=request.user)
     else:
         # Not an adviser: try to scope by assigned subjects for faculty users
         try:
-            assignments = FacultyAssignment.objects.filter(faculty=request.user, status='Active')
-            assigned_subject_ids = []
-            for assignment in assignments:
-                assigned_subject_ids.extend(assignment.subjects.values_list('id', flat=True))
-            assigned_subject_ids = list(set(assigned_subject_ids))
-            if assigned_subject_ids:
-                assigned_subjects_objs = Subject.objects.filter(id__in=assigned_subject_ids)
-                assigned_grade_levels = AssignedSubject.objects.filter(
-                    subject__in=assigned_subjects_objs,
-                    status='Active'
-                ).values_list('grade_level', flat=True).distinct()
-
-                # Build list of matching student IDs whose grade prefix matches assigned grade levels
-                filtered_ids = []
-                for student in accounts_qs:
-                    if student.grade_and_section:
-                        student_grade = student.grade_and_section.split(' - ')[0].strip()
-                        if student_grade in assigned_grade_levels:
-                            filtered_ids.append(student.id)
-                accounts_qs = accounts_qs.filter(id__in=filtered_ids)
+            scope = get_faculty_scope(request.user)
+            if scope:
+                accounts_qs = scope.students(accounts_qs)
         except Exception:
             # leave accounts_qs as-is if something goes wrong
             pass
 
-    # If search provided, further filter accounts_qs by fullname or student_id
+    # If search provided, further filter accounts_qs by name, student_id or parent
     if search:
-        try:
-            if search.isdigit():
-                accounts_qs = accounts_qs.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-            else:
-                accounts_qs = accounts_qs.filter(fullname__icontains=search)
-        except Exception:
-            pass
+        accounts_qs = search_students(accounts_qs, search)
 
     # Pagination
     page = request.GET.get('page', 1)
@@ -1996,13 +1673,8 @@ def add(request):
                             course='N/A',
                             status=new_status
                         )
-                        # Persist the account username on the StudentRecord so edits can prefill the username
-                        try:
-                            new_student.account_username = username
-                            new_student.save()
-                        except Exception:
-                            # non-fatal; continue even if this fails (migration may not have been applied yet)
-                            pass
+                        # Link the account so the student pages and the edit modal find it directly
+                        new_student.link_account(user)
 
                         messages.success(request, f'Student record and account created successfully for {new_fullname}!')
             else:
@@ -2082,6 +1754,9 @@ def edit(request, id):
                             messages.success(request, f'Account updated for {student.fullname}')
                         else:
                             messages.info(request, f'Account for username {username} already exists. Password left unchanged.')
+                        if existing_user.role == 'student' and student.user_id != existing_user.pk:
+                            if not student.link_account(existing_user):
+                                messages.warning(request, f'Account {username} is already linked to another student record.')
                     else:
                         # Create new user
                         if not password:
@@ -2118,6 +1793,7 @@ def edit(request, id):
                                 course='N/A',
                                 status=student.status
                             )
+                            student.link_account(user)
                             messages.success(request, f'Account created for {student.fullname}')
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'message': 'Student record updated successfully!'})
@@ -2177,8 +1853,11 @@ def edit(request, id):
     existing_username = ''
     account_exists = False
     try:
-        # Most reliable source: the StudentRecord.account_username field (persisted at creation)
-        if getattr(student, 'account_username', None):
+        # Most reliable source: the linked account, then the persisted account_username
+        if student.user_id:
+            existing_username = student.user.username
+            account_exists = True
+        elif getattr(student, 'account_username', None):
             existing_username = student.account_username
             account_exists = User.objects.filter(username=existing_username).exists()
         else:
@@ -2357,103 +2036,14 @@ def quiz(request):
     ).distinct().order_by('name')
     # If faculty, limit subjects to those assigned to this faculty
     if request.user.role == 'faculty':
-        fac_assignments = FacultyAssignment.objects.filter(faculty=request.user, status='Active')
-        fac_subject_ids = []
-        for a in fac_assignments:
-            fac_subject_ids.extend(list(a.subjects.values_list('id', flat=True)))
-        if fac_subject_ids:
-            subjects_with_quizzes = subjects_with_quizzes.filter(id__in=set(fac_subject_ids))
+        scope = get_faculty_scope(request.user)
+        if scope:
+            subjects_with_quizzes = subjects_with_quizzes.filter(id__in=scope.subject_ids)
         else:
             subjects_with_quizzes = Subject.objects.none()
 
-    # Get quiz data grouped by subject and student
-    quiz_data = []
-    for subject in subjects_with_quizzes:
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                # If assigned grade contains a section (e.g. 'Grade 7 - A'), match exact;
-                # otherwise match records whose grade_and_section starts with the grade (e.g. 'Grade 7').
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            # apply global search if provided
-            if search:
-                try:
-                    if search.isdigit():
-                        students_qs = students_qs.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                    else:
-                        students_qs = students_qs.filter(fullname__icontains=search)
-                except Exception:
-                    pass
-            students = students_qs.order_by('fullname')
-        else:
-            # If no assignment, show all active students (fallback)
-            students = StudentRecord.objects.filter(status='active').order_by('fullname')
-            if search:
-                try:
-                    if search.isdigit():
-                        students = students.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                    else:
-                        students = students.filter(fullname__icontains=search)
-                except Exception:
-                    pass
-
-        quiz_numbers = QuizScore.objects.filter(subject=subject).values_list('quiz_number', flat=True).distinct().order_by('quiz_number')
-        quiz_numbers_list = list(quiz_numbers)
-
-        student_rows = []
-        for student in students:
-            student_scores = []
-            total_score = 0
-            count = 0
-
-            for quiz_num in quiz_numbers_list:
-                try:
-                    quiz_score = QuizScore.objects.get(
-                        student=student,
-                        subject=subject,
-                        quiz_number=quiz_num
-                    )
-                    score_val = float(quiz_score.score)
-                    student_scores.append(score_val)
-                    total_score += score_val
-                    count += 1
-                except QuizScore.DoesNotExist:
-                    student_scores.append(None)
-
-            # Calculate average
-            average = (total_score / count) if count > 0 else None
-
-            student_rows.append({
-                'student': student,
-                'scores': student_scores,
-                'average': average
-            })
-
-        quiz_data.append({
-            'subject': subject,
-            'quiz_numbers': quiz_numbers_list,
-            'student_rows': student_rows
-        })
-
-    # Pagination - paginate by subjects (each subject is a section)
-    page = request.GET.get('page', 1)
-    per_page = 5  # Show 5 subjects per page to avoid screen overflow
-    paginator = Paginator(quiz_data, per_page)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    # Only the subjects on the requested page are loaded (5 per page)
+    page_obj = QUIZ_GRID.page(subjects_with_quizzes, request.GET.get('page', 1), search)
 
     return render(request, 'quiz.html', {
         'quiz_data': page_obj,
@@ -2470,84 +2060,14 @@ def exam(request):
     ).distinct().order_by('name')
     # Restrict to faculty-assigned subjects when faculty user
     if request.user.role == 'faculty':
-        fac_assignments = FacultyAssignment.objects.filter(faculty=request.user, status='Active')
-        fac_subject_ids = []
-        for a in fac_assignments:
-            fac_subject_ids.extend(list(a.subjects.values_list('id', flat=True)))
-        if fac_subject_ids:
-            subjects_with_exams = subjects_with_exams.filter(id__in=set(fac_subject_ids))
+        scope = get_faculty_scope(request.user)
+        if scope:
+            subjects_with_exams = subjects_with_exams.filter(id__in=scope.subject_ids)
         else:
             subjects_with_exams = Subject.objects.none()
 
-    # Get exam data grouped by subject and student
-    exam_data = []
-    for subject in subjects_with_exams:
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs.order_by('fullname')
-        else:
-            # If no assignment, show all active students (fallback)
-            students = StudentRecord.objects.filter(status='active').order_by('fullname')
-
-        exam_numbers = ExamScore.objects.filter(subject=subject).values_list('exam_number', flat=True).distinct().order_by('exam_number')
-        exam_numbers_list = list(exam_numbers)
-
-        student_rows = []
-        for student in students:
-            student_scores = []
-            total_score = 0
-            count = 0
-
-            for exam_num in exam_numbers_list:
-                try:
-                    exam_score = ExamScore.objects.get(
-                        student=student,
-                        subject=subject,
-                        exam_number=exam_num
-                    )
-                    score_val = float(exam_score.score)
-                    student_scores.append(score_val)
-                    total_score += score_val
-                    count += 1
-                except ExamScore.DoesNotExist:
-                    student_scores.append(None)
-
-            # Calculate average
-            average = (total_score / count) if count > 0 else None
-
-            student_rows.append({
-                'student': student,
-                'scores': student_scores,
-                'average': average
-            })
-
-        exam_data.append({
-            'subject': subject,
-            'exam_numbers': exam_numbers_list,
-            'student_rows': student_rows
-        })
-
-    # Pagination - paginate by subjects (each subject is a section)
-    page = request.GET.get('page', 1)
-    per_page = 5  # Show 5 subjects per page to avoid screen overflow
-    paginator = Paginator(exam_data, per_page)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    # Only the subjects on the requested page are loaded (5 per page)
+    page_obj = EXAM_GRID.page(subjects_with_exams, request.GET.get('page', 1), search)
 
     return render(request, 'exam.html', {
         'exam_data': page_obj if page_obj else [],
@@ -2564,84 +2084,14 @@ def project(request):
     ).distinct().order_by('name')
     # If faculty, narrow to assigned subjects
     if request.user.role == 'faculty':
-        fac_assignments = FacultyAssignment.objects.filter(faculty=request.user, status='Active')
-        fac_subject_ids = []
-        for a in fac_assignments:
-            fac_subject_ids.extend(list(a.subjects.values_list('id', flat=True)))
-        if fac_subject_ids:
-            subjects_with_projects = subjects_with_projects.filter(id__in=set(fac_subject_ids))
+        scope = get_faculty_scope(request.user)
+        if scope:
+            subjects_with_projects = subjects_with_projects.filter(id__in=scope.subject_ids)
         else:
             subjects_with_projects = Subject.objects.none()
 
-    # Get project data grouped by subject and student
-    project_data = []
-    for subject in subjects_with_projects:
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs.order_by('fullname')
-        else:
-            # If no assignment, show all active students (fallback)
-            students = StudentRecord.objects.filter(status='active').order_by('fullname')
-
-        project_numbers = ProjectScore.objects.filter(subject=subject).values_list('project_number', flat=True).distinct().order_by('project_number')
-        project_numbers_list = list(project_numbers)
-
-        student_rows = []
-        for student in students:
-            student_scores = []
-            total_score = 0
-            count = 0
-
-            for project_num in project_numbers_list:
-                try:
-                    project_score = ProjectScore.objects.get(
-                        student=student,
-                        subject=subject,
-                        project_number=project_num
-                    )
-                    score_val = float(project_score.score)
-                    student_scores.append(score_val)
-                    total_score += score_val
-                    count += 1
-                except ProjectScore.DoesNotExist:
-                    student_scores.append(None)
-
-            # Calculate average
-            average = (total_score / count) if count > 0 else None
-
-            student_rows.append({
-                'student': student,
-                'scores': student_scores,
-                'average': average
-            })
-
-        project_data.append({
-            'subject': subject,
-            'project_numbers': project_numbers_list,
-            'student_rows': student_rows
-        })
-
-    # Pagination - paginate by subjects (each subject is a section)
-    page = request.GET.get('page', 1)
-    per_page = 5  # Show 5 subjects per page to avoid screen overflow
-    paginator = Paginator(project_data, per_page)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    # Only the subjects on the requested page are loaded (5 per page)
+    page_obj = PROJECT_GRID.page(subjects_with_projects, request.GET.get('page', 1), search)
 
     return render(request, 'project.html', {
         'project_data': page_obj if page_obj else [],
@@ -2657,101 +2107,14 @@ def attendance(request):
     ).distinct().order_by('name')
     # Restrict attendance subjects to faculty's assigned subjects when faculty
     if request.user.role == 'faculty':
-        fac_assignments = FacultyAssignment.objects.filter(faculty=request.user, status='Active')
-        fac_subject_ids = []
-        for a in fac_assignments:
-            fac_subject_ids.extend(list(a.subjects.values_list('id', flat=True)))
-        if fac_subject_ids:
-            subjects_with_sessions = subjects_with_sessions.filter(id__in=set(fac_subject_ids))
+        scope = get_faculty_scope(request.user)
+        if scope:
+            subjects_with_sessions = subjects_with_sessions.filter(id__in=scope.subject_ids)
         else:
             subjects_with_sessions = Subject.objects.none()
 
-    # Get attendance data grouped by subject
-    attendance_data = []
-    for subject in subjects_with_sessions:
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs.order_by('fullname')
-        else:
-            # If no assignment, show all active students (fallback)
-            students = StudentRecord.objects.filter(status='active').order_by('fullname')
-
-        # Get all weekly sessions for this subject
-        sessions = WeeklyAttendanceSession.objects.filter(subject=subject).order_by('week_number')
-        weeks_list = list(sessions)
-
-        # Calculate overall attendance percentage for each student
-        student_rows = []
-        for student in students:
-            week_attendance = []
-            overall_present = 0
-            overall_total = 0
-
-            for session in weeks_list:
-                try:
-                    record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                    # Count present sessions from individual session fields
-                    sessions_list = [record.session_1, record.session_2, record.session_3, record.session_4]
-                    present_count = sum(1 for s in sessions_list if s == 'P')
-                    total_count = len([s for s in sessions_list if s and s != '-'])
-
-                    # Calculate percentage for this week
-                    week_percentage = round((present_count / total_count * 100), 2) if total_count > 0 else 0
-
-                    # Create summary string
-                    summary = ','.join([s if s else '-' for s in sessions_list])
-
-                    overall_present += present_count
-                    overall_total += total_count
-
-                    week_attendance.append({
-                        'summary': summary,
-                        'percentage': week_percentage,
-                        'session_id': session.id
-                    })
-                except WeeklyAttendanceRecord.DoesNotExist:
-                    week_attendance.append({
-                        'summary': '-',
-                        'percentage': 0,
-                        'session_id': session.id
-                    })
-
-            # Calculate overall percentage
-            overall_percentage = round((overall_present / overall_total * 100), 2) if overall_total > 0 else 0
-
-            student_rows.append({
-                'student': student,
-                'week_attendance': week_attendance,
-                'overall_percentage': overall_percentage
-            })
-
-        attendance_data.append({
-            'subject': subject,
-            'weeks': weeks_list,
-            'student_rows': student_rows
-        })
-
-    # Pagination - paginate by subjects (each subject is a section)
-    page = request.GET.get('page', 1)
-    per_page = 5  # Show 5 subjects per page to avoid screen overflow
-    paginator = Paginator(attendance_data, per_page)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    # Only the subjects on the requested page are loaded (5 per page)
+    page_obj = ATTENDANCE_GRID.page(subjects_with_sessions, request.GET.get('page', 1))
 
     return render(request, 'attendance.html', {
         'attendance_data': page_obj if page_obj else [],
@@ -2769,56 +2132,24 @@ def add_attendance_session(request):
             week_end_date = form.cleaned_data['week_end_date']
             sessions_per_week = form.cleaned_data['sessions_per_week']
 
-            # Create the weekly session
-            session, created = WeeklyAttendanceSession.objects.get_or_create(
-                subject=subject,
-                week_number=week_number,
-                defaults={
-                    'week_start_date': week_start_date,
-                    'week_end_date': week_end_date,
-                    'sessions_per_week': sessions_per_week
-                }
+            # Create the weekly session and its roster of default records together
+            _, skipped, _ = create_weeks(
+                subject,
+                [(week_number, week_start_date, week_end_date)],
+                sessions_per_week=sessions_per_week,
             )
 
-            if created:
-                # Get assigned grade level for this subject
-                assigned_subject = AssignedSubject.objects.filter(
-                    subject=subject,
-                    status='Active'
-                ).first()
-
-                # Filter students by grade level if subject is assigned
-                if assigned_subject:
-                    grade_val = (assigned_subject.grade_level or '').strip()
-                    students_qs = StudentRecord.objects.filter(status='active')
-                    if grade_val:
-                        if ' - ' in grade_val or '-' in grade_val:
-                            students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                        else:
-                            students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-                    students = students_qs
-                else:
-                    students = StudentRecord.objects.filter(status='active')
-
-                # Create empty attendance records for all students
-                for student in students:
-                    WeeklyAttendanceRecord.objects.get_or_create(
-                        session=session,
-                        student=student,
-                        defaults={
-                            'session_1': 'A',
-                            'session_2': 'A',
-                            'session_3': 'A',
-                            'session_4': 'A'
-                        }
-                    )
-
-                messages.success(request, f'Week {week_number} attendance session created successfully!')
-            else:
-                messages.warning(request, f'Week {week_number} attendance session already exists for this subject.')
+            if skipped:
+                message = f'Week {week_number} attendance session already exists for this subject.'
+                if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                    return JsonResponse({'success': False, 'message': message})
+                messages.warning(request, message)
+                return redirect('attendance')
 
+            message = f'Week {week_number} attendance session created successfully!'
+            messages.success(request, message)
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Week {week_number} attendance session created successfully!'})
+                return JsonResponse({'success': True, 'message': message})
             return redirect('attendance')
     else:
         form = WeeklyAttendanceSessionForm()
@@ -2834,60 +2165,212 @@ def add_attendance_session(request):
         'tab': 'attendance'
     })
 
+
+@login_required
+@user_passes_test(faculty_required)
+def api_create_attendance_weeks(request):
+    """API endpoint to create a run of weekly attendance sessions for a subject.
+
+    POST subject_id, start_date (YYYY-MM-DD, the Monday of the first week),
+    num_weeks, and optionally first_week (default 1) and sessions_per_week
+    (default 4).  Weeks that already exist are skipped.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'POST required.'}, status=405)
+    subject_id = request.POST.get('subject_id', '')
+    subject = Subject.objects.filter(id=subject_id).first() if subject_id.isdigit() else None
+    if subject is None:
+        return JsonResponse({'success': False, 'message': 'Unknown subject.'}, status=400)
+    try:
+        start_date = datetime.strptime(request.POST.get('start_date', ''), '%Y-%m-%d').date()
+        num_weeks = int(request.POST.get('num_weeks', ''))
+        first_week = int(request.POST.get('first_week', 1))
+        sessions_per_week = int(request.POST.get('sessions_per_week', 4))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'start_date, num_weeks, first_week and sessions_per_week must be valid.'}, status=400)
+    if not 1 <= num_weeks <= MAX_WEEKS or first_week < 1 or not 1 <= sessions_per_week <= 7:
+        return JsonResponse({'success': False, 'message': f'num_weeks must be 1-{MAX_WEEKS}, first_week at least 1 and sessions_per_week 1-7.'}, status=400)
+
+    sessions, skipped, records = create_weeks(
+        subject, term_weeks(first_week, num_weeks, start_date), sessions_per_week=sessions_per_week
+    )
+    return JsonResponse({
+        'success': True,
+        'created_weeks': [session.week_number for session in sessions],
+        'skipped_weeks': skipped,
+        'records_created': records,
+    })
+
+
+MAX_CELLS_PER_REQUEST = 5000
+
+
+def score_summary_payload(pairs):
+    """Averages and overall grade of (student_id, subject_id) pairs, as shown
+    on the score overview, so pages can update their cells without reloading."""
+    pairs = set(pairs)
+    if not pairs:
+        return []
+    summaries = StudentSubjectSummary.objects.filter(
+        student_id__in={student_id for student_id, _ in pairs},
+        subject_id__in={subject_id for _, subject_id in pairs},
+    )
+    return [
+        {
+            'student_id': summary.student_id,
+            'subject_id': summary.subject_id,
+            'quiz_average': summary.quiz_average,
+            'exam_average': summary.exam_average,
+            'project_average': summary.project_average,
+            'attendance_average': summary.attendance_average,
+            'grade': summary.compute_grade(require_all=True),
+        }
+        for summary in summaries
+        if (summary.student_id, summary.subject_id) in pairs
+    ]
+
+
+@login_required
+@user_passes_test(faculty_required)
+def api_update_score_cells(request):
+    """API endpoint for spreadsheet-style score entry.
+
+    POST a JSON body {"cells": [{student_id, subject_id, kind, number,
+    score}, ...]}; attendance cells also carry `session` (1-4) and a mark as
+    the score.  Valid cells are written in one transaction and invalid ones
+    are returned in `errors` with their index.  `summaries` holds the new
+    averages and grade of every student and subject written to.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'POST required.'}, status=405)
+    try:
+        cells = json.loads(request.body).get('cells')
+    except (ValueError, AttributeError):
+        cells = None
+    if not isinstance(cells, list):
+        return JsonResponse({'success': False, 'message': 'Expected a JSON object with a "cells" list.'}, status=400)
+    if len(cells) > MAX_CELLS_PER_REQUEST:
+        return JsonResponse({'success': False, 'message': f'At most {MAX_CELLS_PER_REQUEST} cells per request.'}, status=400)
+
+    try:
+        result = write_cells(cells)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': f'Error saving scores: {str(e)}'}, status=500)
+    return JsonResponse({
+        'success': not result.rejected,
+        'message': f'Scores saved: {result.summary()}.',
+        'inserted': result.inserted,
+        'updated': result.updated,
+        'rejected': len(result.rejected),
+        'errors': [{'index': index, 'message': reason} for index, reason in sorted(result.rejected)],
+        'summaries': score_summary_payload(result.pairs),
+    })
+
+
+STUDENT_SEARCH_LIMIT = 10
+MAX_STUDENT_SEARCH_LIMIT = 50
+
+
+@login_required
+@user_passes_test(faculty_required)
+def api_student_search(request):
+    """Typeahead for student pickers: GET ?q=<words>[&limit=N].
+
+    Returns {"results": [{id, student_id, fullname, grade_and_section,
+    status}, ...]} ordered by name.  Every word must prefix a word of the
+    student's name, student ID or parent name.  Faculty only see students
+    of their assigned grade levels and advised sections.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', STUDENT_SEARCH_LIMIT)), 1), MAX_STUDENT_SEARCH_LIMIT)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'limit must be a number.'}, status=400)
+    if not query:
+        return JsonResponse({'success': True, 'results': []})
+
+    students = StudentRecord.objects.all()
+    if request.user.role == 'faculty':
+        scope = get_faculty_scope(request.user)
+        students = students.filter(
+            Q(grade_level__in=scope.grade_levels) | Q(section__adviser_user=request.user)
+        )
+    students = search_students(students, query).order_by('fullname', 'id')
+    results = students.values('id', 'student_id', 'fullname', 'grade_and_section', 'status')[:limit]
+    return JsonResponse({'success': True, 'results': list(results)})
+
+
+MAX_IMPORT_ERRORS_SHOWN = 200
+
+
+@login_required
+@user_passes_test(admin_required)
+def import_scores(request):
+    """Upload a CSV of scores; see account/importer.py for the format."""
+    result = None
+    error = None
+    chunk_size = DEFAULT_CHUNK_SIZE
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        try:
+            chunk_size = int(request.POST.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+            if upload is None:
+                raise ValueError('Choose a CSV file to import.')
+            importer = ScoreImporter(chunk_size=chunk_size)
+            result = importer.run(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+        except ValueError as e:
+            error = str(e)
+
+    return render(request, 'import_scores.html', {
+        'result': result,
+        'errors': result.errors[:MAX_IMPORT_ERRORS_SHOWN] if result else [],
+        'error': error,
+        'chunk_size': chunk_size,
+        'max_chunk_size': MAX_CHUNK_SIZE,
+        'columns': REQUIRED_COLUMNS,
+        'tab': 'score',
+    })
+
+
+@login_required
+@user_passes_test(admin_required)
+def export_gradebook(request):
+    """Stream the gradebook as CSV for the school, or for ?grade=, ?section= or ?subject=<id>."""
+    grade_level = request.GET.get('grade', '').strip()
+    section = request.GET.get('section', '').strip()
+    subject = None
+    subject_id = request.GET.get('subject', '').strip()
+    if subject_id:
+        if not subject_id.isdigit():
+            return JsonResponse({'success': False, 'message': 'subject must be a subject id.'}, status=400)
+        subject = get_object_or_404(Subject, pk=int(subject_id))
+
+    students = gradebook_students(grade_level, section, subject)
+    export = GradebookExport(students, subject=subject)
+
+    scope = slugify(section or grade_level or (subject.code if subject else '')) or 'school'
+    filename = f"gradebook-{scope}-{timezone.localdate():%Y%m%d}.csv"
+    response = StreamingHttpResponse(export.lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 def mark_attendance(request, session_id):
     """Display modal/form to mark attendance for a specific week"""
     search = request.GET.get('search', '').strip()
     session = get_object_or_404(WeeklyAttendanceSession, id=session_id)
 
-    # Get assigned grade level for this subject
-    assigned_subject = AssignedSubject.objects.filter(
-        subject=session.subject,
-        status='Active'
-    ).first()
-
-    # Filter students by grade level if subject is assigned
-    if assigned_subject:
-        grade_val = (assigned_subject.grade_level or '').strip()
-        students_qs = StudentRecord.objects.filter(status='active')
-        if grade_val:
-            if ' - ' in grade_val or '-' in grade_val:
-                students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-            else:
-                students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-        # apply search if provided
-        if search:
-            try:
-                if search.isdigit():
-                    students_qs = students_qs.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                else:
-                    students_qs = students_qs.filter(fullname__icontains=search)
-            except Exception:
-                pass
-        students = students_qs.order_by('fullname')
-    else:
-        students = StudentRecord.objects.filter(status='active').order_by('fullname')
-        if search:
-            try:
-                if search.isdigit():
-                    students = students.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                else:
-                    students = students.filter(fullname__icontains=search)
-            except Exception:
-                pass
+    students = subject_students([session.subject_id], search)[session.subject_id]
 
-    # Get or create attendance records
+    # Existing records in one query; students without one get an unsaved
+    # default record, which is only created when the week is saved
+    records = {
+        record.student_id: record
+        for record in session.attendance_records.filter(student_id__in=[student.id for student in students])
+    }
     attendance_records = []
     for student in students:
-        record, created = WeeklyAttendanceRecord.objects.get_or_create(
-            session=session,
-            student=student,
-            defaults={
-                'session_1': 'A',
-                'session_2': 'A',
-                'session_3': 'A',
-                'session_4': 'A'
-            }
-        )
+        record = records.get(student.id) or WeeklyAttendanceRecord(session=session, student=student)
         attendance_records.append({
             'student': student,
             'record': record
@@ -2906,42 +2389,11 @@ def save_attendance(request, session_id):
 
     if request.method == 'POST':
         try:
-            # Get assigned grade level for this subject
-            assigned_subject = AssignedSubject.objects.filter(
-                subject=session.subject,
-                status='Active'
-            ).first()
-
-            # Filter students by grade level if subject is assigned
-            if assigned_subject:
-                grade_val = (assigned_subject.grade_level or '').strip()
-                students_qs = StudentRecord.objects.filter(status='active')
-                if grade_val:
-                    if ' - ' in grade_val or '-' in grade_val:
-                        students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                    else:
-                        students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-                students = students_qs
-            else:
-                students = StudentRecord.objects.filter(status='active')
+            students = subject_students([session.subject_id])[session.subject_id]
+            marks = parse_marks(request.POST, [student.id for student in students])
+            changed = sum(save_marks(session, marks))
 
-            for student in students:
-                # Get the attendance record
-                record, created = WeeklyAttendanceRecord.objects.get_or_create(
-                    session=session,
-                    student=student
-                )
-
-                # Update attendance for each session
-                for session_num in range(1, 5):
-                    key = f'attendance_{student.id}_session_{session_num}'
-                    value = request.POST.get(key)
-                    if value in ['P', 'A', 'L', 'E']:
-                        setattr(record, f'session_{session_num}', value)
-
-                record.save()
-
-            messages.success(request, f'Attendance saved successfully for Week {session.week_number}!')
+            messages.success(request, f'Attendance saved successfully for Week {session.week_number}! ({changed} records changed)')
             return redirect('attendance')
         except Exception as e:
             messages.error(request, f'Error saving attendance: {str(e)}')
@@ -2957,14 +2409,15 @@ def delete_student_scores(request, student_id, subject_id):
     student = get_object_or_404(StudentRecord, id=student_id)
     subject = get_object_or_404(Subject, id=subject_id)
 
-    # Delete detailed score records
-    QuizScore.objects.filter(student=student, subject=subject).delete()
-    ExamScore.objects.filter(student=student, subject=subject).delete()
-    ProjectScore.objects.filter(student=student, subject=subject).delete()
+    with transaction.atomic():
+        # Delete detailed score records
+        QuizScore.objects.filter(student=student, subject=subject).delete()
+        ExamScore.objects.filter(student=student, subject=subject).delete()
+        ProjectScore.objects.filter(student=student, subject=subject).delete()
 
-    # Delete weekly attendance records for this subject & student
-    sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-    WeeklyAttendanceRecord.objects.filter(session__in=sessions, student=student).delete()
+        # Delete weekly attendance records for this subject & student
+        sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
+        WeeklyAttendanceRecord.objects.filter(session__in=sessions, student=student).delete()
 
     messages.success(
         request,
@@ -2988,48 +2441,17 @@ def score(request):
     # Filter by faculty assigned subjects if user is faculty
     if request.user.role == 'faculty':
         # Get assigned subjects for this faculty
-        assignments = FacultyAssignment.objects.filter(
-            faculty=request.user,
-            status='Active'
-        )
-        assigned_subject_ids = []
-        for assignment in assignments:
-            assigned_subject_ids.extend(assignment.subjects.values_list('id', flat=True))
-        assigned_subject_ids = list(set(assigned_subject_ids))
-
-        if assigned_subject_ids:
-            # Filter students by grade level of assigned subjects
-            assigned_subjects = Subject.objects.filter(id__in=assigned_subject_ids)
-            assigned_grade_levels = AssignedSubject.objects.filter(
-                subject__in=assigned_subjects,
-                status='Active'
-            ).values_list('grade_level', flat=True).distinct()
-
-            # Get students matching assigned grade levels
-            # grade_and_section format is "Grade 7 - A", so we need to check if it starts with the grade level
-            students = StudentRecord.objects.filter(status='active').order_by('fullname')
-            # Filter students whose grade_and_section starts with any assigned grade level
-            filtered_students = []
-            for student in students:
-                if student.grade_and_section:
-                    # Extract grade level from grade_and_section (format: "Grade 7 - A" or just "Grade 7")
-                    student_grade = student.grade_and_section.split(' - ')[0].strip()
-                    if student_grade in assigned_grade_levels:
-                        filtered_students.append(student.id)
-            students = StudentRecord.objects.filter(id__in=filtered_students).order_by('fullname')
-            if search:
-                try:
-                    if search.isdigit():
-                        students = students.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                    else:
-                        students = students.filter(fullname__icontains=search)
-                except Exception:
-                    pass
+        scope = get_faculty_scope(request.user)
+
+        if scope:
+            # Get students matching the grade levels of assigned subjects
+            students = scope.students(
+                StudentRecord.objects.filter(status='active')
+            ).order_by('fullname')
+            students = search_students(students, search)
 
             # Filter subjects to only assigned ones
-            subjects_with_scores = Subject.objects.filter(
-                id__in=assigned_subject_ids
-            ).filter(
+            subjects_with_scores = scope.subjects().filter(
                 Q(quiz_scores__isnull=False)
                 | Q(exam_scores__isnull=False)
                 | Q(project_scores__isnull=False)
@@ -3042,14 +2464,7 @@ def score(request):
     else:
         # Admin sees all
         students = StudentRecord.objects.filter(status='active').order_by('fullname')
-        if search:
-            try:
-                if search.isdigit():
-                    students = students.filter(Q(student_id__iexact=search) | Q(fullname__icontains=search))
-                else:
-                    students = students.filter(fullname__icontains=search)
-            except Exception:
-                pass
+        students = search_students(students, search)
         subjects_with_scores = Subject.objects.filter(
             Q(quiz_scores__isnull=False)
             | Q(exam_scores__isnull=False)
@@ -3057,119 +2472,7 @@ def score(request):
             | Q(attendance_sessions__isnull=False)
         ).distinct().order_by('name')
 
-    # Calculate averages per student per subject
-    student_score_data = []
-    for student in students:
-        student_subjects = []
-        for subject in subjects_with_scores:
-            # Calculate quiz average
-            quiz_scores = QuizScore.objects.filter(
-                student=student,
-                subject=subject,
-            )
-            avg_quiz = None
-            if quiz_scores.exists():
-                scores = [float(qs.score) for qs in quiz_scores]
-                avg_quiz = sum(scores) / len(scores) if scores else None
-
-            # Calculate exam average
-            exam_scores = ExamScore.objects.filter(
-                student=student,
-                subject=subject,
-            )
-            avg_exam = None
-            if exam_scores.exists():
-                scores = [float(es.score) for es in exam_scores]
-                avg_exam = sum(scores) / len(scores) if scores else None
-
-            # Calculate project average
-            project_scores = ProjectScore.objects.filter(
-                student=student,
-                subject=subject,
-            )
-            avg_project = None
-            if project_scores.exists():
-                scores = [float(ps.score) for ps in project_scores]
-                avg_project = sum(scores) / len(scores) if scores else None
-
-            # Calculate attendance average (overall percentage across all weeks)
-            attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-            avg_attendance = None
-            if attendance_sessions.exists():
-                overall_present = 0
-                overall_total = 0
-                for session in attendance_sessions:
-                    try:
-                        record = WeeklyAttendanceRecord.objects.get(
-                            session=session, student=student
-                        )
-                        # Count present sessions from individual session fields
-                        sessions_list = [record.session_1, record.session_2, record.session_3, record.session_4]
-                        present_count = sum(1 for s in sessions_list if s == 'P')
-                        total_count = len([s for s in sessions_list if s and s != '-'])
-                        overall_present += present_count
-                        overall_total += total_count
-                    except WeeklyAttendanceRecord.DoesNotExist:
-                        continue
-
-                if overall_total > 0:
-                    avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-            # Compute overall grade ONLY if ALL components are present
-            grade = None
-            if avg_quiz is not None and avg_exam is not None and avg_project is not None and avg_attendance is not None:
-                # Convert all to float to avoid Decimal/float type mixing
-                grade = (float(avg_quiz) + float(avg_exam) + float(avg_project) + float(avg_attendance)) / 4
-
-            # Only add subject if it has at least one type of score or attendance
-            if (
-                avg_quiz is not None
-                or avg_exam is not None
-                or avg_project is not None
-                or avg_attendance is not None
-            ):
-                # Determine performance category
-                performance_category = None
-                if grade is not None:
-                    if grade >= 90:
-                        performance_category = 'Excellent'
-                    elif grade >= 80:
-                        performance_category = 'Good'
-                    elif grade >= 70:
-                        performance_category = 'Average'
-                    else:
-                        performance_category = 'At Risk'
-
-                # Get ML prediction status if exists
-                ml_prediction = MLPredictionStatus.objects.filter(
-                    student=student,
-                    subject=subject
-                ).first()
-
-                student_subjects.append(
-                    {
-                        'subject': subject,
-                        'quiz_average': avg_quiz,
-                        'exam_average': avg_exam,
-                        'project_average': avg_project,
-                        'attendance_average': avg_attendance,
-                        'grade': grade,
-                        'performance_category': performance_category,
-                        'ml_prediction': ml_prediction,
-                        'student_id': student.id,
-                        'subject_id': subject.id,
-                    }
-                )
-
-        if student_subjects:
-            student_score_data.append(
-                {
-                    'student': student,
-                    'subjects': student_subjects,
-                }
-            )
-
-    # Pagination for students
+    # Pagination for students: only the visible page is scored
     page = request.GET.get('page', 1)
     per_page = 15  # Increased to reduce pagination when not needed
     paginator = Paginator(students, per_page)
@@ -3178,82 +2481,44 @@ def score(request):
     except:
         page_obj = paginator.page(1)
 
-    # Rebuild student_score_data for paginated students only
+    # Batch-load precomputed averages and ML predictions for the page
+    page_student_ids = [student.id for student in page_obj]
+    subjects = list(subjects_with_scores)
+    summaries = {
+        (summary.student_id, summary.subject_id): summary
+        for summary in StudentSubjectSummary.objects.filter(
+            student_id__in=page_student_ids,
+            subject_id__in=[subject.id for subject in subjects],
+        )
+    }
+    ml_predictions = {
+        (prediction.student_id, prediction.subject_id): prediction
+        for prediction in MLPredictionStatus.objects.filter(
+            student_id__in=page_student_ids,
+            subject_id__in=[subject.id for subject in subjects],
+        )
+    }
+
     paginated_student_score_data = []
     for student in page_obj:
         student_subjects = []
-        for subject in subjects_with_scores:
-            # Calculate averages for this student and subject
-            avg_quiz = None
-            avg_exam = None
-            avg_project = None
-            avg_attendance = None
-
-            quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-            if quiz_scores.exists():
-                avg_quiz = quiz_scores.aggregate(avg=Avg('score'))['avg']
-
-            exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-            if exam_scores.exists():
-                avg_exam = exam_scores.aggregate(avg=Avg('score'))['avg']
-
-            project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-            if project_scores.exists():
-                avg_project = project_scores.aggregate(avg=Avg('score'))['avg']
-
-            # Calculate attendance average
-            sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-            overall_present = 0
-            overall_total = 0
-            for session in sessions:
-                try:
-                    record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                    # Count present sessions from individual session fields
-                    sessions_list = [record.session_1, record.session_2, record.session_3, record.session_4]
-                    present_count = sum(1 for s in sessions_list if s == 'P')
-                    total_count = len([s for s in sessions_list if s and s != '-'])
-                    overall_present += present_count
-                    overall_total += total_count
-                except WeeklyAttendanceRecord.DoesNotExist:
-                    continue
-
-            if overall_total > 0:
-                avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-            # Compute overall grade ONLY if ALL components are present
-            grade = None
-            if avg_quiz is not None and avg_exam is not None and avg_project is not None and avg_attendance is not None:
-                # Convert all to float to avoid Decimal/float type mixing
-                grade = (float(avg_quiz) + float(avg_exam) + float(avg_project) + float(avg_attendance)) / 4
-
+        for subject in subjects:
+            summary = summaries.get((student.id, subject.id))
             # Only add subject if it has at least one type of score or attendance
-            if (avg_quiz is not None or avg_exam is not None or avg_project is not None or avg_attendance is not None):
-                performance_category = None
-                if grade is not None:
-                    if grade >= 90:
-                        performance_category = 'Excellent'
-                    elif grade >= 80:
-                        performance_category = 'Good'
-                    elif grade >= 70:
-                        performance_category = 'Average'
-                    else:
-                        performance_category = 'At Risk'
-
-                ml_prediction = MLPredictionStatus.objects.filter(
-                    student=student,
-                    subject=subject
-                ).first()
+            if summary is not None and summary.has_scores:
+                # Compute overall grade ONLY if ALL components are present
+                grade = summary.compute_grade(require_all=True)
 
                 student_subjects.append({
                     'subject': subject,
                     'subject_id': subject.id,
-                    'quiz_average': avg_quiz,
-                    'exam_average': avg_exam,
-                    'project_average': avg_project,
-                    'attendance_average': avg_attendance,
+                    'quiz_average': summary.quiz_average,
+                    'exam_average': summary.exam_average,
+                    'project_average': summary.project_average,
+                    'attendance_average': summary.attendance_average,
                     'grade': grade,
-                    'performance_category': performance_category,
-                    'ml_prediction': ml_prediction,
+                    'performance_category': performance_category(grade),
+                    'ml_prediction': ml_predictions.get((student.id, subject.id)),
                 })
 
         if student_subjects:
@@ -3291,11 +2556,7 @@ def add_quiz(request):
             if assigned_subject:
                 grade_val = (assigned_subject.grade_level or '').strip()
                 students_qs = StudentRecord.objects.filter(status='active')
-                if grade_val:
-                    if ' - ' in grade_val or '-' in grade_val:
-                        students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                    else:
-                        students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
+                students_qs = filter_grade_level(students_qs, grade_val)
                 students = students_qs.order_by('fullname')
             else:
                 # If no assignment, show all active students (fallback)
@@ -3338,45 +2599,25 @@ def save_quiz_scores(request):
 
         subject = get_object_or_404(Subject, id=subject_id)
 
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs
-        else:
-            # If no assignment, use all active students (fallback)
-            students = StudentRecord.objects.filter(status='active')
+        students = subject_students([subject.id])[subject.id]
+        numbers = range(start_quiz_num, start_quiz_num + num_quizzes)
 
+        result = ScoreWriteResult()
+        cells = QUIZ_WRITER.parse_post(
+            request.POST, subject.id, [student.id for student in students], numbers, result
+        )
         try:
-            for student in students:
-                for quiz_num in range(start_quiz_num, start_quiz_num + num_quizzes):
-                    score_key = f'score_{student.id}_{quiz_num}'
-                    score_value = request.POST.get(score_key)
-
-                    if score_value:
-                        score = float(score_value)
-                        QuizScore.objects.update_or_create(
-                            student=student,
-                            subject=subject,
-                            quiz_number=quiz_num,
-                            defaults={'score': score}
-                        )
-
-            messages.success(request, f'Quiz scores saved successfully for {subject.name}!')
-            return redirect('quiz')
+            QUIZ_WRITER.write(cells, result)
         except Exception as e:
             messages.error(request, f'Error saving quiz scores: {str(e)}')
+            return redirect('quiz')
+
+        if result.rejected:
+            rejected = '; '.join(f'{cell}: {reason}' for cell, reason in result.rejected[:10])
+            messages.warning(request, f'Quiz scores for {subject.name}: {result.summary()}. Rejected {rejected}')
+        else:
+            messages.success(request, f'Quiz scores saved successfully for {subject.name}! ({result.summary()})')
+        return redirect('quiz')
 
     return redirect('quiz')
 
@@ -3397,11 +2638,7 @@ def add_exam(request):
             if assigned_subject:
                 grade_val = (assigned_subject.grade_level or '').strip()
                 students_qs = StudentRecord.objects.filter(status='active')
-                if grade_val:
-                    if ' - ' in grade_val or '-' in grade_val:
-                        students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                    else:
-                        students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
+                students_qs = filter_grade_level(students_qs, grade_val)
                 students = students_qs.order_by('fullname')
             else:
                 # If no assignment, show all active students (fallback)
@@ -3444,45 +2681,25 @@ def save_exam_scores(request):
 
         subject = get_object_or_404(Subject, id=subject_id)
 
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs
-        else:
-            # If no assignment, use all active students (fallback)
-            students = StudentRecord.objects.filter(status='active')
+        students = subject_students([subject.id])[subject.id]
+        numbers = range(start_exam_num, start_exam_num + num_exams)
 
+        result = ScoreWriteResult()
+        cells = EXAM_WRITER.parse_post(
+            request.POST, subject.id, [student.id for student in students], numbers, result
+        )
         try:
-            for student in students:
-                for exam_num in range(start_exam_num, start_exam_num + num_exams):
-                    score_key = f'score_{student.id}_{exam_num}'
-                    score_value = request.POST.get(score_key)
-
-                    if score_value:
-                        score = float(score_value)
-                        ExamScore.objects.update_or_create(
-                            student=student,
-                            subject=subject,
-                            exam_number=exam_num,
-                            defaults={'score': score}
-                        )
-
-            messages.success(request, f'Exam scores saved successfully for {subject.name}!')
-            return redirect('exam')
+            EXAM_WRITER.write(cells, result)
         except Exception as e:
             messages.error(request, f'Error saving exam scores: {str(e)}')
+            return redirect('exam')
+
+        if result.rejected:
+            rejected = '; '.join(f'{cell}: {reason}' for cell, reason in result.rejected[:10])
+            messages.warning(request, f'Exam scores for {subject.name}: {result.summary()}. Rejected {rejected}')
+        else:
+            messages.success(request, f'Exam scores saved successfully for {subject.name}! ({result.summary()})')
+        return redirect('exam')
 
     return redirect('exam')
 
@@ -3503,11 +2720,7 @@ def add_project(request):
             if assigned_subject:
                 grade_val = (assigned_subject.grade_level or '').strip()
                 students_qs = StudentRecord.objects.filter(status='active')
-                if grade_val:
-                    if ' - ' in grade_val or '-' in grade_val:
-                        students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                    else:
-                        students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
+                students_qs = filter_grade_level(students_qs, grade_val)
                 students = students_qs.order_by('fullname')
             else:
                 # If no assignment, show all active students (fallback)
@@ -3550,45 +2763,25 @@ def save_project_scores(request):
 
         subject = get_object_or_404(Subject, id=subject_id)
 
-        # Get assigned grade level for this subject
-        assigned_subject = AssignedSubject.objects.filter(
-            subject=subject,
-            status='Active'
-        ).first()
-
-        # Filter students by grade level if subject is assigned
-        if assigned_subject:
-            grade_val = (assigned_subject.grade_level or '').strip()
-            students_qs = StudentRecord.objects.filter(status='active')
-            if grade_val:
-                if ' - ' in grade_val or '-' in grade_val:
-                    students_qs = students_qs.filter(grade_and_section__iexact=grade_val)
-                else:
-                    students_qs = students_qs.filter(grade_and_section__istartswith=grade_val)
-            students = students_qs
-        else:
-            # If no assignment, use all active students (fallback)
-            students = StudentRecord.objects.filter(status='active')
+        students = subject_students([subject.id])[subject.id]
+        numbers = range(start_project_num, start_project_num + num_projects)
 
+        result = ScoreWriteResult()
+        cells = PROJECT_WRITER.parse_post(
+            request.POST, subject.id, [student.id for student in students], numbers, result
+        )
         try:
-            for student in students:
-                for project_num in range(start_project_num, start_project_num + num_projects):
-                    score_key = f'score_{student.id}_{project_num}'
-                    score_value = request.POST.get(score_key)
-
-                    if score_value:
-                        score = float(score_value)
-                        ProjectScore.objects.update_or_create(
-                            student=student,
-                            subject=subject,
-                            project_number=project_num,
-                            defaults={'score': score}
-                        )
-
-            messages.success(request, f'Project scores saved successfully for {subject.name}!')
-            return redirect('project')
+            PROJECT_WRITER.write(cells, result)
         except Exception as e:
             messages.error(request, f'Error saving project scores: {str(e)}')
+            return redirect('project')
+
+        if result.rejected:
+            rejected = '; '.join(f'{cell}: {reason}' for cell, reason in result.rejected[:10])
+            messages.warning(request, f'Project scores for {subject.name}: {result.summary()}. Rejected {rejected}')
+        else:
+            messages.success(request, f'Project scores saved successfully for {subject.name}! ({result.summary()})')
+        return redirect('project')
 
     return redirect('project')
 
@@ -3610,82 +2803,21 @@ def prepare_ml_data():
     if not NUMPY_AVAILABLE:
         return None, None, None
 
-    X = []  # Features: quiz_avg, exam_avg, project_avg, attendance_avg
-    y_grade = []  # Target: final grade (for regression)
-    y_category = []  # Target: performance category (for classification)
-
-    students = StudentRecord.objects.filter(status='active')
-    for student in students:
-        subjects_with_scores = Subject.objects.filter(
-            Q(quiz_scores__student=student) |
-            Q(exam_scores__student=student) |
-            Q(project_scores__student=student) |
-            Q(attendance_sessions__attendance_records__student=student)
-        ).distinct()
-
-        for subject in subjects_with_scores:
-            # Calculate averages
-            quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-            avg_quiz = None
-            if quiz_scores.exists():
-                scores = [float(qs.score) for qs in quiz_scores]
-                avg_quiz = sum(scores) / len(scores) if scores else None
-
-            exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-            avg_exam = None
-            if exam_scores.exists():
-                scores = [float(es.score) for es in exam_scores]
-                avg_exam = sum(scores) / len(scores) if scores else None
-
-            project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-            avg_project = None
-            if project_scores.exists():
-                scores = [float(ps.score) for ps in project_scores]
-                avg_project = sum(scores) / len(scores) if scores else None
-
-            attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-            avg_attendance = None
-            if attendance_sessions.exists():
-                overall_present = 0
-                overall_total = 0
-                for session in attendance_sessions:
-                    try:
-                        record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                        summary = record.get_attendance_summary()
-                        sessions_list = summary.split(',')
-                        present_count = sum(1 for s in sessions_list if s == 'P')
-                        total_count = len([s for s in sessions_list if s != '-'])
-                        overall_present += present_count
-                        overall_total += total_count
-                    except WeeklyAttendanceRecord.DoesNotExist:
-                        continue
-                if overall_total > 0:
-                    avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-            # Only include if all features are present
-            if avg_quiz is not None and avg_exam is not None and avg_project is not None and avg_attendance is not None:
-                # Convert all to float to avoid Decimal/float type mixing
-                grade = (float(avg_quiz) + float(avg_exam) + float(avg_project) + float(avg_attendance)) / 4
-                X.append([avg_quiz, avg_exam, avg_project, avg_attendance])
-                y_grade.append(grade)
-
-                # Categorize performance
-                if grade >= 90:
-                    y_category.append('Excellent')
-                elif grade >= 80:
-                    y_category.append('Good')
-                elif grade >= 70:
-                    y_category.append('Average')
-                else:
-                    y_category.append('At Risk')
+    # Features: quiz_avg, exam_avg, project_avg, attendance_avg per (student, subject)
+    cube = GradeCube.from_summaries(
+        StudentSubjectSummary.objects.filter(student__status='active')
+    )
 
-    if len(X) == 0:
+    # Only include pairs where all features are present
+    grades = cube.grades(require_all=True)
+    complete = ~np.isnan(grades)
+    if not complete.any():
         return None, None, None
 
-    try:
-        return np.array(X), np.array(y_grade), np.array(y_category)
-    except NameError:
-        return None, None, None
+    X = cube.values[complete]
+    y_grade = grades[complete]  # Target: final grade (for regression)
+    y_category = GradeCube.categorize(y_grade)  # Target: performance category (for classification)
+    return X, y_grade, y_category
 
 def train_ml_models():
     """Train ML models for grade prediction"""
@@ -3729,87 +2861,22 @@ def predict_student_performance(request, student_id, subject_id):
     subject = get_object_or_404(Subject, id=subject_id)
 
     # Get current averages
-    quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-    avg_quiz = None
-    if quiz_scores.exists():
-        scores = [float(qs.score) for qs in quiz_scores]
-        avg_quiz = sum(scores) / len(scores) if scores else None
-
-    exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-    avg_exam = None
-    if exam_scores.exists():
-        scores = [float(es.score) for es in exam_scores]
-        avg_exam = sum(scores) / len(scores) if scores else None
-
-    project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-    avg_project = None
-    if project_scores.exists():
-        scores = [float(ps.score) for ps in project_scores]
-        avg_project = sum(scores) / len(scores) if scores else None
-
-    attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-    avg_attendance = None
-    if attendance_sessions.exists():
-        overall_present = 0
-        overall_total = 0
-        for session in attendance_sessions:
-            try:
-                record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                summary = record.get_attendance_summary()
-                sessions_list = summary.split(',')
-                present_count = sum(1 for s in sessions_list if s == 'P')
-                total_count = len([s for s in sessions_list if s != '-'])
-                overall_present += present_count
-                overall_total += total_count
-            except WeeklyAttendanceRecord.DoesNotExist:
-                continue
-        if overall_total > 0:
-            avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-    # Use available scores only - no requirement for all categories
-    # Calculate grade from available components
-    components = []
-    weights = []
-
-    if avg_quiz is not None:
-        components.append(avg_quiz)
-        weights.append(0.25)  # Default weight for quiz
-    if avg_exam is not None:
-        components.append(avg_exam)
-        weights.append(0.30)  # Default weight for exam
-    if avg_project is not None:
-        components.append(avg_project)
-        weights.append(0.25)  # Default weight for project
-    if avg_attendance is not None:
-        # Convert attendance percentage to grade scale (0-100)
-        attendance_grade = avg_attendance  # Already a percentage
-        components.append(attendance_grade)
-        weights.append(0.20)  # Default weight for attendance
-
-    if not components:
+    entry = GradeBook(students=[student], subjects=[subject]).get(student.id, subject.id)
+
+    # Use available scores only - no requirement for all categories.
+    # Weighted by the active grading components, renormalized over the
+    # components that have data.
+    predicted_grade = entry.compute_grade() if entry else None
+
+    if predicted_grade is None:
         error_msg = 'No scores available for prediction.'
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': False, 'message': error_msg}, status=400)
         messages.warning(request, error_msg)
         return redirect('score')
 
-    # Normalize weights to sum to 1.0
-    total_weight = sum(weights)
-    if total_weight > 0:
-        weights = [w / total_weight for w in weights]
-
-    # Calculate weighted average grade
-    predicted_grade = sum(comp * weight for comp, weight in zip(components, weights))
-
     # Determine category based on grade
-    if predicted_grade >= 90:
-        predicted_category = 'Excellent'
-    elif predicted_grade >= 80:
-        predicted_category = 'Good'
-    elif predicted_grade >= 70:
-        predicted_category = 'Average'
-    else:
-        predicted_category = 'At Risk'
+    predicted_category = performance_category(predicted_grade)
 
     # Save prediction to database
     MLPredictionStatus.objects.update_or_create(
@@ -3837,93 +2904,92 @@ def predict_student_performance(request, student_id, subject_id):
 @login_required
 @user_passes_test(faculty_required)
 def get_at_risk_students(request):
-    """Get list of students who are at risk based on current grades (< 70)"""
-    students = StudentRecord.objects.filter(status='active')
-    at_risk_list = []
+    """List students whose current grade is below a threshold (default 70).
 
-    for student in students:
-        subjects_with_scores = Subject.objects.filter(
-            Q(quiz_scores__student=student) |
-            Q(exam_scores__student=student) |
-            Q(project_scores__student=student) |
-            Q(attendance_sessions__attendance_records__student=student)
-        ).distinct()
-
-        for subject in subjects_with_scores:
-            quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-            exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-            project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-            attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-
-            avg_quiz = None
-            if quiz_scores.exists():
-                scores = [float(qs.score) for qs in quiz_scores]
-                avg_quiz = sum(scores) / len(scores) if scores else None
-
-            avg_exam = None
-            if exam_scores.exists():
-                scores = [float(es.score) for es in exam_scores]
-                avg_exam = sum(scores) / len(scores) if scores else None
-
-            avg_project = None
-            if project_scores.exists():
-                scores = [float(ps.score) for ps in project_scores]
-                avg_project = sum(scores) / len(scores) if scores else None
-
-            avg_attendance = None
-            if attendance_sessions.exists():
-                overall_present = 0
-                overall_total = 0
-                for session in attendance_sessions:
-                    try:
-                        record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                        summary = record.get_attendance_summary()
-                        sessions_list = summary.split(',')
-                        present_count = sum(1 for s in sessions_list if s == 'P')
-                        total_count = len([s for s in sessions_list if s != '-'])
-                        overall_present += present_count
-                        overall_total += total_count
-                    except WeeklyAttendanceRecord.DoesNotExist:
-                        continue
-                if overall_total > 0:
-                    avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-            # Calculate grade from available scores
-            available_scores = []
-            if avg_quiz is not None:
-                available_scores.append(avg_quiz)
-            if avg_exam is not None:
-                available_scores.append(avg_exam)
-            if avg_project is not None:
-                available_scores.append(avg_project)
-            if avg_attendance is not None:
-                available_scores.append(avg_attendance)
-
-            if available_scores:
-                current_grade = sum(available_scores) / len(available_scores)
-
-                # Categorize: <70 = At Risk, 70-79 = Average, 80-89 = Good, 90+ = Excellent
-                if current_grade < 70:
-                    at_risk_list.append({
-                        'student': student,
-                        'subject': subject,
-                        'current_grade': current_grade,
-                        'performance_category': 'At Risk',
-                        'avg_quiz': avg_quiz,
-                        'avg_exam': avg_exam,
-                        'avg_project': avg_project,
-                        'avg_attendance': avg_attendance,
-                    })
+    Optional GET filters: threshold, grade_level, section, subject (id) and
+    page / per_page.  `format=json` returns the page as JSON; AJAX requests
+    get the modal fragment.
+    """
+    try:
+        threshold = float(request.GET.get('threshold', 70))
+    except (TypeError, ValueError):
+        threshold = 70
+    grade_level = request.GET.get('grade_level', '').strip()
+    section = request.GET.get('section', '').strip()
+    subject_id = request.GET.get('subject', '').strip()
+    if not subject_id.isdigit():
+        subject_id = ''
+    try:
+        per_page = min(max(int(request.GET.get('per_page', 25)), 1), 100)
+    except (TypeError, ValueError):
+        per_page = 25
 
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render(request, 'modals/at_risk_students_modal.html', {
-            'at_risk_list': at_risk_list,
-            'tab': 'score'
+    summaries = StudentSubjectSummary.objects.at_risk(
+        threshold=threshold,
+        grade_level=grade_level or None,
+        section=section or None,
+        subject=subject_id or None,
+    ).select_related('student', 'subject').order_by('student_id', 'subject_id')
+
+    paginator = Paginator(summaries, per_page)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+
+    at_risk_list = []
+    for summary in page_obj:
+        at_risk_list.append({
+            'student': summary.student,
+            'subject': summary.subject,
+            'current_grade': summary.grade,
+            'performance_category': summary.category,
+            'avg_quiz': summary.quiz_average,
+            'avg_exam': summary.exam_average,
+            'avg_project': summary.project_average,
+            'avg_attendance': summary.attendance_average,
         })
-    return render(request, 'at_risk_students.html', {
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'success': True,
+            'threshold': threshold,
+            'count': paginator.count,
+            'page': page_obj.number,
+            'num_pages': paginator.num_pages,
+            'results': [
+                {
+                    'student_id': item['student'].id,
+                    'fullname': item['student'].fullname,
+                    'grade_and_section': item['student'].grade_and_section,
+                    'subject_id': item['subject'].id,
+                    'subject': item['subject'].name,
+                    'current_grade': item['current_grade'],
+                    'performance_category': item['performance_category'],
+                    'avg_quiz': item['avg_quiz'],
+                    'avg_exam': item['avg_exam'],
+                    'avg_project': item['avg_project'],
+                    'avg_attendance': item['avg_attendance'],
+                }
+                for item in at_risk_list
+            ],
+        })
+
+    # Current filters, re-applied by the pagination links
+    filter_params = request.GET.copy()
+    filter_params.pop('page', None)
+    context = {
         'at_risk_list': at_risk_list,
+        'page_obj': page_obj,
+        'threshold': threshold,
+        'grade_level': grade_level,
+        'section': section,
+        'subject_id': subject_id,
+        'filter_query': filter_params.urlencode(),
         'tab': 'score'
-    })
+    }
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return render(request, 'modals/at_risk_students_modal.html', context)
+    context['subjects'] = Subject.objects.order_by('name')
+    context['grade_levels'] = [choice for choice, _ in StudentRecord.SECTION_CHOICES]
+    return render(request, 'at_risk_students.html', context)
 
 # ==================== PDF GENERATION ====================
 from django.http import HttpResponse
@@ -3931,157 +2997,110 @@ from io import BytesIO
 from datetime import datetime
 
 def generate_grade_pdf(request, student_id):
-    """Generate PDF report for a student's grades and scores"""
+    """Serve a student's grade report PDF, from the on-disk cache when its data is unchanged"""
+    student = get_object_or_404(StudentRecord, id=student_id)
+    version = REPORT_CARD_CACHE.version(student)
+    etag = f'"{version}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
+        pdf = REPORT_CARD_CACHE.open_pdf(student, version)
     except ImportError:
         messages.error(request, 'PDF generation requires reportlab. Please install: pip install reportlab')
         return redirect('score')
 
-    student = get_object_or_404(StudentRecord, id=student_id)
+    filename = f'grade_report_{student.fullname}_{datetime.now().strftime("%Y%m%d")}.pdf'
+    response = FileResponse(pdf, as_attachment=True, filename=filename, content_type='application/pdf')
+    response['ETag'] = etag
+    # Revalidate on every download so changed grades are picked up
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    # Get all subjects with scores
-    subjects_with_scores = Subject.objects.filter(
-        Q(quiz_scores__student=student) |
-        Q(exam_scores__student=student) |
-        Q(project_scores__student=student) |
-        Q(attendance_sessions__attendance_records__student=student)
-    ).distinct()
-
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=30,
-    )
+@login_required
+@user_passes_test(faculty_required)
+def generate_report_cards(request):
+    """Report cards for a whole ?section= ('Grade 7 - A') or ?grade= ('Grade 7').
 
-    # Title
-    elements.append(Paragraph(f"Grade Report - {student.fullname}", title_style))
-    elements.append(Paragraph(f"Student ID: {student.student_id} | Grade & Section: {student.grade_and_section}", styles['Normal']))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Build data for each subject
-    for subject in subjects_with_scores:
-        # Calculate averages
-        quiz_scores = QuizScore.objects.filter(student=student, subject=subject)
-        exam_scores = ExamScore.objects.filter(student=student, subject=subject)
-        project_scores = ProjectScore.objects.filter(student=student, subject=subject)
-
-        avg_quiz = None
-        if quiz_scores.exists():
-            scores = [float(qs.score) for qs in quiz_scores]
-            avg_quiz = sum(scores) / len(scores) if scores else None
-
-        avg_exam = None
-        if exam_scores.exists():
-            scores = [float(es.score) for es in exam_scores]
-            avg_exam = sum(scores) / len(scores) if scores else None
-
-        avg_project = None
-        if project_scores.exists():
-            scores = [float(ps.score) for ps in project_scores]
-            avg_project = sum(scores) / len(scores) if scores else None
-
-        # Calculate attendance
-        attendance_sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-        avg_attendance = None
-        if attendance_sessions.exists():
-            overall_present = 0
-            overall_total = 0
-            for session in attendance_sessions:
-                try:
-                    record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
-                    summary = record.get_attendance_summary()
-                    sessions_list = summary.split(',')
-                    present_count = sum(1 for s in sessions_list if s == 'P')
-                    total_count = len([s for s in sessions_list if s != '-'])
-                    overall_present += present_count
-                    overall_total += total_count
-                except WeeklyAttendanceRecord.DoesNotExist:
-                    continue
-            if overall_total > 0:
-                avg_attendance = round((overall_present / overall_total) * 100, 2)
-
-        # Calculate grade
-        grade = None
-        if avg_quiz is not None and avg_exam is not None and avg_project is not None and avg_attendance is not None:
-            grade = (avg_quiz + avg_exam + avg_project + avg_attendance) / 4
-
-        # Subject header
-        elements.append(Paragraph(f"<b>{subject.name} ({subject.code})</b>", styles['Heading2']))
-
-        # Create table data
-        data = [
-            ['Category', 'Average'],
-            ['Quiz', f"{avg_quiz:.2f}" if avg_quiz else "N/A"],
-            ['Exam', f"{avg_exam:.2f}" if avg_exam else "N/A"],
-            ['Project', f"{avg_project:.2f}" if avg_project else "N/A"],
-            ['Attendance', f"{avg_attendance:.2f}%" if avg_attendance else "N/A"],
-            ['Overall Grade', f"{grade:.2f}" if grade else "N/A"],
-        ]
+    ?format=zip (default) streams one PDF per student in a ZIP archive,
+    rendered one at a time as the archive is sent; ?format=pdf returns a
+    single merged PDF.  Process pools are left to the generate_report_cards
+    command, which should be used for large batches.
+    """
+    grade_level = request.GET.get('grade', '').strip()
+    section = request.GET.get('section', '').strip()
+    output = request.GET.get('format', 'zip')
+    try:
+        import reportlab  # noqa: F401 - checked up front, the ZIP is rendered while streaming
+    except ImportError:
+        messages.error(request, 'PDF generation requires reportlab. Please install: pip install reportlab')
+        return redirect('score')
+    if not (grade_level or section) or output not in ('zip', 'pdf'):
+        messages.error(request, 'Choose a section or grade level, and a zip or pdf format.')
+        return redirect('score')
+
+    cards = report_cards(scope_students(grade_level, section))
+    if not cards:
+        messages.warning(request, 'No active students found for that section or grade level.')
+        return redirect('score')
+
+    scope = slugify(section or grade_level) or 'students'
+    filename = f"report_cards_{scope}_{cards[0]['generated'].strftime('%Y%m%d')}"
 
-        table = Table(data, colWidths=[3*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f2937')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-
-        elements.append(table)
-        elements.append(Spacer(1, 0.3*inch))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-
-    # Create response
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="grade_report_{student.fullname}_{datetime.now().strftime("%Y%m%d")}.pdf"'
+    if output == 'pdf':
+        response = HttpResponse(render_merged(cards), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
+        return response
+    response = StreamingHttpResponse(zip_report_cards(cards, workers=1), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
     return response
 
 # ==================== EDIT SCORES ====================
+def _save_edited_scores(request, writer, student, subject, numbers, label):
+    """Write the scores posted by an edit-scores form through `writer`.
+
+    Fields are named 'score_<student id>_<number>' as on the add-scores
+    pages and get the same validation; valid scores are saved even when
+    others are rejected.  AJAX posts get JSON with the new summary values.
+    """
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    result = ScoreWriteResult()
+    cells = writer.parse_post(request.POST, subject.id, [student.id], numbers, result)
+    try:
+        writer.write(cells, result)
+    except Exception as e:
+        message = f'Error updating {label.lower()}: {str(e)}'
+        if is_ajax:
+            return JsonResponse({'success': False, 'message': message}, status=500)
+        messages.error(request, message)
+        return redirect('score')
+
+    if result.rejected:
+        rejected = '; '.join(f'{cell}: {reason}' for cell, reason in result.rejected)
+        message = f'{label} for {student.fullname}: {result.summary()}. Rejected {rejected}'
+    else:
+        message = f'{label} updated for {student.fullname}!'
+    if is_ajax:
+        return JsonResponse({
+            'success': not result.rejected,
+            'message': message,
+            'errors': [{'field': cell, 'message': reason} for cell, reason in result.rejected],
+            'summaries': score_summary_payload(result.pairs),
+        })
+    if result.rejected:
+        messages.warning(request, message)
+    else:
+        messages.success(request, message)
+    return redirect('score')
+
+
 def edit_quiz_scores(request, student_id, subject_id):
     """Edit quiz scores for a specific student and subject"""
     student = get_object_or_404(StudentRecord, id=student_id)
     subject = get_object_or_404(Subject, id=subject_id)
 
-    if request.method == 'POST':
-        try:
-            for key, value in request.POST.items():
-                if key.startswith('quiz_') and value:
-                    quiz_num = int(key.split('_')[1])
-                    score = float(value)
-                    QuizScore.objects.update_or_create(
-                        student=student,
-                        subject=subject,
-                        quiz_number=quiz_num,
-                        defaults={'score': score}
-                    )
-            messages.success(request, f'Quiz scores updated for {student.fullname}!')
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Quiz scores updated for {student.fullname}!'})
-            return redirect('score')
-        except Exception as e:
-            messages.error(request, f'Error updating quiz scores: {str(e)}')
-
     # Get all quiz scores for this student and subject, but show inputs for
     # all quiz numbers that exist for the subject so missing earlier quizzes
     # can be filled when editing (e.g., student has quiz 3 but not 1-2).
@@ -4096,6 +3115,9 @@ def edit_quiz_scores(request, student_id, subject_id):
     else:
         quiz_dict = student_scores_map
 
+    if request.method == 'POST':
+        return _save_edited_scores(request, QUIZ_WRITER, student, subject, quiz_dict, 'Quiz scores')
+
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return render(request, 'modals/edit_quiz_scores_modal.html', {
             'student': student,
@@ -4117,25 +3139,6 @@ def edit_exam_scores(request, student_id, subject_id):
     student = get_object_or_404(StudentRecord, id=student_id)
     subject = get_object_or_404(Subject, id=subject_id)
 
-    if request.method == 'POST':
-        try:
-            for key, value in request.POST.items():
-                if key.startswith('exam_') and value:
-                    exam_num = int(key.split('_')[1])
-                    score = float(value)
-                    ExamScore.objects.update_or_create(
-                        student=student,
-                        subject=subject,
-                        exam_number=exam_num,
-                        defaults={'score': score}
-                    )
-            messages.success(request, f'Exam scores updated for {student.fullname}!')
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Exam scores updated for {student.fullname}!'})
-            return redirect('score')
-        except Exception as e:
-            messages.error(request, f'Error updating exam scores: {str(e)}')
-
     exam_scores = ExamScore.objects.filter(student=student, subject=subject).order_by('exam_number')
     student_exam_map = {es.exam_number: es.score for es in exam_scores}
     subject_exam_nums = list(ExamScore.objects.filter(subject=subject).values_list('exam_number', flat=True).distinct())
@@ -4145,6 +3148,9 @@ def edit_exam_scores(request, student_id, subject_id):
     else:
         exam_dict = student_exam_map
 
+    if request.method == 'POST':
+        return _save_edited_scores(request, EXAM_WRITER, student, subject, exam_dict, 'Exam scores')
+
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return render(request, 'modals/edit_exam_scores_modal.html', {
             'student': student,
@@ -4166,25 +3172,6 @@ def edit_project_scores(request, student_id, subject_id):
     student = get_object_or_404(StudentRecord, id=student_id)
     subject = get_object_or_404(Subject, id=subject_id)
 
-    if request.method == 'POST':
-        try:
-            for key, value in request.POST.items():
-                if key.startswith('project_') and value:
-                    project_num = int(key.split('_')[1])
-                    score = float(value)
-                    ProjectScore.objects.update_or_create(
-                        student=student,
-                        subject=subject,
-                        project_number=project_num,
-                        defaults={'score': score}
-                    )
-            messages.success(request, f'Project scores updated for {student.fullname}!')
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Project scores updated for {student.fullname}!'})
-            return redirect('score')
-        except Exception as e:
-            messages.error(request, f'Error updating project scores: {str(e)}')
-
     project_scores = ProjectScore.objects.filter(student=student, subject=subject).order_by('project_number')
     student_project_map = {ps.project_number: ps.score for ps in project_scores}
     subject_project_nums = list(ProjectScore.objects.filter(subject=subject).values_list('project_number', flat=True).distinct())
@@ -4194,6 +3181,9 @@ def edit_project_scores(request, student_id, subject_id):
     else:
         project_dict = student_project_map
 
+    if request.method == 'POST':
+        return _save_edited_scores(request, PROJECT_WRITER, student, subject, project_dict, 'Project scores')
+
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return render(request, 'modals/edit_project_scores_modal.html', {
             'student': student,
@@ -4217,38 +3207,46 @@ def edit_attendance_scores(request, student_id, subject_id):
 
     if request.method == 'POST':
         try:
-            sessions = WeeklyAttendanceSession.objects.filter(subject=subject)
-            for session in sessions:
-                record, created = WeeklyAttendanceRecord.objects.get_or_create(
-                    session=session,
-                    student=student
-                )
-                for session_num in range(1, 5):
-                    key = f'attendance_{session.id}_session_{session_num}'
-                    value = request.POST.get(key)
-                    if value in ['P', 'A', 'L', 'E']:
-                        setattr(record, f'session_{session_num}', value)
-                record.save()
+            # {session: {field: mark}} of the posted weeks; '-' clears a mark
+            marks = {}
+            for session in WeeklyAttendanceSession.objects.filter(subject=subject):
+                for number, field in enumerate(ATTENDANCE_SESSION_FIELDS, start=1):
+                    value = request.POST.get(f'attendance_{session.id}_session_{number}')
+                    if value in ATTENDANCE_MARKS:
+                        marks.setdefault(session, {})[field] = value
+                    elif value == CLEAR_MARK:
+                        marks.setdefault(session, {})[field] = None
+            with transaction.atomic():
+                for session, session_marks in marks.items():
+                    save_marks(session, {student.id: session_marks})
             messages.success(request, f'Attendance updated for {student.fullname}!')
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Attendance updated for {student.fullname}!'})
+                return JsonResponse({
+                    'success': True,
+                    'message': f'Attendance updated for {student.fullname}!',
+                    'summaries': score_summary_payload({(student.id, subject.id)}),
+                })
             return redirect('score')
         except Exception as e:
             messages.error(request, f'Error updating attendance: {str(e)}')
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'message': f'Error updating attendance: {str(e)}'})
 
-    sessions = WeeklyAttendanceSession.objects.filter(subject=subject).order_by('week_number')
+    sessions = list(WeeklyAttendanceSession.objects.filter(subject=subject).order_by('week_number'))
+    records = {
+        record.session_id: record
+        for record in WeeklyAttendanceRecord.objects.filter(session__subject=subject, student=student)
+    }
     attendance_data = {}
     for session in sessions:
-        try:
-            record = WeeklyAttendanceRecord.objects.get(session=session, student=student)
+        record = records.get(session.id)
+        if record is not None:
             attendance_data[session.id] = {
                 'session': session,
                 'record': record,
                 'sessions': [record.session_1 or '-', record.session_2 or '-', record.session_3 or '-', record.session_4 or '-']
             }
-        except WeeklyAttendanceRecord.DoesNotExist:
+        else:
             attendance_data[session.id] = {
                 'session': session,
                 'record': None,
@@ -4264,13 +3262,10 @@ def edit_attendance_scores(request, student_id, subject_id):
             'subject_id': subject_id,
             'tab': 'attendance'
         })
+    # Weeks without a record show unsaved defaults; they are created on save
     attendance_records = []
     for session in sessions:
-        record, created = WeeklyAttendanceRecord.objects.get_or_create(
-            session=session,
-            student=student,
-            defaults={'session_1': 'A', 'session_2': 'A', 'session_3': 'A', 'session_4': 'A'}
-        )
+        record = records.get(session.id) or WeeklyAttendanceRecord(session=session, student=student)
         attendance_records.append({
             'session': session,
             'record': record
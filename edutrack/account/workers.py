@@ -0,0 +1,25 @@
+"""Process pools for CPU-bound batch work (password hashing, PDF rendering)."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    # Spawned workers start without Django; forked ones already have it
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def process_pool(workers):
+    """A ProcessPoolExecutor of `workers` processes with Django set up in each."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def map_chunksize(items, workers):
+    """A pool.map() chunksize giving each worker about four batches."""
+    return max(1, len(items) // (workers * 4))
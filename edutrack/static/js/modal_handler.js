@@ -1,3 +1,30 @@
+// Score summaries - cells marked data-summary="<student id>_<subject id>"
+// and data-summary-field="quiz_average" (or exam_average, project_average,
+// attendance_average, grade) are refreshed from the `summaries` list that
+// score saves return, instead of reloading the page.
+function updateScoreSummaries(summaries) {
+    (summaries || []).forEach(function(summary) {
+        const key = summary.student_id + '_' + summary.subject_id;
+        document.querySelectorAll('[data-summary="' + key + '"]').forEach(function(cell) {
+            const value = summary[cell.dataset.summaryField];
+            if (value === undefined) return;
+            if (value === null || value === '' || Number(value) === 0) {
+                cell.textContent = '-';
+                return;
+            }
+            const text = Number(value).toFixed(2) + (cell.dataset.summarySuffix || '');
+            if (cell.dataset.summaryStrong) {
+                const strong = document.createElement('strong');
+                strong.textContent = text;
+                cell.replaceChildren(strong);
+            } else {
+                cell.textContent = text;
+            }
+        });
+    });
+}
+window.updateScoreSummaries = updateScoreSummaries;
+
 // Modal Form Handler - Handles AJAX form submissions in modals
 document.addEventListener('DOMContentLoaded', function() {
     // Handle modal form submissions
@@ -60,9 +87,12 @@ document.addEventListener('DOMContentLoaded', function() {
                         setTimeout(() => alertDiv.remove(), 3000);
                     }
                     
-                    // Redirect if specified, otherwise reload
+                    // Redirect if specified; score saves update their cells
+                    // in place; anything else reloads
                     if (data.redirect) {
                         window.location.href = data.redirect;
+                    } else if (data.summaries) {
+                        updateScoreSummaries(data.summaries);
                     } else {
                         window.location.reload();
                     }
@@ -106,3 +136,142 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+
+// Score autosave - forms with data-autosave-url send their changed cells
+// (inputs with data-cell-number) to the cell-update endpoint in batches.
+// Saving such a form sends all of its cells as one batch instead of posting
+// the whole form.
+(function() {
+    const AUTOSAVE_DELAY = 800;
+
+    function autosaveCsrfToken(form) {
+        return form.querySelector('[name=csrfmiddlewaretoken]')?.value ||
+               document.cookie.match(/csrftoken=([^;]+)/)?.[1] || '';
+    }
+
+    // The value a field was rendered (or last saved) with
+    function savedValue(input) {
+        if (input.tagName === 'SELECT') {
+            const option = Array.from(input.options).find(option => option.defaultSelected);
+            return option ? option.value : '';
+        }
+        return input.defaultValue;
+    }
+
+    function markSaved(input) {
+        if (input.tagName === 'SELECT') {
+            Array.from(input.options).forEach(option => { option.defaultSelected = option.selected; });
+        } else {
+            input.defaultValue = input.value;
+        }
+    }
+
+    function cellFor(form, input) {
+        const value = input.value.trim();
+        // Blank scores are not saved; a '-' attendance mark clears the
+        // session, so it is only sent when the mark was changed to it
+        if (value === '' || (value === '-' && savedValue(input) === '-')) return null;
+        const cell = {
+            kind: form.dataset.autosaveKind,
+            student_id: Number(input.dataset.cellStudent || form.dataset.studentId),
+            subject_id: Number(form.dataset.subjectId),
+            number: Number(input.dataset.cellNumber),
+            score: value
+        };
+        if (input.dataset.cellSession) cell.session = Number(input.dataset.cellSession);
+        return cell;
+    }
+
+    function sendCells(form, inputs) {
+        const pending = [];
+        inputs.forEach(function(input) {
+            const cell = cellFor(form, input);
+            if (cell) pending.push({ input: input, cell: cell });
+        });
+        if (!pending.length) return Promise.resolve({ success: true, errors: [] });
+
+        return fetch(form.dataset.autosaveUrl, {
+            method: 'POST',
+            body: JSON.stringify({ cells: pending.map(item => item.cell) }),
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': autosaveCsrfToken(form)
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            pending.forEach(function(item) {
+                item.input.classList.remove('is-invalid');
+                item.input.removeAttribute('title');
+            });
+            const rejected = new Set();
+            (data.errors || []).forEach(function(error) {
+                const item = pending[error.index];
+                if (item) {
+                    item.input.classList.add('is-invalid');
+                    item.input.title = error.message;
+                    rejected.add(item);
+                }
+            });
+            // Saved values become the form's defaults, so a reset (e.g. when
+            // the modal closes) keeps them
+            pending.forEach(function(item) {
+                if (!rejected.has(item)) markSaved(item.input);
+            });
+            updateScoreSummaries(data.summaries);
+            return data;
+        });
+    }
+
+    function flushAutosave(form) {
+        clearTimeout(form._autosaveTimer);
+        const inputs = Array.from(form._autosavePending || []);
+        form._autosavePending = new Set();
+        return sendCells(form, inputs);
+    }
+
+    document.addEventListener('change', function(e) {
+        const form = e.target.closest('form[data-autosave-url]');
+        if (!form || !e.target.dataset.cellNumber) return;
+        form._autosavePending = form._autosavePending || new Set();
+        form._autosavePending.add(e.target);
+        clearTimeout(form._autosaveTimer);
+        form._autosaveTimer = setTimeout(function() {
+            flushAutosave(form).catch(error => console.error('Autosave failed:', error));
+        }, AUTOSAVE_DELAY);
+    });
+
+    // Capture phase, so this runs before the form's own submit handlers
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        if (!form.matches || !form.matches('form[data-autosave-url]')) return;
+        e.preventDefault();
+        e.stopImmediatePropagation();
+
+        clearTimeout(form._autosaveTimer);
+        form._autosavePending = new Set();
+        sendCells(form, Array.from(form.querySelectorAll('[data-cell-number]')))
+        .then(data => {
+            if (!data.success) {
+                alert((data.message || 'Some scores could not be saved.') + ' Check the highlighted cells.');
+                return;
+            }
+            const modalElement = form.closest('.modal');
+            if (modalElement && window.bootstrap) {
+                const modal = bootstrap.Modal.getInstance(modalElement);
+                if (modal) modal.hide();
+            }
+            // The changed cells were updated by sendCells
+            if (form.dataset.autosaveRedirect) {
+                window.location.href = form.dataset.autosaveRedirect;
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('An error occurred. Please try again.');
+        });
+    }, true);
+
+    window.flushAutosave = flushAutosave;
+})();